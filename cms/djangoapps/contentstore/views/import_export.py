@@ -265,7 +265,8 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                     settings.GITHUB_REPO_ROOT, [dirpath],
                     load_error_modules=False,
                     static_content_store=contentstore(),
-                    target_id=courselike_key
+                    target_id=courselike_key,
+                    static_import_workers=settings.COURSE_IMPORT_STATIC_WORKERS
                 )
 
                 new_location = courselike_items[0].location
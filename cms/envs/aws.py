@@ -165,6 +165,7 @@ TECH_SUPPORT_EMAIL = ENV_TOKENS.get('TECH_SUPPORT_EMAIL', TECH_SUPPORT_EMAIL)
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
+COURSE_IMPORT_STATIC_WORKERS = ENV_TOKENS.get('COURSE_IMPORT_STATIC_WORKERS', COURSE_IMPORT_STATIC_WORKERS)
 
 # Theme overrides
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
@@ -255,6 +256,8 @@ DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
+SPLIT_STRUCTURE_CACHE_SIZE = ENV_TOKENS.get('SPLIT_STRUCTURE_CACHE_SIZE', SPLIT_STRUCTURE_CACHE_SIZE)
+SPLIT_DEFINITION_CACHE_SIZE = ENV_TOKENS.get('SPLIT_DEFINITION_CACHE_SIZE', SPLIT_DEFINITION_CACHE_SIZE)
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
@@ -327,6 +327,15 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Bytes of split modulestore structures kept in each process. Structures never
+# change once written, so they're cached by version; if a 'course_structure_cache'
+# cache is configured, they're shared between processes through it as well.
+SPLIT_STRUCTURE_CACHE_SIZE = 200 * 1024 * 1024
+
+# Bytes of split modulestore definitions kept in each process. Like structures,
+# definitions never change once written, so they're cached by id.
+SPLIT_DEFINITION_CACHE_SIZE = 100 * 1024 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -744,6 +753,7 @@ INSTALLED_APPS = (
     'edx_jsme',    # Molecular Structure
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
 )
 
 
@@ -757,6 +767,9 @@ MKTG_URL_LINK_MAP = {
 
 COURSES_WITH_UNSAFE_CODE = []
 
+# Number of threads which save a course's static files to the contentstore when it is imported
+COURSE_IMPORT_STATIC_WORKERS = 4
+
 ############################## EVENT TRACKING #################################
 
 TRACK_MAX_EVENT = 50000
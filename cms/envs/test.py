@@ -108,6 +108,10 @@ update_module_store_settings(
     },
 )
 
+# Don't cache split structures or definitions, so that tests counting mongo calls see every read
+SPLIT_STRUCTURE_CACHE_SIZE = 0
+SPLIT_DEFINITION_CACHE_SIZE = 0
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
@@ -0,0 +1,343 @@
+"""
+A local, on-disk LRU cache of large assets.
+
+Assets too big for memcached (videos, PDFs) are otherwise read out of GridFS on
+every request, including every seek a video player makes.  This keeps copies of
+them on the app server's disk, keyed by location and content digest so that a
+re-uploaded asset is never served stale; old copies simply age out.
+
+Files are written to a temporary name and renamed into place, so several
+processes can share one directory, and only the process holding a file's lock
+(created with O_EXCL) copies it.  Each process copies in one background thread,
+fed from a bounded queue.  Recency is tracked with the files' access
+times, which are bumped on every hit.  Each process keeps a running total of
+the directory's size, and only rescans it when that total goes over the limit.
+"""
+
+import errno
+import hashlib
+import logging
+import os
+import Queue
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContentStream
+from xmodule.exceptions import NotFoundError
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+log = logging.getLogger(__name__)
+
+# How many bytes to read at a time from a cached file.
+READ_CHUNK_SIZE = 256 * 1024
+
+# After how many seconds a lock or temporary file is assumed to be left over
+# from a copy that died.
+STALE_LOCK_AGE = 60 * 60
+
+# Prefixes of the names of files being copied, and of their locks.
+TEMP_PREFIX = '.tmp-'
+LOCK_PREFIX = '.lock-'
+
+# How many copies may wait for a process's copier thread.
+COPY_QUEUE_SIZE = 16
+
+
+class AssetDiskCache(object):
+    """
+    Keeps copies of assets in `directory`, up to `max_size` bytes in all.
+
+    Only assets of `content_types` (prefixes such as 'video/') and of at most
+    `max_file_size` bytes are kept.
+    """
+    def __init__(self, directory, max_size, max_file_size, content_types):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.content_types = tuple(content_types)
+        # Our idea of the size of the directory, or None until it's been scanned.
+        self._size = None
+        self._size_lock = threading.Lock()
+        self._copy_queue = Queue.Queue(COPY_QUEUE_SIZE)
+        # The pid of the process the copier thread was started in: threads
+        # don't survive forking, so a forked worker starts its own.
+        self._copier_pid = None
+        self._copier_lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def is_cacheable(self, content):
+        """
+        Should `content` be kept on disk?
+        """
+        return (
+            getattr(content, 'content_digest', None) is not None and
+            content.length is not None and
+            content.length <= self.max_file_size and
+            (content.content_type or '').startswith(self.content_types)
+        )
+
+    def _path(self, content):
+        """
+        The path of the file holding `content`.
+        """
+        key = hashlib.sha1(unicode(content.location).encode('utf-8') + '/' + content.content_digest)
+        return os.path.join(self.directory, key.hexdigest())
+
+    def get(self, content):
+        """
+        Return the cached copy of `content` as a StaticContentStream, or None.
+
+        `content` only needs its metadata; its data isn't read.
+        """
+        path = self._path(content)
+        try:
+            stream = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            # Evicted by another process while we opened it; the open file
+            # is still good.
+            pass
+
+        cached = StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        cached.chunk_size = READ_CHUNK_SIZE
+        return cached
+
+    def _lock(self, path):
+        """
+        Take the lock on copying to `path`. Returns False if another process
+        has it, or the copy is already there.
+        """
+        lock_path = self._lock_path(path)
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+            # Take over a lock whose owner died mid-copy.
+            try:
+                if time.time() - os.stat(lock_path).st_mtime < STALE_LOCK_AGE:
+                    return False
+                os.unlink(lock_path)
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except OSError:
+                return False
+
+        # The last holder may have finished the copy just before we got here.
+        if os.path.exists(path):
+            self._unlock(path)
+            return False
+        return True
+
+    def _unlock(self, path):
+        """
+        Release the lock on copying to `path`.
+        """
+        try:
+            os.unlink(self._lock_path(path))
+        except OSError:
+            # Taken over as stale, and released by its new holder.
+            pass
+
+    def _lock_path(self, path):
+        """
+        The path of the lock file for copying to `path`.
+        """
+        directory, name = os.path.split(path)
+        return os.path.join(directory, LOCK_PREFIX + name)
+
+    def add(self, content):
+        """
+        Copy the data of `content` to disk, and return the cached copy.
+
+        Returns None, without reading `content`, if another process is
+        already copying it.
+        """
+        path = self._path(content)
+        if os.path.exists(path):
+            return self.get(content)
+        if not self._lock(path):
+            return None
+        self._copy(content, path)
+        return self.get(content)
+
+    def add_in_background(self, content):
+        """
+        Copy `content` to disk in this process's copier thread, which reads it
+        afresh from the contentstore; `content` itself isn't read.
+
+        Nothing is copied if the copy is already there, another process is
+        making it, or the copier has too much to do already. Returns whether
+        the copy was queued.
+        """
+        path = self._path(content)
+        if os.path.exists(path) or not self._lock(path):
+            return False
+        try:
+            self._copy_queue.put_nowait((content.location, path))
+        except Queue.Full:
+            self._unlock(path)
+            return False
+        self._start_copier()
+        return True
+
+    def _start_copier(self):
+        """
+        Start the copier thread in this process, if it isn't running yet.
+        """
+        pid = os.getpid()
+        if self._copier_pid == pid:
+            return
+        with self._copier_lock:
+            if self._copier_pid != pid:
+                thread = threading.Thread(target=self._run_copier, name='asset-disk-cache-copier')
+                thread.daemon = True
+                thread.start()
+                self._copier_pid = pid
+
+    def _run_copier(self):
+        """
+        Copy queued assets to disk, forever.
+        """
+        while True:
+            location, path = self._copy_queue.get()
+            try:
+                self._copy_from_contentstore(location, path)
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u"Couldn't copy %s to the asset disk cache", unicode(location))
+                self._unlock(path)
+
+    def _copy_from_contentstore(self, location, path):
+        """
+        Copy the asset at `location` to `path`, which we hold the lock on.
+        """
+        try:
+            content = AssetManager.find(location, as_stream=True)
+        except (ItemNotFoundError, NotFoundError):
+            # Deleted since we looked it up.
+            self._unlock(path)
+            return
+        try:
+            if self._path(content) != path:
+                # Replaced since we looked it up; the new version is copied
+                # when it's next requested.
+                self._unlock(path)
+                return
+            self._copy(content, path)
+        finally:
+            content.close()
+
+    def _copy(self, content, path):
+        """
+        Copy the data of `content` to `path`, which we hold the lock on, and
+        release the lock.
+        """
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix=TEMP_PREFIX)
+            try:
+                with os.fdopen(handle, 'wb') as temp_file:
+                    for chunk in content.stream_data():
+                        temp_file.write(chunk)
+                size = os.path.getsize(temp_path)
+                os.rename(temp_path, path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        finally:
+            self._unlock(path)
+
+        with self._size_lock:
+            if self._size is None:
+                self._evict()
+            else:
+                self._size += size
+                if self._size > self.max_size:
+                    self._evict()
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache fits in `max_size`.
+        """
+        with self._size_lock:
+            self._evict()
+
+    def _evict(self):
+        """
+        Rescan the directory, evict from it, and reset our idea of its size.
+
+        Temporary and lock files count towards the size, but are only removed
+        once they're stale, when the copy making them has died.
+
+        Call with `_size_lock` held.
+        """
+        entries = []
+        total_size = 0
+        stale_before = time.time() - STALE_LOCK_AGE
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.startswith((TEMP_PREFIX, LOCK_PREFIX)):
+                if stat.st_mtime < stale_before:
+                    try:
+                        os.unlink(path)
+                        continue
+                    except OSError:
+                        pass
+                total_size += stat.st_size
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total_size += stat.st_size
+
+        for __, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Another process got there first.
+                pass
+            total_size -= size
+        self._size = total_size
+
+
+_DISK_CACHE = None
+_DISK_CACHE_CONFIG = None
+
+
+def get_disk_cache():
+    """
+    Return the AssetDiskCache configured by settings.STATIC_CONTENT_DISK_CACHE,
+    or None if there isn't one.
+    """
+    global _DISK_CACHE, _DISK_CACHE_CONFIG  # pylint: disable=global-statement
+    config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None) or {}
+    if not config.get('DIRECTORY'):
+        return None
+    if config != _DISK_CACHE_CONFIG:
+        _DISK_CACHE_CONFIG = dict(config)
+        try:
+            _DISK_CACHE = AssetDiskCache(
+                config['DIRECTORY'],
+                config.get('MAX_SIZE', 10 * 1024 ** 3),
+                config.get('MAX_FILE_SIZE', 1024 ** 3),
+                config.get('CONTENT_TYPES', ('video/', 'application/pdf')),
+            )
+        except OSError:
+            log.exception(u"Couldn't set up the asset disk cache in %s", config['DIRECTORY'])
+            _DISK_CACHE = None
+    return _DISK_CACHE
@@ -3,7 +3,9 @@ Middleware to serve assets.
 """
 
 import logging
+import uuid
 
+import dogstats_wrapper as dog_stats_api
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
@@ -15,6 +17,7 @@ from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.disk_cache import get_disk_cache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -59,6 +62,9 @@ class StaticContentServer(object):
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
+                    else:
+                        # larger assets may have a copy on local disk, which saves reading them out of GridFS
+                        content = self.get_from_disk_cache(content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
@@ -81,9 +87,18 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # content cached before digests were recorded has none, and so no ETag
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
+
+            # see if the client has cached this content: If-None-Match takes precedence over
+            # If-Modified-Since, and if either matches just return a 304 (Not Modified)
+            if etag and 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
@@ -96,10 +111,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,42 +123,121 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        # Unsatisfiable ranges are ignored, as long as at least one range can be satisfied.
+                        ranges = [
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = HttpResponse(
+                                content.stream_data_in_range(first, last), content_type=content.content_type
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
                             response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # Content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_byteranges_response(content, ranges)
 
             # If Range header is absent or syntactically invalid return a full content response.
+            # The content is streamed from its iterator rather than read into memory.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = HttpResponse(content.stream_data(), content_type=content.content_type)
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            if etag:
+                response['ETag'] = etag
 
             return response
 
+    def get_from_disk_cache(self, content):
+        """
+        Return the copy of the streamed `content` on local disk, if there is one.
+
+        Otherwise returns `content` itself, to be served from GridFS, and copies it to
+        the disk cache in the background if it belongs there.
+        """
+        disk_cache = get_disk_cache()
+        if disk_cache is None or not disk_cache.is_cacheable(content):
+            return content
+
+        cached = disk_cache.get(content)
+        if cached is not None:
+            dog_stats_api.increment('contentserver.disk_cache', tags=['result:hit'])
+            content.close()
+            return cached
+
+        dog_stats_api.increment('contentserver.disk_cache', tags=['result:miss'])
+        try:
+            disk_cache.add_in_background(content)
+        except (IOError, OSError):
+            log.exception(u"Couldn't copy %s to the asset disk cache", unicode(content.location))
+        return content
+
+
+def etag_matches(header_value, etag):
+    """
+    Does the If-None-Match `header_value` match `etag`?
+    """
+    if header_value.strip() == '*':
+        return True
+    # weak comparison is fine for a GET
+    return any(
+        candidate.strip().replace('W/', '', 1) == etag for candidate in header_value.split(',')
+    )
+
+
+def multipart_byteranges_response(content, ranges):
+    """
+    Returns a 206 response with a multipart/byteranges body holding each of `ranges` of `content`.
+    """
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        (
+            '--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n'
+            '\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing = '\r\n--{boundary}--\r\n'.format(boundary=boundary)
+
+    def body():
+        """
+        Stream each part in turn.
+        """
+        for index, (first, last) in enumerate(ranges):
+            yield ('\r\n' if index else '') + part_headers[index]
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+        yield closing
+
+    response = HttpResponse(body(), status=206, content_type='multipart/byteranges; boundary=' + boundary)
+    response['Content-Length'] = str(
+        sum(len(header) for header in part_headers) +
+        sum(last - first + 1 for first, last in ranges) +
+        2 * (len(ranges) - 1) +
+        len(closing)
+    )
+    return response
+
 
 def parse_range_header(header_value, content_length):
     """
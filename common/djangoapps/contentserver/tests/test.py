@@ -4,6 +4,10 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import mock
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -11,12 +15,16 @@ from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from xmodule.contentstore.content import StaticContent
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
+from contentserver import disk_cache
+from contentserver.disk_cache import AssetDiskCache
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -146,7 +154,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message with each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +162,67 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+
+        body = ''.join(resp)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+        self.assertTrue(body.endswith('\r\n--{}--\r\n'.format(boundary)))
+        parts = body.split('--{}'.format(boundary))[1:-1]
+        self.assertEqual(len(parts), 2)
+        self.assertIn(
+            'Content-Range: bytes {first}-{last}/{length}'.format(
+                first=first_byte, last=last_byte, length=self.length_unlocked
+            ),
+            parts[0]
+        )
+        self.assertIn(
+            'Content-Range: bytes {first}-{last}/{length}'.format(
+                first=self.length_unlocked - 100, last=self.length_unlocked - 1, length=self.length_unlocked
+            ),
+            parts[1]
+        )
+
+    def test_range_request_some_ranges_unsatisfiable(self):
+        """
+        Test that unsatisfiable ranges are dropped when another range can be satisfied.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked)
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_etag(self):
+        """
+        Test that responses carry an ETag, and that a matching If-None-Match gets a 304.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertEqual(etag, '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5')))
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", W/{}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_range_request_cached_content(self):
+        """
+        Test that a range request for content served from the cache gets just that range.
+        """
+        # The first request puts the content in the cache.
+        self.client.get(self.url_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(len(''.join(resp)), 10)
 
     @ddt.data(
         'bytes 0-',
@@ -236,3 +302,122 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the on-disk asset cache.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.disk_cache = AssetDiskCache(self.directory, 250, 100, ['video/', 'application/pdf'])
+
+    def make_content(self, name, data, content_type='video/mp4', content_digest='digest'):
+        """
+        Returns in-memory content for a course asset.
+        """
+        location = StaticContent.compute_location(SlashSeparatedCourseKey('org', 'course', 'run'), name)
+        return StaticContent(
+            location, name, content_type, data, length=len(data), content_digest=content_digest
+        )
+
+    def test_is_cacheable(self):
+        self.assertTrue(self.disk_cache.is_cacheable(self.make_content('a.mp4', 'x' * 100)))
+        self.assertTrue(self.disk_cache.is_cacheable(self.make_content('a.pdf', 'x', 'application/pdf')))
+        self.assertFalse(self.disk_cache.is_cacheable(self.make_content('a.mp4', 'x' * 101)))
+        self.assertFalse(self.disk_cache.is_cacheable(self.make_content('a.txt', 'x', 'text/plain')))
+        self.assertFalse(self.disk_cache.is_cacheable(self.make_content('a.mp4', 'x', content_digest=None)))
+
+    def test_add_and_get(self):
+        content = self.make_content('a.mp4', '0123456789')
+        self.assertIsNone(self.disk_cache.get(content))
+
+        cached = self.disk_cache.add(content)
+        self.assertEqual(''.join(cached.stream_data()), '0123456789')
+        self.assertEqual(''.join(self.disk_cache.get(content).stream_data_in_range(2, 4)), '234')
+
+        # A new version of the asset isn't served from the old copy.
+        self.assertIsNone(self.disk_cache.get(self.make_content('a.mp4', 'abcdefghij', content_digest='new')))
+
+    def test_least_recently_used_are_evicted(self):
+        contents = [self.make_content('{}.mp4'.format(index), 'x' * 100) for index in range(3)]
+        self.disk_cache.add(contents[0])
+        self.disk_cache.add(contents[1])
+        # Set the access times explicitly, as they may be too coarse to tell the files apart.
+        os.utime(self.disk_cache._path(contents[0]), (2000, 2000))  # pylint: disable=protected-access
+        os.utime(self.disk_cache._path(contents[1]), (1000, 1000))  # pylint: disable=protected-access
+
+        self.disk_cache.add(contents[2])
+        self.assertIsNotNone(self.disk_cache.get(contents[0]))
+        self.assertIsNone(self.disk_cache.get(contents[1]))
+        self.assertIsNotNone(self.disk_cache.get(contents[2]))
+
+    def test_only_one_copy_at_a_time(self):
+        content = self.make_content('a.mp4', '0123456789')
+        path = self.disk_cache._path(content)  # pylint: disable=protected-access
+        self.assertTrue(self.disk_cache._lock(path))  # pylint: disable=protected-access
+
+        self.assertIsNone(self.disk_cache.add(content))
+        self.assertIsNone(self.disk_cache.get(content))
+
+    def test_stale_lock_is_taken_over(self):
+        content = self.make_content('a.mp4', '0123456789')
+        path = self.disk_cache._path(content)  # pylint: disable=protected-access
+        self.assertTrue(self.disk_cache._lock(path))  # pylint: disable=protected-access
+        os.utime(self.disk_cache._lock_path(path), (1000, 1000))  # pylint: disable=protected-access
+
+        self.assertEqual(''.join(self.disk_cache.add(content).stream_data()), '0123456789')
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(path)])
+
+    def test_directory_is_scanned_only_when_full(self):
+        contents = [self.make_content('{}.mp4'.format(index), 'x' * 100) for index in range(3)]
+        with mock.patch('contentserver.disk_cache.os.listdir', wraps=os.listdir) as listdir:
+            self.disk_cache.add(contents[0])
+            self.disk_cache.add(contents[1])
+            self.assertEqual(listdir.call_count, 1)
+
+            self.disk_cache.add(contents[2])
+            self.assertEqual(listdir.call_count, 2)
+        self.assertEqual(self.disk_cache._size, 200)  # pylint: disable=protected-access
+
+    def test_existing_copy_is_not_copied_again(self):
+        content = self.make_content('a.mp4', 'x' * 100)
+        self.disk_cache.add(content)
+        self.disk_cache.add(content)
+        self.assertEqual(self.disk_cache._size, 100)  # pylint: disable=protected-access
+
+    def test_add_in_background_queues_one_copy(self):
+        content = self.make_content('a.mp4', '0123456789')
+        with mock.patch.object(self.disk_cache, '_start_copier') as start_copier:
+            self.assertTrue(self.disk_cache.add_in_background(content))
+            self.assertFalse(self.disk_cache.add_in_background(content))
+        self.assertEqual(start_copier.call_count, 1)
+        self.assertEqual(self.disk_cache._copy_queue.qsize(), 1)  # pylint: disable=protected-access
+
+    def test_add_in_background_when_queue_is_full(self):
+        contents = [
+            self.make_content('{}.mp4'.format(index), 'x')
+            for index in range(disk_cache.COPY_QUEUE_SIZE + 1)
+        ]
+        with mock.patch.object(self.disk_cache, '_start_copier'):
+            for content in contents[:-1]:
+                self.assertTrue(self.disk_cache.add_in_background(content))
+            self.assertFalse(self.disk_cache.add_in_background(contents[-1]))
+        # The lock isn't left behind to stop a later copy.
+        path = self.disk_cache._path(contents[-1])  # pylint: disable=protected-access
+        self.assertFalse(os.path.exists(self.disk_cache._lock_path(path)))  # pylint: disable=protected-access
+
+    def test_leftover_files_are_counted_and_removed_once_stale(self):
+        leftover = os.path.join(self.directory, disk_cache.TEMP_PREFIX + 'dead')
+        fresh = os.path.join(self.directory, disk_cache.TEMP_PREFIX + 'copying')
+        for path in (leftover, fresh):
+            with open(path, 'wb') as temp_file:
+                temp_file.write('x' * 100)
+        os.utime(leftover, (1000, 1000))
+
+        self.disk_cache.evict()
+        self.assertFalse(os.path.exists(leftover))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(self.disk_cache._size, 100)  # pylint: disable=protected-access
@@ -1,6 +1,7 @@
 """
 Models for reverification features common to both lms and studio
 """
+from collections import defaultdict
 from datetime import datetime
 import pytz
 
@@ -53,3 +54,20 @@ class MidcourseReverificationWindow(ValidateOnSaveMixin, models.Model):
             return cls.objects.get(course_id=course_id, start_date__lte=date, end_date__gte=date)
         except cls.DoesNotExist:
             return None
+
+    @classmethod
+    def get_windows(cls, course_ids, date):
+        """
+        Bulk version of `get_window`.
+
+        Returns a dict mapping each of `course_ids` with exactly one window open
+        for `date` to that window, using a single query.
+        """
+        windows = defaultdict(list)
+        for window in cls.objects.filter(course_id__in=course_ids, start_date__lte=date, end_date__gte=date):
+            windows[window.course_id].append(window)
+        return {
+            course_id: course_windows[0]
+            for course_id, course_windows in windows.iteritems()
+            if len(course_windows) == 1
+        }
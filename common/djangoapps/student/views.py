@@ -59,7 +59,9 @@ from student.models import (
 from student.forms import AccountCreationForm, PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification, MidcourseReverificationWindow
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, certificate_status_for_student, certificate_statuses_for_courses
+)
 from dark_lang.models import DarkLangConfig
 
 from xmodule.modulestore.django import modulestore
@@ -109,7 +111,6 @@ from student.helpers import (
     auth_pipeline_urls, set_logged_in_cookie,
     check_verify_status_by_course
 )
-from xmodule.error_module import ErrorDescriptor
 from shoppingcart.models import DonationConfiguration, CourseRegistrationCode
 
 from embargo import api as embargo_api
@@ -181,10 +182,12 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course, course_mode):
+def cert_info(user, course, course_mode, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course.  `cert_status`, if given, is the student's certificate
+    status as returned by `certificate_status_for_student`; otherwise it's looked
+    up.  Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -197,7 +200,9 @@ def cert_info(user, course, course_mode):
     if not course.may_certify():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id), course_mode)
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status, course_mode)
 
 
 def reverification_info(course_enrollment_pairs, user, statuses):
@@ -217,8 +222,12 @@ def reverification_info(course_enrollment_pairs, user, statuses):
             dict["must_reverify"] = [some information]
     """
     reverifications = defaultdict(list)
+    windows = MidcourseReverificationWindow.get_windows(
+        [course.id for course, __ in course_enrollment_pairs],
+        datetime.datetime.now(UTC)
+    )
     for (course, enrollment) in course_enrollment_pairs:
-        info = single_course_reverification_info(user, course, enrollment)
+        info = _reverification_info_for_window(user, course, enrollment, windows.get(course.id))
         if info:
             reverifications[info.status].append(info)
 
@@ -245,7 +254,14 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
         OR, None: None if there is no re-verification info for this enrollment
     """
     window = MidcourseReverificationWindow.get_window(course.id, datetime.datetime.now(UTC))
+    return _reverification_info_for_window(user, course, enrollment, window)
+
 
+def _reverification_info_for_window(user, course, enrollment, window):
+    """
+    Implements the logic for single_course_reverification_info, given the
+    reverification window open for the course, or None if there isn't one.
+    """
     # If there's no window OR the user is not verified, we don't get reverification info
     if (not window) or (enrollment.mode != "verified"):
         return None
@@ -259,32 +275,34 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
 
 def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
-    Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
-    a student's dashboard.
+    Get the relevant set of (CourseOverview, CourseEnrollment) pairs to be
+    displayed on a student's dashboard.
+
+    The overviews of all the courses are loaded at once, rather than each
+    course from the modulestore.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        store = modulestore()
-        with store.bulk_operations(enrollment.course_id):
-            course = store.get_course(enrollment.course_id)
-            if course and not isinstance(course, ErrorDescriptor):
-
-                # if we are in a Microsite, then filter out anything that is not
-                # attributed (by ORG) to that Microsite
-                if course_org_filter and course_org_filter != course.location.org:
-                    continue
-                # Conversely, if we are not in a Microsite, then let's filter out any enrollments
-                # with courses attributed (by ORG) to Microsites
-                elif course.location.org in org_filter_out_set:
-                    continue
-
-                yield (course, enrollment)
-            else:
-                log.error(
-                    u"User %s enrolled in %s course %s",
-                    user.username,
-                    "broken" if course else "non-existent",
-                    enrollment.course_id
-                )
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    course_overviews = CourseOverview.get_from_ids([enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        course_overview = course_overviews[enrollment.course_id]
+        if course_overview is None:
+            log.error(
+                u"User %s enrolled in broken or non-existent course %s",
+                user.username,
+                enrollment.course_id
+            )
+            continue
+
+        # if we are in a Microsite, then filter out anything that is not
+        # attributed (by ORG) to that Microsite
+        if course_org_filter and course_org_filter != course_overview.org:
+            continue
+        # Conversely, if we are not in a Microsite, then let's filter out any enrollments
+        # with courses attributed (by ORG) to Microsites
+        elif course_overview.org in org_filter_out_set:
+            continue
+
+        yield (course_overview, enrollment)
 
 
 def _cert_info(user, course, cert_status, course_mode):
@@ -592,8 +610,9 @@ def dashboard(request):
         course_enrollment_pairs,
         all_course_modes
     )
+    certificate_statuses = certificate_statuses_for_courses(user, enrolled_course_ids)
     cert_statuses = {
-        course.id: cert_info(request.user, course, _enrollment.mode)
+        course.id: cert_info(request.user, course, _enrollment.mode, certificate_statuses[course.id])
         for course, _enrollment in course_enrollment_pairs
     }
 
@@ -617,8 +636,15 @@ def dashboard(request):
     show_refund_option_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                        if _enrollment.refundable())
 
+    # Load the registration codes the user redeemed in any of their courses at once
+    redeemed_registration_codes = defaultdict(list)
+    for registration_code in CourseRegistrationCode.objects.filter(
+            course_id__in=enrolled_course_ids,
+            registrationcoderedemption__redeemed_by=request.user
+    ):
+        redeemed_registration_codes[registration_code.course_id].append(registration_code)
     block_courses = frozenset(course.id for course, enrollment in course_enrollment_pairs
-                              if is_course_blocked(request, CourseRegistrationCode.objects.filter(course_id=course.id, registrationcoderedemption__redeemed_by=request.user), course.id))
+                              if is_course_blocked(request, redeemed_registration_codes[course.id], course.id))
 
     enrolled_courses_either_paid = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                              if _enrollment.is_paid_course())
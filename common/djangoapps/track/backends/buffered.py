@@ -0,0 +1,192 @@
+"""
+Event tracker backend that queues events in memory and sends them to another
+backend in batches, from a background thread.
+
+Sending events is then off the request path: a slow backend delays the
+events, not the requests emitting them. Buffering is turned on for a backend
+by adding a 'BUFFER' entry to its TRACKING_BACKENDS configuration::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.mongodb.MongoBackend',
+          'OPTIONS': {...},
+          'BUFFER': {
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'flush_interval': 1.0,
+              'overflow_policy': 'drop_newest',
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from django.db import close_connection
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# What to do with an event sent when the queue is full:
+# drop the event,
+DROP_NEWEST = 'drop_newest'
+# drop the oldest queued event to make room for it,
+DROP_OLDEST = 'drop_oldest'
+# or wait up to `block_timeout` seconds for room, then drop the event.
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events for `backend`, and sends them to
+    its `send_batch` in batches.
+
+    A batch is sent when `batch_size` events are queued, or when the oldest
+    queued event has waited `flush_interval` seconds. At most
+    `max_queue_size` events are queued; `overflow_policy` (one of
+    OVERFLOW_POLICIES) says what happens to events sent beyond that. Queued
+    events are sent when the process exits.
+    """
+    def __init__(self, backend, name, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 overflow_policy=DROP_NEWEST, block_timeout=0.1, **kwargs):
+        super(BufferedBackend, self).__init__(**kwargs)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError('Invalid overflow policy {0} for event track backend {1}'.format(overflow_policy, name))
+
+        self.backend = backend
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.queue = Queue.Queue(max_queue_size)
+        # Only one batch is sent at a time, so that events are sent in order
+        self._send_lock = threading.Lock()
+        # The pid of the process the flusher thread was started in: threads
+        # don't survive forking, so a forked worker starts its own.
+        self._flusher_pid = None
+        self._flusher_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def send(self, event):
+        """Queue the event to be sent by the flusher thread."""
+        self._start_flusher()
+        if self.overflow_policy == BLOCK:
+            try:
+                self.queue.put(event, timeout=self.block_timeout)
+            except Queue.Full:
+                self._dropped()
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(event)
+                    break
+                except Queue.Full:
+                    if self.overflow_policy == DROP_NEWEST:
+                        self._dropped()
+                        break
+                    try:
+                        self.queue.get_nowait()
+                        self._dropped()
+                    except Queue.Empty:
+                        pass
+
+    def send_batch(self, events):
+        """Queue each of the events."""
+        for event in events:
+            self.send(event)
+
+    def flush(self):
+        """Send all the queued events now."""
+        while True:
+            batch = self._get_batch(block=False)
+            if not batch:
+                break
+            self._send_batch(batch)
+
+    def _dropped(self):
+        """Count an event dropped because the queue was full."""
+        dog_stats_api.increment('track.buffer.dropped', tags=[u'backend:{0}'.format(self.name)])
+
+    def _start_flusher(self):
+        """Start the flusher thread in this process, if it isn't running yet."""
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._flusher_pid != pid:
+                thread = threading.Thread(target=self._run_flusher, name='track-flusher-{0}'.format(self.name))
+                thread.daemon = True
+                thread.start()
+                self._flusher_pid = pid
+
+    def _run_flusher(self):
+        """Send batches of queued events, forever."""
+        while True:
+            self._flush_next_batch()
+
+    def _flush_next_batch(self):
+        """
+        Wait for a batch of queued events and send it.
+
+        The flusher thread's database connection (used by backends storing
+        events in the database) is closed after a failed batch, so that a
+        broken connection isn't reused, and whenever no events come, so that
+        it isn't held open, or timed out by the server, while the thread idles.
+        """
+        try:
+            batch = self._get_batch(block=True)
+            if batch:
+                self._send_batch(batch)
+            else:
+                close_connection()
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending events to event track backend %s', self.name)
+            close_connection()
+
+    def _get_batch(self, block):
+        """
+        Take a batch of events off the queue.
+
+        If `block`, wait up to `flush_interval` seconds for a first event, and
+        as long again from then for the batch to fill up.
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if not block:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                if deadline is None:
+                    batch.append(self.queue.get(timeout=self.flush_interval))
+                    deadline = time.time() + self.flush_interval
+                    continue
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                batch.append(self.queue.get(timeout=timeout))
+            except Queue.Empty:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the backend, recording metrics about it."""
+        tags = [u'backend:{0}'.format(self.name)]
+        dog_stats_api.histogram('track.buffer.queue_depth', self.queue.qsize(), tags=tags)
+        dog_stats_api.histogram('track.buffer.batch_size', len(batch), tags=tags)
+        with self._send_lock:
+            with dog_stats_api.timer('track.buffer.flush', tags=tags):
+                self.backend.send_batch(batch)
@@ -95,3 +95,11 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection with one request"""
+        try:
+            self.collection.insert(events, manipulate=False)
+        except PyMongoError:
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
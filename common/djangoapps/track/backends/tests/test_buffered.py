@@ -0,0 +1,114 @@
+"""
+Tests for the buffered event tracker backend.
+"""
+from __future__ import absolute_import
+
+import threading
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend, BLOCK, DROP_NEWEST, DROP_OLDEST
+
+
+class BatchingBackend(BaseBackend):
+    """Backend recording the batches it's sent."""
+    def __init__(self, **options):
+        super(BatchingBackend, self).__init__(**options)
+        self.batches = []
+        self.sent = threading.Event()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.batches.append(list(events))
+        self.sent.set()
+
+
+@patch.object(BufferedBackend, '_start_flusher')
+class TestBufferedBackend(TestCase):
+    """Tests of queueing events, without the flusher thread."""
+    def setUp(self):
+        super(TestBufferedBackend, self).setUp()
+        self.backend = BatchingBackend()
+
+    def buffered(self, **kwargs):
+        """A BufferedBackend for self.backend."""
+        return BufferedBackend(self.backend, 'test', **kwargs)
+
+    def test_flush_in_batches(self, _start_flusher):
+        buffered = self.buffered(batch_size=2)
+        for event in range(5):
+            buffered.send(event)
+        self.assertEqual(self.backend.batches, [])
+
+        buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[0, 1], [2, 3], [4]])
+
+    def test_drop_newest(self, _start_flusher):
+        buffered = self.buffered(max_queue_size=2, overflow_policy=DROP_NEWEST)
+        for event in range(3):
+            buffered.send(event)
+        buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[0, 1]])
+
+    def test_drop_oldest(self, _start_flusher):
+        buffered = self.buffered(max_queue_size=2, overflow_policy=DROP_OLDEST)
+        for event in range(3):
+            buffered.send(event)
+        buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[1, 2]])
+
+    def test_block(self, _start_flusher):
+        buffered = self.buffered(max_queue_size=2, overflow_policy=BLOCK, block_timeout=0.01)
+        for event in range(3):
+            buffered.send(event)
+        buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[0, 1]])
+
+    def test_invalid_policy(self, _start_flusher):
+        with self.assertRaises(ValueError):
+            self.buffered(overflow_policy='explode')
+
+
+class TestBufferedBackendFlusher(TestCase):
+    """Tests of the flusher thread."""
+    def test_flusher(self):
+        backend = BatchingBackend()
+        buffered = BufferedBackend(backend, 'test', batch_size=2, flush_interval=0.01)
+
+        buffered.send('event')
+
+        self.assertTrue(backend.sent.wait(5))
+        self.assertEqual(backend.batches, [['event']])
+
+    @patch('track.backends.buffered.close_connection')
+    def test_close_connection_after_failed_batch(self, close_connection):
+        backend = BatchingBackend()
+        buffered = BufferedBackend(backend, 'test', flush_interval=0.01)
+        buffered.queue.put('event')
+
+        with patch.object(backend, 'send_batch', side_effect=Exception):
+            buffered._flush_next_batch()  # pylint: disable=protected-access
+
+        close_connection.assert_called_once_with()
+
+    @patch('track.backends.buffered.close_connection')
+    def test_close_connection_when_idle(self, close_connection):
+        backend = BatchingBackend()
+        buffered = BufferedBackend(backend, 'test', flush_interval=0.01)
+        buffered.queue.put('event')
+
+        buffered._flush_next_batch()  # pylint: disable=protected-access
+        self.assertFalse(close_connection.called)
+        buffered._flush_next_batch()  # pylint: disable=protected-access
+
+        self.assertEqual(backend.batches, [['event']])
+        close_connection.assert_called_once_with()
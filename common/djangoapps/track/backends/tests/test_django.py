@@ -23,3 +23,14 @@ class TestDjangoBackend(TestCase):
 
         # Check if time is stored in UTC
         self.assertEqual(str(results[0].time), '2013-01-01 17:01:00+00:00')
+
+    def test_send_batch(self):
+        events = [
+            {'username': username, 'time': '2013-01-01T12:01:00-05:00'}
+            for username in ('first', 'second')
+        ]
+        with self.assertNumQueries(1):
+            self.backend.send_batch(events)
+
+        usernames = TrackingLog.objects.order_by('id').values_list('username', flat=True)
+        self.assertEqual(list(usernames), ['first', 'second'])
@@ -36,3 +36,11 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_send_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        # All the events are inserted with one call
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False)
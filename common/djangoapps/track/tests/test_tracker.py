@@ -4,6 +4,7 @@ from django.test.utils import override_settings
 
 import track.tracker as tracker
 from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
 
 
 SIMPLE_SETTINGS = {
@@ -87,6 +88,18 @@ class TestTrackerDjangoInstantiation(TestCase):
         self.assertEqual(backends[0].count, event_count)
         self.assertEqual(backends[1].count, event_count)
 
+    @override_settings(TRACKING_BACKENDS={
+        'default': dict(SIMPLE_SETTINGS['default'], BUFFER={'batch_size': 10})
+    })
+    def test_django_buffered_settings(self):
+        """Test configuration of a buffered backend"""
+
+        backend = self._reload_backends()['default']
+
+        self.assertIsInstance(backend, BufferedBackend)
+        self.assertIsInstance(backend.backend, DummyBackend)
+        self.assertEqual(backend.batch_size, 10)
+
     @override_settings(TRACKING_BACKENDS=MULTI_SETTINGS)
     def test_django_remove_settings(self):
         """Test if a backend can be remove by setting it to None."""
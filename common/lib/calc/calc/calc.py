@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -61,6 +64,9 @@ DEFAULT_VARIABLES = {
     'q': scipy.constants.e  # Fund. Charge: 1.602176565e-19 (Coulombs)
 }
 
+# How many parsed expressions `compile_expression` keeps around.
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
 # We eliminated the following extreme suffixes:
 #   P (1e15), E (1e18), Z (1e21), Y (1e24),
 #   f (1e-15), a (1e-18), z (1e-21), y (1e-24)
@@ -121,8 +127,8 @@ def eval_atom(parse_result):
 
     In the case of parenthesis, ignore them.
     """
-    # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    # Find first number (or array of numbers) in the list
+    result = next(k for k in parse_result if not isinstance(k, basestring))
     return result
 
 
@@ -136,7 +142,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if not isinstance(k, basestring)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -155,6 +161,8 @@ def eval_parallel(parse_result):
     """
     if len(parse_result) == 1:
         return parse_result[0]
+    if any(isinstance(e, numpy.ndarray) for e in parse_result):
+        return eval_parallel_array([e for e in parse_result if not isinstance(e, basestring)])
     if 0 in parse_result:
         return float('nan')
     reciprocals = [1. / e for e in parse_result
@@ -162,6 +170,17 @@ def eval_parallel(parse_result):
     return 1. / sum(reciprocals)
 
 
+def eval_parallel_array(values):
+    """
+    Like `eval_parallel`, for inputs some of which are arrays of samples.
+
+    Return NaN for the samples that have a zero among their inputs.
+    """
+    has_zero = reduce(numpy.logical_or, [numpy.equal(value, 0) for value in values])
+    reciprocals = [1. / numpy.where(numpy.equal(value, 0), 1, value) for value in values]
+    return numpy.where(has_zero, float('nan'), 1. / sum(reciprocals))
+
+
 def eval_sum(parse_result):
     """
     Add the inputs, keeping in mind their sign.
@@ -173,10 +192,8 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
-            current_op = operator.add
-        elif token == '-':
-            current_op = operator.sub
+        if isinstance(token, basestring):
+            current_op = operator.add if token == '+' else operator.sub
         else:
             total = current_op(total, token)
     return total
@@ -191,10 +208,8 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
-            current_op = operator.mul
-        elif token == '/':
-            current_op = operator.truediv
+        if isinstance(token, basestring):
+            current_op = operator.mul if token == '*' else operator.truediv
         else:
             prod = current_op(prod, token)
     return prod
@@ -216,35 +231,17 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
-def evaluator(variables, functions, math_expr, case_sensitive=False):
+def evaluate_actions(all_variables, all_functions, case_sensitive):
     """
-    Evaluate an expression; that is, take a string of math and return a float.
-
-    -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
-    -Unary functions are passed as a dictionary from string to function.
+    Return the `reduce_tree` actions that evaluate a parse tree with the given
+    (already defaulted) variables and functions.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
-
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
-
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
-
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
-
-    # Create a recursion to evaluate the tree.
     if case_sensitive:
         casify = lambda x: x
     else:
         casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
+    return {
         'number': eval_number,
         'variable': lambda x: all_variables[casify(x[0])],
         'function': lambda x: all_functions[casify(x[0])](x[1]),
@@ -255,7 +252,212 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         'sum': eval_sum
     }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+def evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression; that is, take a string of math and return a float.
+
+    -Variables are passed as a dictionary from string to value. They must be
+     python numbers.
+    -Unary functions are passed as a dictionary from string to function.
+    """
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
+
+
+class CompiledExpression(object):
+    """
+    A math expression parsed once, to be evaluated any number of times.
+
+    Use `compile_expression` to get one, rather than creating it directly, so
+    that expressions are only parsed once.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr`. Raise a `pyparsing.ParseException` if it isn't valid.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self.math_interpreter = None
+
+        # An empty expression evaluates to NaN; no need to parse it.
+        if math_expr.strip() != "":
+            self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self.math_interpreter.parse_algebra()
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, as
+        `evaluator` does.
+        """
+        if self.math_interpreter is None:
+            return float('nan')
+
+        # Get our variables together...
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        return self.math_interpreter.reduce_tree(
+            evaluate_actions(all_variables, all_functions, self.case_sensitive)
+        )
+
+    def evaluate_samples(self, variables_list, functions):
+        """
+        Evaluate the expression once for each dictionary of variables in
+        `variables_list`, and return the list of results.
+
+        Where possible, all the samples are evaluated in one pass over the
+        parse tree using NumPy arrays. If that isn't possible (e.g. a function
+        that doesn't take arrays is used, or a sample hits a division by zero),
+        the samples are evaluated one at a time, so that results and errors are
+        exactly those of `evaluate`.
+        """
+        if self.math_interpreter is not None and variables_list:
+            try:
+                results = self._evaluate_vectorized(variables_list, functions)
+            except Exception:  # pylint: disable=broad-except
+                results = None
+            if results is not None:
+                return results
+
+        return [self.evaluate(variables, functions) for variables in variables_list]
+
+    def _evaluate_vectorized(self, variables_list, functions):
+        """
+        Evaluate all the samples in `variables_list` at once, with each sampled
+        variable bound to an array of its values. Return None if the samples
+        can't be evaluated that way.
+        """
+        names = set(variables_list[0])
+        arrays = {}
+        for name in names:
+            values = [variables.get(name) for variables in variables_list]
+            # Integers are left to Python, which doesn't overflow them
+            if not all(isinstance(value, (float, complex)) for value in values):
+                return None
+            arrays[name] = numpy.array(values)
+        if any(len(variables) != len(names) for variables in variables_list):
+            return None
+
+        all_variables, all_functions = add_defaults(arrays, functions, self.case_sensitive)
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        # Python raises on these where NumPy would only warn; bail out and let
+        # `evaluate` handle them sample by sample.
+        with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+            result = self.math_interpreter.reduce_tree(
+                evaluate_actions(all_variables, all_functions, self.case_sensitive)
+            )
+
+        if isinstance(result, numpy.ndarray):
+            if result.shape != (len(variables_list),):
+                return None
+            return list(result)
+        if isinstance(result, numbers.Number):
+            # The expression doesn't depend on any sampled variable.
+            return [result] * len(variables_list)
+        return None
+
+
+_COMPILED_EXPRESSIONS = OrderedDict()
+_COMPILED_EXPRESSIONS_LOCK = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a `CompiledExpression` for `math_expr`.
+
+    The most recently used `COMPILED_EXPRESSION_CACHE_SIZE` expressions are
+    kept, keyed by the expression and `case_sensitive`, so that evaluating the
+    same expression again doesn't parse it again.
+    """
+    key = (math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        compiled = _COMPILED_EXPRESSIONS.pop(key, None)
+        if compiled is not None:
+            _COMPILED_EXPRESSIONS[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+
+    with _COMPILED_EXPRESSIONS_LOCK:
+        _COMPILED_EXPRESSIONS[key] = compiled
+        while len(_COMPILED_EXPRESSIONS) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.popitem(last=False)
+    return compiled
+
+
+def _build_grammar():
+    """
+    Build the pyparsing grammar for algebraic expressions.
+
+    Parsing with it gives a `pyparsing.ParseResult` with proper groupings to
+    reflect parenthesis and order of operations. All operators are left in the
+    tree and strings of numbers are not parsed into their float versions.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+_GRAMMAR = None
+
+
+def get_grammar():
+    """
+    Return the grammar built by `_build_grammar`, building it the first time.
+    """
+    global _GRAMMAR  # pylint: disable=global-statement
+    if _GRAMMAR is None:
+        _GRAMMAR = _build_grammar()
+    return _GRAMMAR
 
 
 class ParseAugmenter(object):
@@ -278,86 +480,34 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
 
-        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
-        reflect parenthesis and order of operations. Leave all operators in the
-        tree and do not parse any strings of numbers into their float versions.
+        Store a `pyparsing.ParseResult` in `self.tree` (see `_build_grammar`),
+        and record the names of the variables and functions it uses.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
+        self.tree = get_grammar().parseString(self.math_expr)[0]
+        self._collect_names(self.tree)
 
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+    def _collect_names(self, node):
+        """
+        Store the names of variables and functions used under `node` in
+        `variables_used` and `functions_used`.
+        """
+        if not isinstance(node, ParseResults):
+            return
+        node_name = node.getName()
+        if node_name == 'variable':
+            self.variables_used.add(node[0])
+        elif node_name == 'function':
+            self.functions_used.add(node[0])
+        for child in node:
+            self._collect_names(child)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -559,3 +559,61 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test calc.compile_expression and evaluating expressions over samples
+    """
+
+    def setUp(self):
+        super(CompiledExpressionTest, self).setUp()
+        self.samples = [{'x': float(x), 'y': float(x) / 2} for x in range(1, 6)]
+
+    def test_compiled_once(self):
+        """
+        The same expression is only parsed once
+        """
+        compiled = calc.compile_expression('x^2 + 3*y')
+        self.assertIs(compiled, calc.compile_expression('x^2 + 3*y'))
+        self.assertIsNot(compiled, calc.compile_expression('x^2 + 3*y', case_sensitive=True))
+
+    def test_samples_match_evaluator(self):
+        """
+        Evaluating over samples gives the same results as the evaluator
+        """
+        for expression in ['x^2 + 3*y', 'sin(x)/cos(y) - x', 'x||y', '2 + pi', 'x*j + y']:
+            results = calc.compile_expression(expression).evaluate_samples(self.samples, {})
+            expected = [calc.evaluator(sample, {}, expression) for sample in self.samples]
+            self.assertEqual(len(results), len(expected))
+            for result, value in zip(results, expected):
+                self.assertAlmostEqual(result, value)
+
+    def test_samples_parallel_with_zero(self):
+        """
+        A zero input to || gives NaN for that sample only
+        """
+        samples = [{'x': 0.0}, {'x': 1.0}]
+        results = calc.compile_expression('x||1').evaluate_samples(samples, {})
+        self.assertTrue(numpy.isnan(results[0]))
+        self.assertEqual(results[1], 0.5)
+
+    def test_samples_fall_back_to_evaluator(self):
+        """
+        Errors are the same as the evaluator's
+        """
+        compiled = calc.compile_expression('1/(x-1)')
+        with self.assertRaises(ZeroDivisionError):
+            compiled.evaluate_samples(self.samples, {})
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression('fact(x)').evaluate_samples([{'x': 1.5}], {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x+z').evaluate_samples(self.samples, {})
+
+    def test_empty_expression(self):
+        """
+        An empty expression evaluates to NaN
+        """
+        results = calc.compile_expression(' ').evaluate_samples(self.samples, {})
+        self.assertEqual(len(results), len(self.samples))
+        self.assertTrue(all(numpy.isnan(result) for result in results))
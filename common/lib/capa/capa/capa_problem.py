@@ -13,12 +13,16 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
+import dogstats_wrapper as dog_stats_api
 from lxml import etree
 from pytz import UTC
 from xml.sax.saxutils import unescape
@@ -58,6 +62,97 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The number of compiled problems kept in each process
+COMPILED_PROBLEM_CACHE_SIZE = 1000
+
+
+class CompiledProblem(object):
+    """
+    The parts of a problem which are the same for every student: its text, and
+    its XML tree with includes processed and IDs assigned to its responses and
+    their inputs.
+
+    `responses` lists, for each response, the position of the response in the
+    tree (in `tree.iter()` order) and the positions of its inputs.
+    `has_includes` is whether the problem includes any files.
+    """
+    def __init__(self, problem_text, tree, responses, has_includes=False):
+        self.problem_text = problem_text
+        self.tree = tree
+        self.responses = responses
+        self.has_includes = has_includes
+
+    def instantiate(self):
+        """
+        Return a copy of the tree, which the caller is free to change, and the
+        list of its responses, as (response, inputs) pairs of elements.
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        return tree, [
+            (elements[response], [elements[entry] for entry in inputs])
+            for response, inputs in self.responses
+        ]
+
+
+class CompiledProblemCache(object):
+    """
+    An LRU cache of up to `max_entries` CompiledProblems, keyed by problem id
+    and a hash of the problem's text.
+
+    The text of a problem is its whole definition (other than the files it
+    includes, which is why problems with includes are never cached), so
+    entries never need to be invalidated.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        # key -> CompiledProblem, least recently used first
+        self._problems = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(problem_id, problem_text):
+        """
+        The key of the problem `problem_id` with text `problem_text`.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return (problem_id, hashlib.sha1(problem_text).hexdigest())
+
+    def get(self, key):
+        """
+        Return the CompiledProblem cached under `key`, or None.
+        """
+        with self._lock:
+            compiled = self._problems.pop(key, None)
+            if compiled is not None:
+                self._problems[key] = compiled
+        dog_stats_api.increment(
+            'capa.compiled_problem_cache',
+            tags=['result:{}'.format('miss' if compiled is None else 'hit')]
+        )
+        return compiled
+
+    def set(self, key, compiled):
+        """
+        Cache `compiled` under `key`, evicting the least recently used problems as needed.
+        """
+        with self._lock:
+            self._problems.pop(key, None)
+            self._problems[key] = compiled
+            while len(self._problems) > self.max_entries:
+                self._problems.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all the cached problems.
+        """
+        with self._lock:
+            self._problems.clear()
+
+
+compiled_problems = CompiledProblemCache(COMPILED_PROBLEM_CACHE_SIZE)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,25 +249,20 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Parse the problem, or copy the tree of the same problem parsed for
+        # another student. Everything from here on depends on the seed, or
+        # changes the tree.
+        compiled = self._get_compiled_problem(problem_text)
+        self.problem_text = compiled.problem_text
+        self.tree, responses = compiled.instantiate()
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        # Create the dict (self.responders) of Response instances for each question
+        # in the problem, and perform some in-place transformations of the XML tree.
+        # The dict has keys = xml subtree of Response, values = Response instance
+        self._preprocess_problem(self.tree, responses)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -529,12 +619,50 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
-    def _process_includes(self):
+    def _get_compiled_problem(self, problem_text):
+        """
+        Return the CompiledProblem of `problem_text`, from the cache if this
+        problem was compiled before.
+        """
+        key = CompiledProblemCache.key(self.problem_id, problem_text)
+        compiled = compiled_problems.get(key)
+        if compiled is None:
+            compiled = self._compile_problem(problem_text)
+            # Included files may change, so only problems without any are cached
+            if not compiled.has_includes:
+                compiled_problems.set(key, compiled)
+        return compiled
+
+    def _compile_problem(self, problem_text):
+        """
+        Parse `problem_text` into a CompiledProblem: process its includes, and
+        assign IDs to all the responses and their inputs.
+        """
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+
+        # parse problem XML file into an element tree
+        tree = etree.XML(problem_text)
+
+        # handle any <include file="foo"> tags
+        has_includes = self._process_includes(tree)
+
+        positions = dict((element, position) for position, element in enumerate(tree.iter()))
+        responses = [
+            (positions[response], [positions[entry] for entry in inputfields])
+            for response, inputfields in self._assign_response_ids(tree)
+        ]
+        return CompiledProblem(problem_text, tree, responses, has_includes)
+
+    def _process_includes(self, tree):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
-        into our XML tree.  Fail gracefully if debugging.
+        into the XML tree.  Fail gracefully if debugging.
+
+        Returns whether the tree had any includes.
         """
-        includes = self.tree.findall('.//include')
+        includes = tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file')
             if filename is not None:
@@ -579,6 +707,8 @@ class LoncapaProblem(object):
                 parent.remove(inc)
                 log.debug('Included %s into %s' % (filename, self.problem_id))
 
+        return bool(includes)
+
     def _extract_system_path(self, script):
         """
         Extracts and normalizes additional paths for code execution.
@@ -777,19 +907,17 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_response_ids(self, tree):
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns a list of (response, inputfields) pairs of elements, in document order.
         """
         response_id = 1
-        self.responders = {}
+        responses = []
+        input_tags = inputtypes.registry.registered_tags()
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -797,7 +925,6 @@ class LoncapaProblem(object):
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
             inputfields = tree.xpath(
                 "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
                 id=response_id_str
@@ -810,6 +937,21 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            responses.append((response, inputfields))
+        return responses
+
+    def _preprocess_problem(self, tree, responses):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each of `responses`, (response, inputfields)
+        pairs of elements with IDs already assigned, and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in responses:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
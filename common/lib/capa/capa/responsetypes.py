@@ -36,7 +36,7 @@ from shapely.geometry import Point, MultiPoint
 import dogstats_wrapper as dog_stats_api
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import compile_expression, evaluator, UndefinedVariable
 from . import correctmap
 from .registry import TagRegistry
 from datetime import datetime
@@ -2390,55 +2390,53 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as err:
+        if not var_dict_list:
+            return []
+
+        try:
+            # Parse the answer once (compile_expression caches it) and evaluate
+            # it for all the samples together.
+            out = compile_expression(answer, self.case_sensitive).evaluate_samples(var_dict_list, dict())
+        except UndefinedVariable as err:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s',
+                cgi.escape(answer)
+            )
+            raise StudentInputError(
+                _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+            )
+        except ValueError as err:
+            if 'factorial' in err.message:
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # err.message will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: undefined variable in formula=%s',
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'Provided answer was: %s'),
                     cgi.escape(answer)
                 )
                 raise StudentInputError(
-                    _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+                    _("factorial function not permitted in answer "
+                      "for this problem. Provided answer was: "
+                      "{bad_input}").format(bad_input=cgi.escape(answer))
                 )
-            except ValueError as err:
-                if 'factorial' in err.message:
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # err.message will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'Provided answer was: %s'),
-                        cgi.escape(answer)
-                    )
-                    raise StudentInputError(
-                        _("factorial function not permitted in answer "
-                          "for this problem. Provided answer was: "
-                          "{bad_input}").format(bad_input=cgi.escape(answer))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
+                    bad_input=cgi.escape(answer)
                 )
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            )
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula").format(
+                    bad_input=cgi.escape(answer)
                 )
+            )
         return out
 
     def randomize_variables(self, samples):
@@ -0,0 +1,381 @@
+"""
+A pool of warm sandbox workers for capa's safe_exec.
+
+Running code through codejail starts a new sandboxed Python process for every
+execution, which then imports numpy and friends all over again.  Instead, each
+pooled worker is a sandboxed Python process that imports those modules once
+and then, for every job it is sent, forks a child to run the code.  The child
+starts from the pre-imported state, runs with the same resource limits as
+codejail applies, and exits afterwards, so nothing one piece of code does can
+leak into the next.  Workers are replaced after `max_runs` jobs, or as soon as
+one misbehaves.
+
+The pool is off unless `configure` is called with a non-zero `size`, and only
+used when codejail has been configured with a sandboxed Python.
+"""
+
+import json
+import logging
+import os
+import Queue
+import select
+import signal
+import struct
+import subprocess
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# Modules every worker imports before taking jobs.
+PRELOADED_MODULES = ["numpy", "scipy", "math", "random", "json"]
+
+# The program run by each worker.  It reads length-prefixed JSON jobs on stdin,
+# runs each one in a forked child, and writes length-prefixed JSON results on
+# stdout.  Its only argument is a JSON object of resource limits, codejail's
+# LIMITS, which the child applies as codejail's `set_process_limits` does.
+#
+# The child can't see the worker's stdin and stdout, which carry other jobs,
+# and runs in an empty temporary directory, as codejail's processes do.  It's
+# put in its own process group, so that the worker can kill it (and anything it
+# started) once the job's timeout has passed.
+WORKER_CODE = """\
+import json, os, resource, select, shutil, signal, struct, sys, tempfile, time, traceback, StringIO
+
+for name in %(modules)r:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+
+LIMITS = json.loads(sys.argv[1])
+
+def read_frame(stream):
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    return stream.read(struct.unpack(">I", header)[0])
+
+def write_frame(stream, data):
+    stream.write(struct.pack(">I", len(data)) + data)
+    stream.flush()
+
+def isolate(tmpdir):
+    os.setpgid(0, 0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    os.chdir(tmpdir)
+
+def set_limits():
+    # The limits codejail sets on its processes.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    cpu = LIMITS.get("CPU")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    vmem = LIMITS.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+    if "FSIZE" in LIMITS:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (LIMITS["FSIZE"], LIMITS["FSIZE"]))
+
+def run_job(job):
+    set_limits()
+    sys.stdout = sys.stderr = StringIO.StringIO()
+    g_dict = job["globals"]
+    try:
+        exec compile(job["code"], "<jailed code>", "exec") in g_dict
+    except BaseException:
+        return {"error": traceback.format_exc()}
+    results = {}
+    for key, value in g_dict.iteritems():
+        try:
+            json.dumps(value)
+        except Exception:
+            continue
+        results[key] = value
+    return {"globals": results}
+
+def read_result(pid, pipe, timeout):
+    deadline = time.time() + timeout
+    chunks = []
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0 or not select.select([pipe], [], [], remaining)[0]:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+            return None
+        chunk = os.read(pipe, 65536)
+        if not chunk:
+            return "".join(chunks)
+        chunks.append(chunk)
+
+while True:
+    frame = read_frame(sys.stdin)
+    if frame is None:
+        break
+    job = json.loads(frame)
+    tmpdir = tempfile.mkdtemp(prefix="codejail-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            isolate(tmpdir)
+            result = json.dumps(run_job(job))
+        except BaseException:
+            result = json.dumps({"error": traceback.format_exc()})
+        with os.fdopen(write_fd, "w") as pipe:
+            pipe.write(result)
+        os._exit(0)
+    os.close(write_fd)
+    try:
+        # The child may not have made its own group yet
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    result = read_result(pid, read_fd, job["timeout"])
+    os.close(read_fd)
+    __, status = os.waitpid(pid, 0)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    if result is None:
+        result = json.dumps({"error": "Jailed code timed out"})
+    elif not result:
+        result = json.dumps({"error": "Jailed code was killed (status %%d)" %% status})
+    write_frame(sys.stdout, result)
+""" % {'modules': PRELOADED_MODULES}
+
+
+class WorkerError(Exception):
+    """
+    Raised when a worker times out or dies while running a job.
+    """
+    pass
+
+
+class PoolBusy(Exception):
+    """
+    Raised when no worker became available in time.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One warm worker process, running `WORKER_CODE` with `command`.
+    """
+    # Seconds to wait for the worker's answer after a job's timeout
+    GRACE_PERIOD = 1
+
+    def __init__(self, command, limits):
+        self.process = subprocess.Popen(
+            command + ["-c", WORKER_CODE, json.dumps(limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            close_fds=True,
+            # Put the worker and the children it forks in their own process
+            # group, so they can be stopped together.
+            preexec_fn=os.setsid,
+        )
+        self.runs = 0
+
+    def run(self, code, globals_dict, timeout):
+        """
+        Run `code` with the JSON-safe `globals_dict`, waiting at most `timeout`
+        seconds. Return the worker's result: a dict with either the resulting
+        'globals' or an 'error' traceback.
+        """
+        self.runs += 1
+        job = json.dumps({"code": code, "globals": globals_dict, "timeout": timeout})
+        try:
+            self.process.stdin.write(struct.pack(">I", len(job)) + job)
+            self.process.stdin.flush()
+        except IOError as err:
+            raise WorkerError("Couldn't send job to worker: {}".format(err))
+
+        # The worker kills jobs that run out of time itself; only give up on
+        # the worker if it doesn't answer shortly after that.
+        deadline = time.time() + timeout + self.GRACE_PERIOD
+        (length,) = struct.unpack(">I", self._read_exactly(4, deadline))
+        return json.loads(self._read_exactly(length, deadline))
+
+    def _read_exactly(self, size, deadline):
+        """
+        Read `size` bytes of the worker's output, or raise WorkerError if that
+        takes until `deadline` or the worker exits.
+        """
+        stdout = self.process.stdout.fileno()
+        chunks = []
+        while size:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([stdout], [], [], remaining)[0]:
+                raise WorkerError("Jailed code timed out")
+            chunk = os.read(stdout, size)
+            if not chunk:
+                raise WorkerError("Worker exited unexpectedly")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return "".join(chunks)
+
+    def close(self):
+        """
+        Stop the worker process, and any job it is running.
+        """
+        # An idle worker exits when its input is closed.
+        self.process.stdin.close()
+        self.process.stdout.close()
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            # Either it's gone already, or it runs as the sandbox user and we
+            # can't signal it.  In that case, the worker still kills its running
+            # job once the job's timeout has passed, then reads EOF and exits.
+            if self.process.poll() is None:
+                return
+        self.process.wait()
+
+
+class SandboxPool(object):
+    """
+    A bounded pool of `SandboxWorker`s.
+
+    At most `size` jobs run at once; callers wait up to `queue_timeout` seconds
+    for a worker before PoolBusy is raised. Workers are started lazily, and are
+    replaced after `max_runs` jobs or after any failure.
+    """
+    def __init__(self, command, size, max_runs=100, queue_timeout=2, exec_timeout=10, limits=None):
+        self.command = command
+        self.max_runs = max_runs
+        self.queue_timeout = queue_timeout
+        self.exec_timeout = exec_timeout
+        self.limits = limits or {}
+        # Each slot holds an idle worker, or None if one is yet to be started.
+        self._slots = Queue.Queue(maxsize=size)
+        for __ in range(size):
+            self._slots.put(None)
+
+    def run(self, code, globals_dict):
+        """
+        Run `code` on a worker; see `SandboxWorker.run`.
+        """
+        start = time.time()
+        try:
+            worker = self._slots.get(timeout=self.queue_timeout)
+        except Queue.Empty:
+            dog_stats_api.increment('capa.safe_exec.pool.busy')
+            raise PoolBusy()
+        dog_stats_api.histogram('capa.safe_exec.pool.queue_wait', time.time() - start)
+
+        try:
+            if worker is None or worker.process.poll() is not None:
+                worker = SandboxWorker(self.command, self.limits)
+            start = time.time()
+            result = worker.run(code, globals_dict, self.exec_timeout)
+            dog_stats_api.histogram('capa.safe_exec.pool.exec_time', time.time() - start)
+        except Exception:
+            dog_stats_api.increment('capa.safe_exec.pool.worker_failed')
+            if worker is not None:
+                worker.close()
+            self._slots.put(None)
+            raise
+
+        if worker.runs >= self.max_runs:
+            dog_stats_api.increment('capa.safe_exec.pool.recycled')
+            worker.close()
+            worker = None
+        self._slots.put(worker)
+        return result
+
+    def close(self):
+        """
+        Stop all idle workers.
+        """
+        while True:
+            try:
+                worker = self._slots.get_nowait()
+            except Queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+_POOL_SETTINGS = {
+    'size': 0,
+    'max_runs': 100,
+    'queue_timeout': 2,
+    'exec_timeout': 10,
+}
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure(size=0, max_runs=100, queue_timeout=2, exec_timeout=10):
+    """
+    Configure the pool used by `pooled_safe_exec`. A `size` of 0 disables it.
+    """
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        _POOL_SETTINGS.update(
+            size=size, max_runs=max_runs, queue_timeout=queue_timeout, exec_timeout=exec_timeout,
+        )
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
+
+
+def get_pool():
+    """
+    Return this process's pool, or None if pooling is disabled or codejail
+    isn't configured with a sandboxed Python.
+    """
+    global _POOL, _POOL_PID  # pylint: disable=global-statement
+    if not _POOL_SETTINGS['size'] or not jail_code.is_configured("python"):
+        return None
+
+    with _POOL_LOCK:
+        # Workers belong to the process that started them; don't use a pool
+        # inherited across a fork.
+        if _POOL is None or _POOL_PID != os.getpid():
+            python = jail_code.COMMANDS["python"]
+            command = []
+            if python.get("user"):
+                command.extend(["sudo", "-u", python["user"]])
+            command.extend(python["cmdline_start"])
+            _POOL = SandboxPool(command, limits=dict(jail_code.LIMITS), **_POOL_SETTINGS)
+            _POOL_PID = os.getpid()
+        return _POOL
+
+
+def pooled_safe_exec(code, globals_dict, python_path=None, extra_files=None, slug=None):
+    """
+    Like codejail's `safe_exec`, but run on a warm pooled worker when possible.
+
+    Code that needs extra files or a python path, or that can't get a worker
+    in time, runs through codejail as usual.
+    """
+    pool = get_pool()
+    if pool is None or python_path or extra_files:
+        return codejail_safe_exec(
+            code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+        )
+
+    try:
+        result = pool.run(code, json_safe(globals_dict))
+    except PoolBusy:
+        log.info("No sandbox worker available for %s, running it unpooled", slug)
+        return codejail_safe_exec(code, globals_dict, slug=slug)
+    except WorkerError as err:
+        raise SafeExecException("Couldn't execute jailed code: {}".format(err))
+
+    if 'error' in result:
+        raise SafeExecException("Couldn't execute jailed code: {}".format(result['error']))
+    globals_dict.update(result['globals'])
@@ -1,11 +1,13 @@
 """Capa's specialized use of codejail.safe_exec."""
 
-from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .pool import pooled_safe_exec
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
+import copy
 import hashlib
 
 # Establish the Python environment for Capa.
@@ -70,6 +72,56 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+class SafeExecCache(object):
+    """
+    A two-level cache of safe_exec results.
+
+    `shared_cache` is a cache shared between processes (e.g. Django's cache),
+    and `local_cache` is a dict private to the caller, such as a per-request
+    dict.  Lookups try the local level first, and results found in the shared
+    level are copied into the local one.  Hits and misses at each level are
+    counted in `capa.safe_exec.cache`.
+
+    The local level holds at most `max_local_entries` results, dropping the
+    oldest first if `local_cache` is an OrderedDict, so that it stays bounded
+    in long-running tasks that execute many problems.
+
+    """
+    def __init__(self, shared_cache, local_cache=None, max_local_entries=100):
+        self.shared_cache = shared_cache
+        self.local_cache = local_cache if local_cache is not None else OrderedDict()
+        self.max_local_entries = max_local_entries
+
+    def get(self, key):
+        if key in self.local_cache:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:local_hit'])
+            # Callers update their globals from the result, so don't hand out
+            # the objects we're holding on to.
+            return copy.deepcopy(self.local_cache[key])
+
+        value = self.shared_cache.get(key) if self.shared_cache else None
+        if value is None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
+        else:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:shared_hit'])
+            self._set_local(key, value)
+        return value
+
+    def set(self, key, value):
+        self._set_local(key, value)
+        if self.shared_cache:
+            self.shared_cache.set(key, value)
+
+    def _set_local(self, key, value):
+        """
+        Keep a copy of `value` in the local level, making room for it if needed.
+        """
+        self.local_cache.pop(key, None)
+        while self.local_cache and len(self.local_cache) >= self.max_local_entries:
+            del self.local_cache[next(iter(self.local_cache))]
+        self.local_cache[key] = copy.deepcopy(value)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -105,6 +157,8 @@ def safe_exec(
     caller, that will be used in log messages.
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
+    Otherwise, the code runs on a warm sandbox worker if a pool has been set up
+    with `capa.safe_exec.pool.configure`.
 
     """
     # Check the cache for a previous result.
@@ -131,7 +185,7 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        exec_fn = pooled_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
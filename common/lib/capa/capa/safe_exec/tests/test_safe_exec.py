@@ -1,15 +1,20 @@
 """Test safe_exec.py"""
 
+from collections import OrderedDict
 import hashlib
+import json
 import os
 import os.path
 import random
+import sys
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache
+from capa.safe_exec.pool import SandboxPool, SandboxWorker, PoolBusy, WorkerError
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +182,137 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-level SafeExecCache."""
+
+    def test_shared_hit_fills_local(self):
+        shared = {'key': (None, {'a': 1})}
+        local = {}
+        cache = SafeExecCache(DictCache(shared), local)
+        self.assertEqual(cache.get('key'), (None, {'a': 1}))
+        self.assertEqual(local, shared)
+
+        # Now the local level answers, even if the shared one changes.
+        shared['key'] = (None, {'a': 2})
+        self.assertEqual(cache.get('key'), (None, {'a': 1}))
+
+    def test_set_fills_both_levels(self):
+        shared = {}
+        local = {}
+        cache = SafeExecCache(DictCache(shared), local)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', (None, {'a': 1}))
+        self.assertEqual(shared, {'key': (None, {'a': 1})})
+        self.assertEqual(local, {'key': (None, {'a': 1})})
+
+    def test_local_results_are_copies(self):
+        cache = SafeExecCache(None)
+        cache.set('key', (None, {'a': [1]}))
+        cache.get('key')[1]['a'].append(2)
+        self.assertEqual(cache.get('key'), (None, {'a': [1]}))
+
+    def test_local_level_is_bounded(self):
+        local = OrderedDict()
+        cache = SafeExecCache(None, local, max_local_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, (None, {}))
+        self.assertEqual(local.keys(), ['b', 'c'])
+
+    def test_safe_exec_uses_local_level(self):
+        shared = {}
+        local = {}
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(shared), local))
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(len(local), 1)
+
+        # Only the local level is consulted once it has the result.
+        shared.clear()
+        local[local.keys()[0]] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=SafeExecCache(DictCache(shared), local))
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(shared, {})
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Test the mechanics of the worker pool.
+
+    These run workers with the current Python, unsandboxed.
+    """
+    def make_pool(self, **kwargs):
+        pool = SandboxPool([sys.executable, "-E", "-B"], **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_run(self):
+        pool = self.make_pool(size=1)
+        result = pool.run("b = a * 2", {'a': 21})
+        self.assertEqual(result, {'globals': {'a': 21, 'b': 42}})
+
+    def test_no_state_between_runs(self):
+        pool = self.make_pool(size=1)
+        pool.run("import math; math.leaked = 1", {})
+        result = pool.run("import math; a = hasattr(math, 'leaked')", {})
+        self.assertFalse(result['globals']['a'])
+
+    def test_exceptions(self):
+        pool = self.make_pool(size=1)
+        result = pool.run("1/0", {})
+        self.assertIn("ZeroDivisionError", result['error'])
+
+    def test_workers_are_recycled(self):
+        pool = self.make_pool(size=1, max_runs=2)
+        pids = [pool.run("import os; pid = os.getppid()", {})['globals']['pid'] for _ in range(4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def test_timeout(self):
+        pool = self.make_pool(size=1, exec_timeout=0.5, limits={"CPU": 2})
+        result = pool.run("while True: pass", {})
+        self.assertIn("timed out", result['error'])
+        # The worker carries on with the next job.
+        self.assertEqual(pool.run("a = 1", {})['globals'], {'a': 1})
+
+    def test_file_size_limit(self):
+        pool = self.make_pool(size=1, limits={"FSIZE": 10})
+        code = "with open('out', 'w') as out: out.write('a' * {0})"
+        self.assertEqual(pool.run(code.format(10), {}), {'globals': {}})
+        self.assertIn('error', pool.run(code.format(11), {}))
+
+    def test_unresponsive_worker(self):
+        pool = self.make_pool(size=1, exec_timeout=0.5)
+        with patch.object(SandboxWorker, 'GRACE_PERIOD', -0.4):
+            with self.assertRaises(WorkerError):
+                pool.run("import time; time.sleep(0.3)", {})
+        # The pool carries on with a new worker.
+        self.assertEqual(pool.run("a = 1", {})['globals'], {'a': 1})
+
+    def test_jailed_code_cant_see_other_jobs(self):
+        pool = self.make_pool(size=1)
+        result = pool.run("import sys; stdin = sys.stdin.read()", {})
+        self.assertEqual(result['globals']['stdin'], '')
+
+        # Writing a forged result to the worker's stdout goes nowhere.
+        forged = json.dumps({"globals": {"a": "forged"}})
+        code = "import os, struct; os.write(1, struct.pack('>I', {0}) + {1!r}); a = 'real'".format(len(forged), forged)
+        self.assertEqual(pool.run(code, {})['globals'], {'a': 'real'})
+        self.assertEqual(pool.run("a = 1", {})['globals'], {'a': 1})
+
+    def test_jailed_code_runs_in_temporary_directory(self):
+        pool = self.make_pool(size=1)
+        cwd = pool.run("import os; cwd = os.getcwd()", {})['globals']['cwd']
+        self.assertNotEqual(cwd, os.getcwd())
+        self.assertFalse(os.path.exists(cwd))
+
+    def test_busy(self):
+        pool = self.make_pool(size=0, queue_timeout=0.1)
+        with self.assertRaises(PoolBusy):
+            pool.run("a = 1", {})
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
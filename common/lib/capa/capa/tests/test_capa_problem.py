@@ -0,0 +1,85 @@
+"""Tests that compiled problems are shared between students."""
+
+import textwrap
+import unittest
+
+import mock
+from lxml import etree
+
+from . import new_loncapa_problem, test_capa_system
+from capa.capa_problem import LoncapaProblem, compiled_problems
+
+
+class CompiledProblemCacheTest(unittest.TestCase):
+    """Tests of the cache of compiled problems."""
+
+    xml_str = textwrap.dedent("""
+        <problem>
+        <multiplechoiceresponse>
+          <choicegroup type="MultipleChoice" shuffle="true">
+            <choice correct="false">Apple</choice>
+            <choice correct="false">Banana</choice>
+            <choice correct="false">Chocolate</choice>
+            <choice correct ="true">Donut</choice>
+          </choicegroup>
+        </multiplechoiceresponse>
+        <stringresponse answer="Donut">
+          <textline/>
+        </stringresponse>
+        <solution><p>Donut</p></solution>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(CompiledProblemCacheTest, self).setUp()
+        compiled_problems.clear()
+        self.addCleanup(compiled_problems.clear)
+
+    def test_problem_is_parsed_once(self):
+        with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as parse:
+            first = new_loncapa_problem(self.xml_str, seed=0)
+            second = new_loncapa_problem(self.xml_str, seed=0)
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(first.get_html(), second.get_html())
+        self.assertEqual(first.get_question_answers(), second.get_question_answers())
+
+    def test_students_get_their_own_tree(self):
+        first = new_loncapa_problem(self.xml_str, seed=0)
+        html = first.get_html()
+        first.tree.find('.//choicegroup').clear()
+
+        second = new_loncapa_problem(self.xml_str, seed=0)
+
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(second.get_html(), html)
+
+    def test_shuffle_depends_on_seed(self):
+        new_loncapa_problem(self.xml_str, seed=1)
+        problem = new_loncapa_problem(self.xml_str, seed=0)
+
+        # shuffling 4 things with seed of 0 yields: B A C D
+        response = problem.responders[problem.tree.find('.//multiplechoiceresponse')]
+        self.assertEqual(response.unmask_order(), ['choice_1', 'choice_0', 'choice_2', 'choice_3'])
+
+    def test_problems_are_cached_separately(self):
+        problem = new_loncapa_problem(self.xml_str)
+        other_problem = LoncapaProblem(self.xml_str, id='2', seed=723, capa_system=test_capa_system())
+        changed_problem = new_loncapa_problem(self.xml_str.replace('Donut</p>', 'Donuts</p>'))
+
+        self.assertIn('<p>Donut</p>', problem.get_question_answers()['1_solution_1'])
+        self.assertIn('<p>Donut</p>', other_problem.get_question_answers()['2_solution_1'])
+        self.assertIn('<p>Donuts</p>', changed_problem.get_question_answers()['1_solution_1'])
+        self.assertEqual(len(compiled_problems._problems), 3)  # pylint: disable=protected-access
+
+    def test_problem_with_includes_is_not_cached(self):
+        xml_str = '<problem><include file="test_include.xml"/></problem>'
+        capa_system = test_capa_system()
+        capa_system.filestore = mock.Mock()
+        capa_system.filestore.open.return_value.read.return_value = '<p>Included</p>'
+
+        new_loncapa_problem(xml_str, capa_system=capa_system)
+        new_loncapa_problem(xml_str, capa_system=capa_system)
+
+        self.assertEqual(capa_system.filestore.open.call_count, 2)
+        self.assertEqual(len(compiled_problems._problems), 0)  # pylint: disable=protected-access
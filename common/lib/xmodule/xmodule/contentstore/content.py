@@ -21,7 +21,7 @@ from PIL import Image
 
 class StaticContent(object):
     def __init__(self, loc, name, content_type, data, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         self.location = loc
         self.name = name  # a display string which can be edited, and thus not part of the location which needs to be fixed
         self.content_type = content_type
@@ -33,6 +33,8 @@ class StaticContent(object):
         # cycles
         self.import_path = import_path
         self.locked = locked
+        # a digest of the data (e.g. GridFS' md5), usable as an ETag
+        self.content_digest = content_digest
 
     @property
     def is_thumbnail(self):
@@ -157,6 +159,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -171,15 +179,17 @@ class StaticContent(object):
 
 class StaticContentStream(StaticContent):
     def __init__(self, loc, name, content_type, stream, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         super(StaticContentStream, self).__init__(loc, name, content_type, None, last_modified_at=last_modified_at,
                                                   thumbnail_location=thumbnail_location, import_path=import_path,
-                                                  length=length, locked=locked)
+                                                  length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
+        # read GridFS files a whole chunk at a time, so each read fetches a single chunk document
+        self.chunk_size = getattr(stream, 'chunk_size', None) or STREAM_DATA_CHUNK_SIZE
 
     def stream_data(self):
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._stream.read(self.chunk_size)
             if len(chunk) == 0:
                 break
             yield chunk
@@ -191,12 +201,12 @@ class StaticContentStream(StaticContent):
         self._stream.seek(first_byte)
         position = first_byte
         while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
+            if last_byte < position + self.chunk_size - 1:
                 chunk = self._stream.read(last_byte - position + 1)
                 yield chunk
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            chunk = self._stream.read(self.chunk_size)
+            position += self.chunk_size
             yield chunk
 
     def close(self):
@@ -206,7 +216,8 @@ class StaticContentStream(StaticContent):
         self._stream.seek(0)
         content = StaticContent(self.location, self.name, self.content_type, self._stream.read(),
                                 last_modified_at=self.last_modified_at, thumbnail_location=self.thumbnail_location,
-                                import_path=self.import_path, length=self.length, locked=self.locked)
+                                import_path=self.import_path, length=self.length, locked=self.locked,
+                                content_digest=self.content_digest)
         return content
 
 
@@ -946,6 +946,14 @@ class ModuleStoreRead(ModuleStoreAssetBase):
         """
         yield
 
+    def prefetch_definitions(self, usage_key, depth=None):    # pylint: disable=unused-argument
+        """
+        Hint that the content of the block `usage_key` and of its descendants down to `depth`
+        (all of them if None) is about to be read, so that stores which load it lazily can
+        load it in one go. By default, does nothing.
+        """
+        pass
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
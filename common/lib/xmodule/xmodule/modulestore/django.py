@@ -23,6 +23,8 @@ import django.utils
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.mongo_connection import DefinitionCache, StructureCache
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -112,6 +114,48 @@ def load_function(path):
     return getattr(import_module(module_path), name)
 
 
+# The StructureCache shared by all split modulestores in this process
+_STRUCTURE_CACHE = None
+
+
+def get_structure_cache():
+    """
+    Return the StructureCache for split structures, or None if there is none.
+
+    Its in-process tier holds up to settings.SPLIT_STRUCTURE_CACHE_SIZE bytes,
+    and its shared tier is the 'course_structure_cache' cache, if configured.
+    """
+    global _STRUCTURE_CACHE  # pylint: disable=global-statement
+    if _STRUCTURE_CACHE is None:
+        try:
+            shared_cache = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            shared_cache = None
+
+        max_size = getattr(settings, 'SPLIT_STRUCTURE_CACHE_SIZE', 0)
+        if max_size or shared_cache is not None:
+            _STRUCTURE_CACHE = StructureCache(max_size, shared_cache)
+    return _STRUCTURE_CACHE
+
+
+# The DefinitionCache shared by all split modulestores in this process
+_DEFINITION_CACHE = None
+
+
+def get_definition_cache():
+    """
+    Return the DefinitionCache for split definitions, or None if there is none.
+
+    It holds up to settings.SPLIT_DEFINITION_CACHE_SIZE bytes of definitions.
+    """
+    global _DEFINITION_CACHE  # pylint: disable=global-statement
+    if _DEFINITION_CACHE is None:
+        max_size = getattr(settings, 'SPLIT_DEFINITION_CACHE_SIZE', 0)
+        if max_size:
+            _DEFINITION_CACHE = DefinitionCache(max_size)
+    return _DEFINITION_CACHE
+
+
 def create_modulestore_instance(
         engine,
         content_store,
@@ -148,6 +192,10 @@ def create_modulestore_instance(
     if issubclass(class_, MixedModuleStore):
         _options['create_modulestore_instance'] = create_modulestore_instance
 
+    if issubclass(class_, SplitMongoModuleStore):
+        _options['structure_cache'] = get_structure_cache()
+        _options['definition_cache'] = get_definition_cache()
+
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
@@ -191,6 +239,29 @@ def modulestore():
     return _MIXED_MODULESTORE
 
 
+def get_course_version(course):
+    """
+    Return a string identifying the version of `course`, a course descriptor,
+    in the branch it was read from, which changes whenever anything in the
+    course is edited or published. Returns None if the course's modulestore
+    doesn't track edits.
+
+    Split courses are versioned by the structure they were loaded from. Old
+    mongo courses are versioned by the time anything in them was last edited,
+    which the modulestore keeps on the course (blocks only expose it as
+    `subtree_edited_on` in Studio, where they have the EditInfoMixin).
+    """
+    course_entry = getattr(course.runtime, 'course_entry', None)
+    version_guid = getattr(getattr(course_entry, 'course_key', None), 'version_guid', None)
+    if version_guid is not None:
+        return unicode(version_guid)
+    try:
+        edited_on = course.runtime.get_subtree_edited_on(course)
+    except (AttributeError, NotImplementedError):
+        return None
+    return unicode(edited_on) if edited_on is not None else None
+
+
 def clear_existing_modulestores():
     """
     Clear the existing modulestore instances, causing
@@ -519,6 +519,13 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._get_modulestore_for_courselike(asset_key.course_key)
         return store.set_asset_metadata_attrs(asset_key, attr_dict, user_id)
 
+    def prefetch_definitions(self, usage_key, depth=None, **kwargs):
+        """
+        Prefetches the definitions of the given block and its descendants, if its store loads them lazily.
+        """
+        store = self._get_modulestore_for_courselike(usage_key.course_key)
+        return store.prefetch_definitions(usage_key, depth=depth, **kwargs)
+
     @strip_key
     def get_parent_location(self, location, **kwargs):
         """
@@ -15,8 +15,9 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
+import os
 import re
+import time
 from uuid import uuid4
 
 from bson.son import SON
@@ -161,6 +162,169 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
         )
 
 
+class MetadataInheritanceTree(object):
+    """
+    The inheritable settings of a course, as cached for the MongoModuleStore.
+
+    Each container only records the inheritable settings it sets itself, and
+    each block records a pointer to its parent; the settings a block inherits
+    are resolved lazily (and memoized per container) by walking up the parent
+    pointers. This keeps the cached tree small compared to storing the fully
+    merged settings of every block, and lets a single container's settings be
+    changed without recomputing the whole tree.
+
+    For backwards compatibility with the dict it replaces, `get(url)` returns
+    the inherited settings of the block at `url` along with a 'parent' entry
+    mapping the branch the tree was computed for to the parent's url.
+    """
+    # Bump whenever the pickled format changes; stale entries are then discarded
+    FORMAT_VERSION = 1
+
+    def __init__(self, branch=None):
+        self.branch = branch
+        # block url -> parent url, for every block below the root
+        self._parents = {}
+        # container url -> the inheritable settings it sets itself
+        self._overrides = {}
+        self._resolved = {}
+
+    def set_container(self, url, metadata):
+        """
+        Record `metadata` as the inheritable settings set by the container at `url`.
+        """
+        self._overrides[url] = dict(metadata)
+        self._resolved.clear()
+
+    def set_parent(self, url, parent_url):
+        """
+        Record `parent_url` as the parent of the block at `url`.
+        """
+        self._parents[url] = parent_url
+        self._resolved.clear()
+
+    def is_container(self, url):
+        """
+        Whether the block at `url` was recorded as a container in this tree.
+        """
+        return url in self._overrides
+
+    def children_of(self, url):
+        """
+        Return the set of urls whose parent is `url`.
+        """
+        return set(child for child, parent in self._parents.iteritems() if parent == url)
+
+    def _resolve(self, url):
+        """
+        Return the settings the block at `url` sees: its own plus those of its ancestors.
+        """
+        resolved = self._resolved.get(url)
+        if resolved is not None:
+            return resolved
+
+        parent_url = self._parents.get(url)
+        inherited = self._resolve(parent_url) if parent_url is not None else {}
+        if url not in self._overrides:
+            return inherited
+
+        resolved = dict(inherited)
+        resolved.update(self._overrides[url])
+        self._resolved[url] = resolved
+        return resolved
+
+    def get(self, url, default=None):
+        """
+        Return the inherited settings for the block at `url`, or `default` if
+        the block is not in the tree.
+        """
+        if url not in self._parents:
+            return default
+        metadata = dict(self._resolve(url))
+        metadata['parent'] = {self.branch: self._parents[url]}
+        return metadata
+
+    def __getitem__(self, url):
+        metadata = self.get(url)
+        if metadata is None:
+            raise KeyError(url)
+        return metadata
+
+    def __contains__(self, url):
+        return url in self._parents
+
+    def __iter__(self):
+        return iter(self._parents)
+
+    def __len__(self):
+        return len(self._parents)
+
+    def keys(self):
+        """
+        Return the urls of all the blocks in the tree.
+        """
+        return self._parents.keys()
+
+    def update(self, other):
+        """
+        Merge another MetadataInheritanceTree, or a dict in the format returned
+        by `get`, into this tree.
+        """
+        if isinstance(other, MetadataInheritanceTree):
+            self._parents.update(other._parents)
+            self._overrides.update(other._overrides)
+        else:
+            for url, metadata in other.iteritems():
+                metadata = dict(metadata)
+                parent_url = metadata.pop('parent', {}).get(self.branch)
+                if parent_url is not None:
+                    self._parents[url] = parent_url
+                self._overrides[url] = metadata
+        self._resolved.clear()
+
+    def __getstate__(self):
+        """
+        Pickle to a compact form: urls are stored once, without the prefix they
+        share, and referred to by index; containers with no settings of their
+        own are not stored at all, nor are memoized resolutions.
+        """
+        urls = sorted(set(self._parents) | set(self._parents.itervalues()) | set(self._overrides))
+        prefix = os.path.commonprefix(urls) if len(urls) > 1 else ''
+        index = {url: position for position, url in enumerate(urls)}
+        parents = []
+        for url, parent_url in self._parents.iteritems():
+            parents.extend((index[url], index[parent_url]))
+        containers = [index[url] for url in self._overrides]
+        overrides = dict(
+            (index[url], metadata) for url, metadata in self._overrides.iteritems() if metadata
+        )
+        return (
+            self.FORMAT_VERSION,
+            self.branch,
+            prefix,
+            [url[len(prefix):] for url in urls],
+            parents,
+            containers,
+            overrides,
+        )
+
+    def __setstate__(self, state):
+        self.__init__()
+        if not state or state[0] != self.FORMAT_VERSION:
+            # Left empty, so that it is recomputed
+            return
+        __, self.branch, prefix, urls, parents, containers, overrides = state
+        urls = [prefix + url for url in urls]
+        for position in xrange(0, len(parents), 2):
+            self._parents[urls[parents[position]]] = urls[parents[position + 1]]
+        for position in containers:
+            self._overrides[urls[position]] = overrides.get(position, {})
+
+    def __repr__(self):
+        return "MetadataInheritanceTree({!r}, {} blocks, {} containers)".format(
+            self.branch, len(self._parents), len(self._overrides)
+        )
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     """
     A system that has a cache of module json that it will use to load modules
@@ -708,44 +872,68 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        # now walk down from the root, recording each container's own settings
+        # and each block's parent; inherited values are resolved lazily by the tree
+        tree = MetadataInheritanceTree(self.get_branch_setting())
+        to_process = [root] if root is not None else []
+        while to_process:
+            url = to_process.pop()
+            result = results_by_url[url]
+            tree.set_container(url, result.get('metadata', {}))
+            # only recurse into the children we have in the result set. Remember
+            # results will not contain leaf nodes
+            for child in result.get('definition', {}).get('children', []):
+                # WARNING: 'parent' is not part of inherited metadata, but
+                # we're piggybacking on this traversal to grab and cache the
+                # child's parent, as a performance optimization.
+                tree.set_parent(child, url)
+                if child in results_by_url:
+                    to_process.append(child)
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
+        return tree
 
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+    def _get_metadata_inheritance_tree_version(self, course_id):
+        """
+        Return the version of the metadata inheritance tree of `course_id` in the
+        caching subsystem. The version is bumped by every write to the course (see
+        `_bump_metadata_inheritance_tree_version`), and trees are cached by version.
+        """
+        version_key = u'{}.version'.format(course_id)
+        version = self.metadata_inheritance_cache_subsystem.get(version_key)
+        if version is None:
+            # Start from the time rather than 0, so that the trees cached under an
+            # evicted version key's versions aren't picked up again.
+            self.metadata_inheritance_cache_subsystem.add(version_key, int(time.time() * 1000000))
+            version = self.metadata_inheritance_cache_subsystem.get(version_key)
+        return version
 
-        if root is not None:
-            _compute_inherited_metadata(root)
+    def _bump_metadata_inheritance_tree_version(self, course_id):
+        """
+        Atomically bump the version of the metadata inheritance tree of
+        `course_id` in the caching subsystem, and return the new version, or
+        None if there's no version to bump.
+        """
+        try:
+            return self.metadata_inheritance_cache_subsystem.incr(u'{}.version'.format(course_id))
+        except ValueError:
+            return None
 
-        return metadata_to_inherit
+    @staticmethod
+    def _metadata_inheritance_tree_key(course_id, version):
+        """
+        Return the caching subsystem key of version `version` of the metadata
+        inheritance tree of `course_id`.
+        """
+        return u'{}.{}'.format(course_id, version)
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
+
+        Forcing a refresh bumps the version of the cached tree, so that trees
+        computed or updated from before the refresh aren't cached over it.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
@@ -753,26 +941,44 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if self.request_cache is not None and unicode(course_id) in self.request_cache.data.get('metadata_inheritance', {}):
                 return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
 
-            # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
-            else:
-                logging.warning(
-                    'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
-                    OK in localdev and testing environment. Not OK in production.'
+        # then look in any caching subsystem (e.g. memcached)
+        version = None
+        if self.metadata_inheritance_cache_subsystem is not None:
+            if force_refresh:
+                version = self._bump_metadata_inheritance_tree_version(course_id)
+            if version is None:
+                version = self._get_metadata_inheritance_tree_version(course_id)
+            if not force_refresh:
+                tree = self.metadata_inheritance_cache_subsystem.get(
+                    self._metadata_inheritance_tree_key(course_id, version)
                 )
+        elif not force_refresh:
+            logging.warning(
+                'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
+                OK in localdev and testing environment. Not OK in production.'
+            )
 
-        if not tree:
+        if not isinstance(tree, MetadataInheritanceTree) or not tree:
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+                self.metadata_inheritance_cache_subsystem.set(
+                    self._metadata_inheritance_tree_key(course_id, version), tree
+                )
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+
+        return tree
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Store `tree` in the request cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -780,20 +986,88 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
+    def _update_cached_metadata_inheritance_tree(self, course_id, xblock):
+        """
+        Apply a change to `xblock` to the cached metadata inheritance tree without
+        recomputing it: record its inheritable settings if it is a container, and
+        the parent pointers of any children added to it.
+
+        Returns the updated tree, or None if the change can't be applied
+        incrementally (no cached tree, children removed, an unknown container
+        added as a child, or the cached tree changed by someone else while this
+        was updating it) and the tree has to be recomputed.
+
+        The tree is read from the caching subsystem rather than the request
+        cache, and stored as the next version of the tree only if no one else
+        bumped the version since it was read, so that no other change is lost.
+        """
+        course_id = self.fill_in_run(course_id)
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is not None:
+            version = self._get_metadata_inheritance_tree_version(course_id)
+            tree = cache.get(self._metadata_inheritance_tree_key(course_id, version))
+        else:
+            tree = self._get_cached_metadata_inheritance_tree(course_id)
+        if not isinstance(tree, MetadataInheritanceTree) or tree.branch != self.get_branch_setting():
+            return None
+
+        if not xblock.has_children:
+            # the settings of leaf blocks aren't inherited by anything
+            return tree
+
+        url = unicode(as_published(xblock.location))
+        if not tree.is_container(url):
+            return None
+
+        children = set(unicode(child) for child in xblock.children)
+        current_children = tree.children_of(url)
+        if current_children - children:
+            return None
+        added_children = [
+            child for child in xblock.children
+            if unicode(child) not in current_children
+        ]
+        if any(
+            child.category in BLOCK_TYPES_WITH_CHILDREN and not tree.is_container(unicode(child))
+            for child in added_children
+        ):
+            return None
+
+        tree.set_container(url, dict(
+            (field_name, value)
+            for field_name, value in self._serialize_scope(xblock, Scope.settings).iteritems()
+            if field_name in InheritanceMixin.fields
+        ))
+        for child in added_children:
+            tree.set_parent(unicode(child), url)
+
+        if cache is not None:
+            new_version = self._bump_metadata_inheritance_tree_version(course_id)
+            if new_version != version + 1:
+                return None
+            cache.set(self._metadata_inheritance_tree_key(course_id, new_version), tree)
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, xblock=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the `xblock` that was just written, the cached tree is updated
+        in place where possible instead of being recomputed.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if xblock is not None:
+                cached_metadata = self._update_cached_metadata_inheritance_tree(course_id, xblock)
+            if cached_metadata is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1440,7 +1714,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, xblock=xblock
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -14,7 +14,7 @@ import ddt
 from nose.plugins.skip import SkipTest
 from xmodule.assetstore import AssetMetadata
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.xml_importer import import_course_from_xml
+from xmodule.modulestore.xml_importer import CourseImportManager, import_course_from_xml
 from xmodule.modulestore.xml_exporter import export_course_to_xml
 from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
     MODULESTORE_SETUPS,
@@ -33,6 +33,9 @@ except ImportError:
 # Number of assets saved in the modulestore per test run.
 ASSET_AMOUNT_PER_TEST = (0, 1, 10, 100, 1000, 10000)
 
+# Numbers of threads importing static files per test run.
+STATIC_IMPORT_WORKERS = (1, 4, 16)
+
 # Use only this course in asset metadata performance testing.
 COURSE_NAME = 'manual-testing-complete'
 
@@ -143,6 +146,58 @@ class CrossStoreXMLRoundtrip(unittest.TestCase):
                         )
 
 
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class CourseImportTest(unittest.TestCase):
+    """
+    This class exists to time each phase of a whole course import into different
+    modulestore classes, with different numbers of static import threads.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(
+        MODULESTORE_SETUPS,
+        STATIC_IMPORT_WORKERS,
+    ))
+    @ddt.unpack
+    def test_generate_import_timings(self, dest_ms, workers):
+        """
+        Generate timings of the phases of a course import.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        desc = "CourseImport:{}:{}".format(
+            SHORT_NAME_MAP[dest_ms],
+            workers,
+        )
+
+        with dest_ms.build() as (dest_content, dest_store):
+            dest_course_key = dest_store.make_course_key('a', 'course', 'course')
+
+            with CodeBlockTimer(desc):
+                import_manager = CourseImportManager(
+                    dest_store,
+                    'test_user',
+                    TEST_DATA_ROOT,
+                    source_dirs=TEST_COURSE,
+                    static_content_store=dest_content,
+                    target_id=dest_course_key,
+                    create_if_not_present=True,
+                    raise_on_failure=True,
+                    static_import_workers=workers,
+                )
+                list(import_manager.run_imports())
+
+            for phase, seconds in sorted(import_manager.phase_timings.items()):
+                print "{} - phase: {:<15} - {:.3f}s".format(desc, phase, seconds)
+
+
 @ddt.ddt
 # Eventually, exclude this attribute from regular unittests while running *only* tests
 # with this attribute during regular performance tests.
@@ -14,7 +14,7 @@ from xmodule.errortracker import exc_info_to_str
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from xmodule.modulestore.inheritance import inheriting_field_data, InheritanceMixin
+from xmodule.modulestore.inheritance import inheriting_field_data, InheritanceCache, InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.split_mongo.id_manager import SplitMongoIdManager
 from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
@@ -76,6 +76,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # inherited field values, shared by all the blocks loaded by this runtime
+        self.inheritance_cache = InheritanceCache()
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
     @lazy
@@ -215,7 +217,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         )
 
         if InheritanceMixin in self.modulestore.xblock_mixins:
-            field_data = inheriting_field_data(kvs)
+            field_data = inheriting_field_data(kvs, self.inheritance_cache)
         else:
             field_data = KvsFieldData(kvs)
 
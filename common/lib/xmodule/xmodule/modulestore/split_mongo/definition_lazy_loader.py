@@ -1,5 +1,4 @@
 from opaque_keys.edx.locator import DefinitionLocator
-import copy
 
 
 class DefinitionLazyLoader(object):
@@ -25,8 +24,8 @@ class DefinitionLazyLoader(object):
         Fetch the definition. Note, the caller should replace this lazy
         loader pointer with the result so as not to fetch more than once
         """
-        # get_definition may return a cached value perhaps from another course or code path
-        # so, we copy the result here so that updates don't cross-pollinate nor change the cached
-        # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
-        return copy.deepcopy(definition)
+        # The definition may be shared with other blocks, courses or code paths (see
+        # SplitMongoModuleStore.get_shared_definition), so it's returned uncopied and
+        # must not be changed: SplitMongoKVS copies each mutable field value when it's
+        # first read rather than deep copying whole definitions up front.
+        return self.modulestore.get_shared_definition(self.course_key, self.definition_locator.definition_id)
@@ -1,7 +1,13 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import cPickle as pickle
+from collections import OrderedDict
 import re
+import threading
+import zlib
+
+import dogstats_wrapper as dog_stats_api
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -70,17 +76,162 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A cache of structures, keyed by their version guid.
+
+    Structures are never changed once written, so entries never need to be
+    invalidated. The cache has two tiers: an LRU in this process holding up to
+    `max_size` bytes of pickled structures, and, if `shared_cache` (a django
+    cache, e.g. memcached) is given, a tier shared between processes holding
+    compressed pickles.
+
+    Structures are kept pickled so that the memory they take can be bounded,
+    and so that every `get` returns a private copy that the caller is free to
+    change.
+    """
+    def __init__(self, max_size=0, shared_cache=None):
+        self.max_size = max_size
+        self.shared_cache = shared_cache
+        # version guid -> pickled structure, least recently used first
+        self._structures = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the structure whose version guid is `key`, or None if it isn't cached.
+        """
+        with self._lock:
+            data = self._structures.pop(key, None)
+            if data is not None:
+                self._structures[key] = data
+
+        if data is not None:
+            result = 'local_hit'
+        elif self.shared_cache is not None:
+            compressed = self.shared_cache.get(self._shared_key(key))
+            if compressed is not None:
+                result = 'shared_hit'
+                data = zlib.decompress(compressed)
+                self._add_local(key, data)
+            else:
+                result = 'miss'
+        else:
+            result = 'miss'
+
+        dog_stats_api.increment('split.structure_cache', tags=[u'result:{}'.format(result)])
+        if data is None:
+            return None
+        return pickle.loads(data)
+
+    def set(self, key, structure):
+        """
+        Cache `structure` under its version guid `key`.
+        """
+        data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+        dog_stats_api.histogram('split.structure_cache.bytes', len(data))
+        self._add_local(key, data)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), zlib.compress(data, 1))
+
+    def _add_local(self, key, data):
+        """
+        Add the pickled structure `data` to the local tier, evicting the least
+        recently used ones as needed.
+        """
+        if len(data) > self.max_size:
+            return
+        with self._lock:
+            if key in self._structures:
+                return
+            self._structures[key] = data
+            self._size += len(data)
+            while self._size > self.max_size:
+                __, evicted = self._structures.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _shared_key(self, key):
+        """
+        The key of the structure whose version guid is `key` in the shared tier.
+        """
+        return u'split_structure.{}'.format(key)
+
+
+class DefinitionCache(object):
+    """
+    An LRU cache of definitions, keyed by their id, holding up to `max_size`
+    bytes of definitions (as measured by the size of their pickles).
+
+    A definition is never changed once written (editing one writes a new one
+    with a new id), so entries never need to be invalidated. Cached
+    definitions are shared by everyone who reads them, and must be treated as
+    read-only: SplitMongoKVS copies a field's value the first time it's read
+    rather than copying whole definitions up front.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # definition id -> (definition, size), least recently used first
+        self._definitions = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, ids):
+        """
+        Return a dict mapping those of `ids` that are cached to their definitions.
+        """
+        found = {}
+        with self._lock:
+            for definition_id in ids:
+                entry = self._definitions.pop(definition_id, None)
+                if entry is not None:
+                    self._definitions[definition_id] = entry
+                    found[definition_id] = entry[0]
+
+        if found:
+            dog_stats_api.increment('split.definition_cache', len(found), tags=[u'result:hit'])
+        if len(found) < len(ids):
+            dog_stats_api.increment('split.definition_cache', len(ids) - len(found), tags=[u'result:miss'])
+        return found
+
+    def set_many(self, definitions):
+        """
+        Cache each of `definitions` under its id, evicting the least recently
+        used ones as needed.
+        """
+        # Sized outside of the lock, as pickling large definitions takes a while
+        entries = [
+            (definition, len(pickle.dumps(definition, pickle.HIGHEST_PROTOCOL)))
+            for definition in definitions
+        ]
+        with self._lock:
+            for definition, size in entries:
+                if size > self.max_size:
+                    continue
+                old_entry = self._definitions.pop(definition['_id'], None)
+                if old_entry is not None:
+                    self._size -= old_entry[1]
+                self._definitions[definition['_id']] = (definition, size)
+                self._size += size
+            while self._size > self.max_size:
+                __, (__, size) = self._definitions.popitem(last=False)
+                self._size -= size
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If `structure_cache` (a StructureCache) is given, structures are looked up there first.
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +273,15 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure
+
+        structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -57,6 +57,7 @@ import copy
 import datetime
 import hashlib
 import logging
+import threading
 from contracts import contract, new_contract
 from importlib import import_module
 from mongodb_proxy import autoretry_read
@@ -81,8 +82,9 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, is_indexable
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -110,6 +112,13 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# How many structures' StructureIndexes to keep
+STRUCTURE_INDEX_CACHE_SIZE = 20
+
+# The request cache key under which the number of definition queries made
+# during the request is counted
+DEFINITION_QUERIES_KEY = 'split.definition_queries'
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -123,6 +132,11 @@ class SplitBulkWriteRecord(BulkOpsRecord):
         self.index = None
         self.structures = {}
         self.structures_in_db = set()
+        # StructureIndexes of the structures changed in this bulk operation, by
+        # version guid, and the version guids of those which may have changed
+        # since they were last synced
+        self.structure_indexes = {}
+        self.unsynced_structure_indexes = set()
         # dict(version_guid, dict(BlockKey, module))
         self.modules = defaultdict(dict)
         self.definitions = {}
@@ -337,6 +351,10 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             bulk_write_record.structures[structure['_id']] = structure
+            structure_index = bulk_write_record.structure_indexes.get(structure['_id'])
+            if structure_index is not None:
+                structure_index.sync(structure['blocks'])
+                bulk_write_record.unsynced_structure_indexes.discard(structure['_id'])
         else:
             self.db_connection.insert_structure(structure)
 
@@ -388,6 +406,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             # The definition hasn't been loaded from the db yet, so load it
             if definition is None:
                 definition = self.db_connection.get_definition(definition_guid)
+                self._count_definition_queries()
                 bulk_write_record.definitions[definition_guid] = definition
                 if definition is not None:
                     bulk_write_record.definitions_in_db.add(definition_guid)
@@ -396,6 +415,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             # cast string to ObjectId if necessary
             definition_guid = course_key.as_object_id(definition_guid)
+            self._count_definition_queries()
             return self.db_connection.get_definition(definition_guid)
 
     def get_definitions(self, course_key, ids):
@@ -424,12 +444,47 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if len(ids):
             # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids))
-            # Add the retrieved definitions to the cache.
-            bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
+            defs_from_db = list(self.db_connection.get_definitions(list(ids)))
+            self._count_definition_queries()
+            if bulk_write_record.active:
+                # Add the retrieved definitions to the cache.
+                defs_dict = {d.get('_id'): d for d in defs_from_db}
+                bulk_write_record.definitions.update(defs_dict)
+                bulk_write_record.definitions_in_db.update(defs_dict)
             definitions.extend(defs_from_db)
         return definitions
 
+    def get_shared_definition(self, course_key, definition_guid):
+        """
+        Retrieve a single definition by id like `get_definition`, but look in
+        the definition cache (see `prefetch_definitions`) before the db.
+
+        The definition returned may be shared with other callers, so it must
+        not be changed.
+        """
+        if self.definition_cache is None:
+            return self.get_definition(course_key, definition_guid)
+
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and definition_guid in bulk_write_record.definitions:
+            return bulk_write_record.definitions[definition_guid]
+
+        definition_guid = course_key.as_object_id(definition_guid)
+        definition = self.definition_cache.get_many([definition_guid]).get(definition_guid)
+        if definition is None:
+            definition = self.get_definition(course_key, definition_guid)
+            if definition is not None:
+                self.definition_cache.set_many([definition])
+        return definition
+
+    def _count_definition_queries(self):
+        """
+        Count a query for definitions against the current request.
+        """
+        if self.request_cache is not None:
+            data = self.request_cache.data
+            data[DEFINITION_QUERIES_KEY] = data.get(DEFINITION_QUERIES_KEY, 0) + 1
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -452,7 +507,11 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         # If we have an active bulk write, and it's already been edited, then just use that structure
         if bulk_write_record.active and course_key.branch in bulk_write_record.dirty_branches:
-            return bulk_write_record.structure_for_branch(course_key.branch)
+            structure = bulk_write_record.structure_for_branch(course_key.branch)
+            if structure is not None:
+                # The caller is about to change it
+                bulk_write_record.unsynced_structure_indexes.add(structure['_id'])
+            return structure
 
         # Otherwise, make a new structure
         new_structure = copy.deepcopy(structure)
@@ -636,15 +695,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, structure_cache=None, definition_cache=None, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache: an optional StructureCache to keep the structures read from the db in.
+        :param definition_cache: an optional DefinitionCache to keep the definitions of loaded blocks in.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
+        self.definition_cache = definition_cache
 
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
@@ -667,6 +729,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         self.signal_handler = signal_handler
 
+        # StructureIndexes of recently used structures, by version guid
+        self._structure_indexes = OrderedDict()
+        self._structure_indexes_lock = threading.Lock()
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -738,6 +804,36 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             system.module_data.update(new_module_data)
             return system.module_data
 
+    def prefetch_definitions(self, usage_key, depth=None):
+        """
+        Load the definitions of the block `usage_key` and of its descendants
+        down to `depth` (all of them if None) into the definition cache with
+        one query, so that reading their content fields later doesn't make a
+        query per block.
+
+        Does nothing if there is no definition cache.
+        """
+        if self.definition_cache is None:
+            return
+        if not isinstance(usage_key, BlockUsageLocator) or usage_key.deprecated:
+            # The supplied UsageKey is of the wrong type, so it can't possibly be stored in this modulestore.
+            raise ItemNotFoundError(usage_key)
+
+        course_key = usage_key.course_key
+        structure = self._lookup_course(course_key).structure
+        blocks = self.descendants(structure['blocks'], BlockKey.from_usage_key(usage_key), depth, {})
+        definition_ids = set(block.definition for block in blocks.itervalues() if block.definition is not None)
+
+        # Definitions written during an active bulk operation aren't in the db yet
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active:
+            definition_ids.difference_update(bulk_write_record.definitions)
+
+        definition_ids.difference_update(self.definition_cache.get_many(definition_ids))
+        if definition_ids:
+            self.definition_cache.set_many(list(self.db_connection.get_definitions(list(definition_ids))))
+            self._count_definition_queries()
+
     @contract(course_entry=CourseEnvelope, block_keys="list(BlockKey)", depth="int | None")
     def _load_items(self, course_entry, block_keys, depth=0, **kwargs):
         """
@@ -1104,8 +1200,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+
+        # Narrow the search down to the blocks that the structure's index
+        # finds for the criteria it can look up; the rest are checked below.
+        block_keys = None
+        structure_index = None
+        if is_indexable(qualifiers.get('block_type')) or any(is_indexable(value) for value in settings.itervalues()):
+            structure_index = self._get_structure_index(course.course_key, course.structure)
+        if is_indexable(qualifiers.get('block_type')):
+            block_keys = structure_index.get_blocks_of_type(qualifiers['block_type'])
+        for field_name, value in settings.iteritems():
+            if is_indexable(value):
+                matching_keys = structure_index.get_blocks_with_value(course.structure['blocks'], field_name, value)
+                block_keys = matching_keys if block_keys is None else block_keys & matching_keys
+        if block_keys is None:
+            block_keys = course.structure['blocks'].keys()
+
+        for block_id in block_keys:
+            value = course.structure['blocks'].get(block_id)
+            if value is not None and _block_matches_all(value):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -1126,7 +1239,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        parent_ids = self._get_parents_from_structure(
+            BlockKey.from_usage_key(locator), course.structure,
+            self._get_structure_index(locator.course_key, course.structure)
+        )
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
@@ -2141,10 +2257,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             # iterate over subtree list filtering out blacklist.
             orphans = set()
             destination_blocks = destination_structure['blocks']
+            source_structure_index = self._get_structure_index(source_course, source_structure)
             for subtree_root in subtree_list:
                 if BlockKey.from_usage_key(subtree_root) != source_structure['root']:
                     # find the parents and put root in the right sequence
-                    parents = self._get_parents_from_structure(BlockKey.from_usage_key(subtree_root), source_structure)
+                    parents = self._get_parents_from_structure(
+                        BlockKey.from_usage_key(subtree_root), source_structure, source_structure_index
+                    )
                     parent_found = False
                     for parent in parents:
                         # If a parent isn't found in the destination_blocks, it's possible it was renamed
@@ -2171,9 +2290,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     )
                 )
             # remove any remaining orphans
+            if orphans:
+                destination_structure_index = self._get_structure_index(destination_course, destination_structure)
             for orphan in orphans:
                 # orphans will include moved as well as deleted xblocks. Only delete the deleted ones.
-                self._delete_if_true_orphan(orphan, destination_structure)
+                self._delete_if_true_orphan(orphan, destination_structure, destination_structure_index)
 
             # update the db
             self.update_structure(destination_course, destination_structure)
@@ -2377,7 +2498,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             new_structure = self.version_structure(usage_locator.course_key, original_structure, user_id)
             new_blocks = new_structure['blocks']
             new_id = new_structure['_id']
-            parent_block_keys = self._get_parents_from_structure(block_key, original_structure)
+            parent_block_keys = self._get_parents_from_structure(
+                block_key, original_structure,
+                self._get_structure_index(usage_locator.course_key, original_structure)
+            )
             for parent_block_key in parent_block_keys:
                 parent_block = new_blocks[parent_block_key]
                 parent_block.fields['children'].remove(block_key)
@@ -2733,8 +2857,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 elif isinstance(field, ReferenceList):
                     output_fields[field_name] = [robust_usage_key(ele) for ele in value]
                 elif isinstance(field, ReferenceValueDict):
-                    for key, subvalue in value.iteritems():
-                        value[key] = robust_usage_key(subvalue)
+                    output_fields[field_name] = {
+                        key: robust_usage_key(subvalue) for key, subvalue in value.iteritems()
+                    }
         return output_fields
 
     def _get_index_if_valid(self, course_key, force=False):
@@ -2880,11 +3005,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         }
 
     @contract(block_key=BlockKey)
-    def _get_parents_from_structure(self, block_key, structure):
+    def _get_parents_from_structure(self, block_key, structure, structure_index=None):
         """
         Given a structure, find block_key's parent in that structure. Note returns
         the encoded format for parent
+
+        If a StructureIndex of the structure is given, the parents are looked up in
+        it rather than found by scanning all the blocks.
         """
+        if structure_index is not None:
+            return structure_index.get_parents(block_key)
         return [
             parent_block_key
             for parent_block_key, value in structure['blocks'].iteritems()
@@ -2989,13 +3119,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         return fields
 
     @contract(orphan=BlockKey)
-    def _delete_if_true_orphan(self, orphan, structure):
+    def _delete_if_true_orphan(self, orphan, structure, structure_index=None):
         """
         Delete the orphan and any of its descendants which no longer have parents.
+
+        `structure_index`, if given, is a StructureIndex of the structure, which
+        is kept up to date with the deletions.
         """
-        if len(self._get_parents_from_structure(orphan, structure)) == 0:
+        if len(self._get_parents_from_structure(orphan, structure, structure_index)) == 0:
             for child in structure['blocks'][orphan].fields.get('children', []):
-                self._delete_if_true_orphan(BlockKey(*child), structure)
+                self._delete_if_true_orphan(BlockKey(*child), structure, structure_index)
+            if structure_index is not None:
+                structure_index.remove_block(orphan)
             del structure['blocks'][orphan]
 
     @contract(returns=BlockData)
@@ -3025,6 +3160,37 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             document['defaults'] = block_defaults
         return BlockData(**document)
 
+    def _get_structure_index(self, course_key, structure):
+        """
+        Return a StructureIndex of `structure`, as looked up for `course_key`.
+
+        Structures don't change once written, so the indexes of those read from
+        the db are kept (by version guid) for later use. A structure being
+        changed in the current bulk operation has one index for the whole
+        operation, which `update_structure` brings up to date with the changed
+        blocks, as does this if it's looked up mid-change.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            structure_index = bulk_write_record.structure_indexes.get(structure['_id'])
+            if structure_index is None:
+                structure_index = StructureIndex(structure['blocks'])
+                bulk_write_record.structure_indexes[structure['_id']] = structure_index
+            elif structure['_id'] in bulk_write_record.unsynced_structure_indexes:
+                structure_index.sync(structure['blocks'])
+            bulk_write_record.unsynced_structure_indexes.discard(structure['_id'])
+            return structure_index
+
+        with self._structure_indexes_lock:
+            structure_index = self._structure_indexes.pop(structure['_id'], None)
+        if structure_index is None:
+            structure_index = StructureIndex(structure['blocks'])
+        with self._structure_indexes_lock:
+            self._structure_indexes[structure['_id']] = structure_index
+            while len(self._structure_indexes) > STRUCTURE_INDEX_CACHE_SIZE:
+                self._structure_indexes.popitem(last=False)
+        return structure_index
+
     @contract(block_key=BlockKey, returns='BlockData | None')
     def _get_block_from_structure(self, structure, block_key):
         """
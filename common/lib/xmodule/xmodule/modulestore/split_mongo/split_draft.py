@@ -268,6 +268,13 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_locator = self._map_revision_to_branch(course_locator, revision=revision)
         return super(DraftVersioningModuleStore, self).get_items(course_locator, **kwargs)
 
+    def prefetch_definitions(self, usage_key, depth=None, revision=None):
+        """
+        Prefetches the definitions of the given block and its descendants in the given revision.
+        """
+        usage_key = self._map_revision_to_branch(usage_key, revision=revision)
+        return super(DraftVersioningModuleStore, self).prefetch_definitions(usage_key, depth=depth)
+
     def get_parent_location(self, location, revision=None, **kwargs):
         '''
         Returns the given location's parent location in this course.
@@ -31,6 +31,8 @@ class SplitMongoKVS(InheritanceKeyValueStore):
         super(SplitMongoKVS, self).__init__(copy.deepcopy(initial_values))
         self._definition = definition  # either a DefinitionLazyLoader or the db id of the definition.
         # if the db id, then the definition is presumed to be loaded into _fields
+        # names of the fields in _fields whose values are still shared with the loaded definition
+        self._shared_fields = set()
 
         self._defaults = default_values
         # a decorator function for field values (to be called when a field is accessed)
@@ -63,6 +65,11 @@ class SplitMongoKVS(InheritanceKeyValueStore):
 
         if key.field_name in self._fields:
             field_value = self._fields[key.field_name]
+            if key.field_name in self._shared_fields:
+                # copy on first read so that manipulations of the value don't pollute the definition
+                self._shared_fields.discard(key.field_name)
+                if isinstance(field_value, (list, dict)):
+                    field_value = self._fields[key.field_name] = copy.deepcopy(field_value)
 
             # return the "decorated" field value
             return self.field_decorator(field_value)
@@ -78,6 +85,7 @@ class SplitMongoKVS(InheritanceKeyValueStore):
 
         # set the field
         self._fields[key.field_name] = value
+        self._shared_fields.discard(key.field_name)
 
         # This function is currently incomplete: it doesn't handle side effects.
         # To complete this function, here is some pseudocode for what should happen:
@@ -98,6 +106,7 @@ class SplitMongoKVS(InheritanceKeyValueStore):
         # delete the field value
         if key.field_name in self._fields:
             del self._fields[key.field_name]
+        self._shared_fields.discard(key.field_name)
 
     def has(self, key):
         """
@@ -132,5 +141,7 @@ class SplitMongoKVS(InheritanceKeyValueStore):
             if persisted_definition is not None:
                 fields = self._definition.field_converter(persisted_definition.get('fields'))
                 self._fields.update(fields)
+                # the values are shared with the definition until they're read (see get)
+                self._shared_fields.update(fields)
                 # do we want to cache any of the edit_info?
             self._definition = None  # already loaded
@@ -0,0 +1,146 @@
+"""
+Indexes over the blocks of a split structure, so that parents and blocks of a
+given type or field value can be found without scanning every block.
+"""
+from collections import defaultdict
+from numbers import Number
+
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+def is_indexable(value):
+    """
+    Can blocks be looked up by `value` in a StructureIndex? Regexes, functions
+    and query dicts have to be matched against every block.
+    """
+    return isinstance(value, (basestring, Number))
+
+
+class StructureIndex(object):
+    """
+    The parents of each block of a structure, and the blocks of each type.
+    The blocks having each value of a settings field are indexed the first
+    time they are asked for.
+
+    The index doesn't follow changes to the structure by itself: callers that
+    change it must either call `add_block`, `remove_block` or `sync`, or stop
+    using the index. Each block's type, children and indexed values are kept
+    as they were indexed, so that blocks changed in place can be re-indexed.
+    """
+    def __init__(self, blocks):
+        self._parents = defaultdict(set)
+        self._blocks_by_type = defaultdict(set)
+        # field name -> {value: set of block keys}
+        self._field_values = {}
+        # block key -> (block type, tuple of children) as indexed
+        self._indexed_blocks = {}
+        # field name -> {block key: list of values} as indexed
+        self._indexed_values = {}
+        for block_key, block in blocks.iteritems():
+            self.add_block(block_key, block)
+
+    def add_block(self, block_key, block):
+        """
+        Index `block`, which was added to the structure as `block_key`, or
+        re-index it if it changed.
+        """
+        if block_key in self._indexed_blocks:
+            self.remove_block(block_key)
+        children = self._children(block)
+        self._indexed_blocks[block_key] = (block.block_type, children)
+        self._blocks_by_type[block.block_type].add(block_key)
+        for child in children:
+            self._parents[child].add(block_key)
+        for field_name, blocks_by_value in self._field_values.iteritems():
+            values = self._indexable_values(block, field_name)
+            self._indexed_values[field_name][block_key] = values
+            for value in values:
+                blocks_by_value[value].add(block_key)
+
+    def remove_block(self, block_key):
+        """
+        Stop indexing the block `block_key`, which was removed from the structure.
+        """
+        indexed = self._indexed_blocks.pop(block_key, None)
+        if indexed is None:
+            return
+        block_type, children = indexed
+        self._blocks_by_type[block_type].discard(block_key)
+        for child in children:
+            self._parents[child].discard(block_key)
+        for field_name, blocks_by_value in self._field_values.iteritems():
+            for value in self._indexed_values[field_name].pop(block_key, []):
+                blocks_by_value[value].discard(block_key)
+
+    def sync(self, blocks):
+        """
+        Bring the index up to date with the structure's `blocks`, re-indexing
+        only the blocks which were added, removed or changed since they were
+        indexed.
+        """
+        for block_key in [block_key for block_key in self._indexed_blocks if block_key not in blocks]:
+            self.remove_block(block_key)
+        for block_key, block in blocks.iteritems():
+            if not self._is_indexed(block_key, block):
+                self.add_block(block_key, block)
+
+    def _is_indexed(self, block_key, block):
+        """
+        Is `block` indexed as it is now?
+        """
+        if self._indexed_blocks.get(block_key) != (block.block_type, self._children(block)):
+            return False
+        return all(
+            indexed_values.get(block_key) == self._indexable_values(block, field_name)
+            for field_name, indexed_values in self._indexed_values.iteritems()
+        )
+
+    def get_parents(self, block_key):
+        """
+        Return a list of the keys of the blocks that have `block_key` as a child.
+        """
+        return list(self._parents.get(block_key, ()))
+
+    def get_blocks_of_type(self, block_type):
+        """
+        Return the set of the keys of the blocks of `block_type`.
+        """
+        return self._blocks_by_type.get(block_type, set())
+
+    def get_blocks_with_value(self, blocks, field_name, value):
+        """
+        Return the set of the keys of the blocks whose settings field
+        `field_name` is `value`, or is a list containing `value`.
+
+        `blocks` are the blocks of the indexed structure, which are indexed by
+        `field_name` if they haven't been yet.
+        """
+        blocks_by_value = self._field_values.get(field_name)
+        if blocks_by_value is None:
+            blocks_by_value = defaultdict(set)
+            indexed_values = {}
+            for block_key, block in blocks.iteritems():
+                indexed_values[block_key] = self._indexable_values(block, field_name)
+                for block_value in indexed_values[block_key]:
+                    blocks_by_value[block_value].add(block_key)
+            self._field_values[field_name] = blocks_by_value
+            self._indexed_values[field_name] = indexed_values
+        return blocks_by_value.get(value, set())
+
+    @staticmethod
+    def _children(block):
+        """
+        The keys of the children of `block`, as a tuple.
+        """
+        return tuple(BlockKey(*child) for child in block.fields.get('children', []))
+
+    @staticmethod
+    def _indexable_values(block, field_name):
+        """
+        The values under which `block` is indexed for `field_name`.
+        """
+        if field_name not in block.fields:
+            return []
+        value = block.fields[field_name]
+        values = value if isinstance(value, list) else [value]
+        return [element for element in values if is_indexable(element)]
@@ -76,6 +76,28 @@ class MemoryCache(object):
         """
         self._data[key] = value
 
+    def add(self, key, value):
+        """
+        Set a key in the cache, unless it's already set.
+
+        Args:
+            key: The key to set.
+            value: The value to set it to.
+        """
+        self._data.setdefault(key, value)
+
+    def incr(self, key):
+        """
+        Increment the number stored at a key in the cache, and return it.
+
+        Args:
+            key: The key to increment. Raises ValueError if it isn't set.
+        """
+        if key not in self._data:
+            raise ValueError("Key '{}' not found".format(key))
+        self._data[key] += 1
+        return self._data[key]
+
 
 class MongoContentstoreBuilder(object):
     """
@@ -0,0 +1,137 @@
+"""
+Tests for the cache of split modulestore definitions, and for the sharing of
+cached definitions between blocks.
+"""
+import cPickle as pickle
+import unittest
+
+from bson.objectid import ObjectId
+from xblock.fields import Scope
+from xblock.runtime import KeyValueStore
+
+from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
+from xmodule.modulestore.split_mongo.mongo_connection import DefinitionCache
+from xmodule.modulestore.split_mongo.split_mongo_kvs import SplitMongoKVS
+
+
+def make_definition():
+    """
+    Return a definition, as read from the db.
+    """
+    return {
+        '_id': ObjectId(),
+        'block_type': 'problem',
+        'fields': {'data': '<problem/>', 'markdown': None, 'weights': [1, 2]},
+        'edit_info': {},
+    }
+
+
+def definition_size(definition):
+    """
+    The size of `definition` in a DefinitionCache.
+    """
+    return len(pickle.dumps(definition, pickle.HIGHEST_PROTOCOL))
+
+
+class TestDefinitionCache(unittest.TestCase):
+    """
+    Tests for DefinitionCache.
+    """
+    def test_get_many(self):
+        cache = DefinitionCache(10000)
+        definitions = [make_definition() for __ in range(3)]
+        cache.set_many(definitions[:2])
+
+        ids = [definition['_id'] for definition in definitions]
+        self.assertEqual(
+            cache.get_many(ids),
+            {definitions[0]['_id']: definitions[0], definitions[1]['_id']: definitions[1]}
+        )
+
+    def test_lru_eviction(self):
+        definitions = [make_definition() for __ in range(3)]
+        cache = DefinitionCache(sum(definition_size(definition) for definition in definitions[:2]))
+        cache.set_many(definitions[:2])
+        cache.get_many([definitions[0]['_id']])
+        cache.set_many(definitions[2:])
+
+        ids = [definition['_id'] for definition in definitions]
+        self.assertEqual(set(cache.get_many(ids)), {ids[0], ids[2]})
+
+    def test_large_definitions_evict_more(self):
+        definitions = [make_definition() for __ in range(3)]
+        sizes = [definition_size(definition) for definition in definitions]
+        cache = DefinitionCache(sum(sizes))
+        cache.set_many(definitions)
+
+        # Make a definition which only fits in the cache on its own (with some
+        # slack, as the size of a pickle can vary by a few bytes)
+        large_definition = make_definition()
+        while definition_size(large_definition) <= sizes[0] + sizes[1] + 32:
+            large_definition['fields']['data'] += '<p/>'
+        cache.set_many([large_definition])
+
+        ids = [definition['_id'] for definition in definitions]
+        self.assertEqual(cache.get_many(ids + [large_definition['_id']]).keys(), [large_definition['_id']])
+
+    def test_definitions_larger_than_cache_are_not_cached(self):
+        definition = make_definition()
+        cache = DefinitionCache(definition_size(definition) - 1)
+        cache.set_many([definition])
+        self.assertEqual(cache.get_many([definition['_id']]), {})
+
+
+class SharedDefinitionStore(object):
+    """
+    A stand-in for a split modulestore, which hands out one shared definition.
+    """
+    def __init__(self, definition):
+        self.definition = definition
+
+    def get_shared_definition(self, course_key, definition_guid):  # pylint: disable=unused-argument, missing-docstring
+        return self.definition
+
+
+class TestSharedDefinitions(unittest.TestCase):
+    """
+    Tests that blocks loading the same cached definition don't see each other's changes.
+    """
+    def setUp(self):
+        super(TestSharedDefinitions, self).setUp()
+        self.definition = make_definition()
+        self.store = SharedDefinitionStore(self.definition)
+
+    def make_kvs(self):
+        """
+        Return a SplitMongoKVS whose definition is loaded from the shared definition.
+        """
+        loader = DefinitionLazyLoader(self.store, None, 'problem', self.definition['_id'], dict)
+        return SplitMongoKVS(loader, {}, {}, None)
+
+    def key(self, field_name):
+        """
+        The key of the content field `field_name`.
+        """
+        return KeyValueStore.Key(Scope.content, None, None, field_name)
+
+    def test_immutable_values_are_shared(self):
+        kvs = self.make_kvs()
+        self.assertIs(kvs.get(self.key('data')), self.definition['fields']['data'])
+
+    def test_mutable_values_are_copied_when_read(self):
+        kvs = self.make_kvs()
+        weights = kvs.get(self.key('weights'))
+        self.assertEqual(weights, [1, 2])
+        weights.append(3)
+
+        # The block keeps its changes, but the definition doesn't see them
+        self.assertIs(kvs.get(self.key('weights')), weights)
+        self.assertEqual(self.definition['fields']['weights'], [1, 2])
+        self.assertEqual(self.make_kvs().get(self.key('weights')), [1, 2])
+
+    def test_set_values_are_not_copied(self):
+        kvs = self.make_kvs()
+        weights = [3]
+        kvs.set(self.key('weights'), weights)
+        self.assertIs(kvs.get(self.key('weights')), weights)
+        self.assertEqual(self.definition['fields']['weights'], [1, 2])
@@ -9,12 +9,14 @@ from nose.tools import assert_equals, assert_raises, \
     assert_not_equals, assert_false, assert_true, assert_greater, assert_is_instance, assert_is_none
 # pylint: enable=E0611
 from path import path
+import pickle
 import pymongo
 import logging
 import shutil
 from tempfile import mkdtemp
 from uuid import uuid4
 from datetime import datetime
+from mock import Mock, patch
 from pytz import UTC
 import unittest
 from xblock.core import XBlock
@@ -39,8 +41,9 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, MetadataInheritanceTree
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 from xmodule.modulestore.tests.utils import LocationMixin
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
@@ -778,6 +781,73 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_inheritance_tree_updated_incrementally(self):
+        """
+        Changing the settings of a container updates the cached inheritance tree
+        in place rather than recomputing it.
+        """
+        cache = MemoryCache()
+        with patch.object(self.draft_store, 'request_cache', Mock(data={})), \
+                patch.object(self.draft_store, 'metadata_inheritance_cache_subsystem', cache):
+            course = self.draft_store.create_course("TestX", "InheritanceTest", "1234_A1", self.dummy_user)
+            chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+            sequential = self.draft_store.create_child(self.dummy_user, chapter.location, "sequential")
+
+            chapter = self.draft_store.get_item(chapter.location)
+            chapter.showanswer = 'never'
+            with patch.object(
+                self.draft_store, '_compute_metadata_inheritance_tree',
+                wraps=self.draft_store._compute_metadata_inheritance_tree
+            ) as mock_compute:
+                self.draft_store.update_item(chapter, self.dummy_user)
+            self.assertFalse(mock_compute.called)
+
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+            self.assertEqual(tree.get(unicode(sequential.location))['showanswer'], 'never')
+            self.assertEqual(self.draft_store.get_item(sequential.location).showanswer, 'never')
+
+            # Other processes get the updated tree from the caching subsystem
+            version = self.draft_store._get_metadata_inheritance_tree_version(course.id)
+            tree = cache.get(self.draft_store._metadata_inheritance_tree_key(course.id, version))
+            self.assertEqual(tree.get(unicode(sequential.location))['showanswer'], 'never')
+
+            self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_inheritance_tree_concurrent_update(self):
+        """
+        A tree updated in place isn't cached over a change made by someone else
+        since it was read; the tree is recomputed instead.
+        """
+        cache = MemoryCache()
+        with patch.object(self.draft_store, 'request_cache', Mock(data={})), \
+                patch.object(self.draft_store, 'metadata_inheritance_cache_subsystem', cache):
+            course = self.draft_store.create_course("TestX", "InheritanceTest", "1234_A2", self.dummy_user)
+            chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+            sequential = self.draft_store.create_child(self.dummy_user, chapter.location, "sequential")
+
+            chapter = self.draft_store.get_item(chapter.location)
+            chapter.showanswer = 'never'
+            bump_version = self.draft_store._bump_metadata_inheritance_tree_version
+
+            def concurrent_bump_version(course_id):
+                """Bump the version as another process writing the course would have."""
+                bump_version(course_id)
+                return bump_version(course_id)
+
+            with patch.object(self.draft_store, '_bump_metadata_inheritance_tree_version', concurrent_bump_version):
+                with patch.object(
+                    self.draft_store, '_compute_metadata_inheritance_tree',
+                    wraps=self.draft_store._compute_metadata_inheritance_tree
+                ) as mock_compute:
+                    self.draft_store.update_item(chapter, self.dummy_user)
+            self.assertTrue(mock_compute.called)
+
+            version = self.draft_store._get_metadata_inheritance_tree_version(course.id)
+            tree = cache.get(self.draft_store._metadata_inheritance_tree_key(course.id, version))
+            self.assertEqual(tree.get(unicode(sequential.location))['showanswer'], 'never')
+
+            self.draft_store.delete_course(course.id, self.dummy_user)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
@@ -913,3 +983,54 @@ def _build_requested_filter(requested_filter):
         "$where": ' || '.join(where),
     }
     return filter_params
+
+
+class TestMetadataInheritanceTree(unittest.TestCase):
+    """
+    Tests for MetadataInheritanceTree.
+    """
+
+    def setUp(self):
+        super(TestMetadataInheritanceTree, self).setUp()
+        self.tree = MetadataInheritanceTree(ModuleStoreEnum.Branch.draft_preferred)
+        self.tree.set_container('i4x://org/course/course/run', {'due': 'course_due', 'showanswer': 'always'})
+        self.tree.set_container('i4x://org/course/chapter/ch', {'due': 'chapter_due'})
+        self.tree.set_parent('i4x://org/course/chapter/ch', 'i4x://org/course/course/run')
+        self.tree.set_container('i4x://org/course/sequential/seq', {})
+        self.tree.set_parent('i4x://org/course/sequential/seq', 'i4x://org/course/chapter/ch')
+        self.tree.set_parent('i4x://org/course/problem/p', 'i4x://org/course/sequential/seq')
+        for index in range(10):
+            self.tree.set_parent('i4x://org/course/html/h{}'.format(index), 'i4x://org/course/sequential/seq')
+
+    def test_resolves_inherited_settings(self):
+        assert_equals(
+            self.tree.get('i4x://org/course/problem/p'),
+            {
+                'due': 'chapter_due',
+                'showanswer': 'always',
+                'parent': {ModuleStoreEnum.Branch.draft_preferred: 'i4x://org/course/sequential/seq'},
+            }
+        )
+        assert_is_none(self.tree.get('i4x://org/course/course/run'))
+        assert_equals(self.tree.get('i4x://org/course/problem/missing', {}), {})
+
+    def test_update_container(self):
+        assert_equals(self.tree.get('i4x://org/course/problem/p')['due'], 'chapter_due')
+        self.tree.set_container('i4x://org/course/chapter/ch', {})
+        assert_equals(self.tree.get('i4x://org/course/problem/p')['due'], 'course_due')
+
+    def test_pickle_round_trip(self):
+        pickled = pickle.dumps(self.tree, pickle.HIGHEST_PROTOCOL)
+        unpickled = pickle.loads(pickled)
+        for url in self.tree:
+            assert_equals(unpickled.get(url), self.tree.get(url))
+        assert_true(unpickled.is_container('i4x://org/course/sequential/seq'))
+
+        # the pickled tree is smaller than the dict of merged settings it replaces
+        merged = dict((url, self.tree.get(url)) for url in self.tree)
+        assert_greater(len(pickle.dumps(merged, pickle.HIGHEST_PROTOCOL)), len(pickled))
+
+    def test_unpickle_other_format_version(self):
+        with patch.object(MetadataInheritanceTree, 'FORMAT_VERSION', 0):
+            pickled = pickle.dumps(self.tree, pickle.HIGHEST_PROTOCOL)
+        assert_equals(len(pickle.loads(pickled)), 0)
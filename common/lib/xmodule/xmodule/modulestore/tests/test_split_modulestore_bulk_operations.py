@@ -665,6 +665,15 @@ class TestBulkWriteMixinOpen(TestBulkWriteMixin):
             self.structure['_id']
         )
 
+    def test_write_structure_syncs_structure_index(self):
+        # Writing a structure brings the bulk operation's index of it up to
+        # date with the blocks changed since it was indexed
+        self.structure['blocks'] = {}
+        structure_index = Mock(name='structure_index')
+        self.bulk._get_bulk_ops_record(self.course_key).structure_indexes[self.structure['_id']] = structure_index
+        self.bulk.update_structure(self.course_key, self.structure)
+        structure_index.sync.assert_called_once_with(self.structure['blocks'])
+
     def test_copy_branch_versions(self):
         # Directly updating an index so that the draft branch points to the published index
         # version should work, and should only persist a single structure
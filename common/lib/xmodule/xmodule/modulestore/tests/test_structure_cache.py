@@ -0,0 +1,103 @@
+"""
+Tests for the cache of split modulestore structures.
+"""
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache, structure_from_mongo
+
+
+class DictCache(object):
+    """
+    A stand-in for a django cache.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):  # pylint: disable=missing-docstring
+        return self.data.get(key)
+
+    def set(self, key, value):  # pylint: disable=missing-docstring
+        self.data[key] = value
+
+
+def make_structure():
+    """
+    Return a small structure, as read from the db.
+    """
+    return structure_from_mongo({
+        '_id': ObjectId(),
+        'root': ['course', 'course'],
+        'blocks': [
+            {
+                'block_type': 'course',
+                'block_id': 'course',
+                'definition': ObjectId(),
+                'fields': {'children': [['chapter', 'chapter']], 'display_name': 'Course'},
+                'edit_info': {},
+            },
+            {
+                'block_type': 'chapter',
+                'block_id': 'chapter',
+                'definition': ObjectId(),
+                'fields': {'display_name': 'Chapter'},
+                'edit_info': {},
+            },
+        ],
+    })
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests for StructureCache.
+    """
+    def assertStructuresEqual(self, expected, actual):
+        """
+        Assert that the two structures hold the same data.
+        """
+        self.assertEqual(expected['root'], actual['root'])
+        self.assertEqual(set(expected['blocks']), set(actual['blocks']))
+        for block_key, block in expected['blocks'].iteritems():
+            self.assertEqual(block.to_storable(), actual['blocks'][block_key].to_storable())
+
+    def test_local(self):
+        cache = StructureCache(max_size=1024 * 1024)
+        structure = make_structure()
+        self.assertIsNone(cache.get(structure['_id']))
+
+        cache.set(structure['_id'], structure)
+        cached = cache.get(structure['_id'])
+        self.assertStructuresEqual(structure, cached)
+
+        # Every caller gets its own copy
+        cached['blocks'].clear()
+        self.assertStructuresEqual(structure, cache.get(structure['_id']))
+
+    def test_lru_eviction(self):
+        structures = [make_structure() for __ in range(3)]
+        cache = StructureCache(max_size=1024 * 1024)
+        cache.set(structures[0]['_id'], structures[0])
+        size = cache._size  # pylint: disable=protected-access
+
+        # Room for two structures
+        cache.max_size = size * 2
+        cache.set(structures[1]['_id'], structures[1])
+        cache.get(structures[0]['_id'])
+        cache.set(structures[2]['_id'], structures[2])
+
+        self.assertIsNotNone(cache.get(structures[0]['_id']))
+        self.assertIsNone(cache.get(structures[1]['_id']))
+        self.assertIsNotNone(cache.get(structures[2]['_id']))
+
+    def test_shared(self):
+        shared_cache = DictCache()
+        structure = make_structure()
+        StructureCache(max_size=0, shared_cache=shared_cache).set(structure['_id'], structure)
+
+        cache = StructureCache(max_size=1024 * 1024, shared_cache=shared_cache)
+        self.assertStructuresEqual(structure, cache.get(structure['_id']))
+
+        # It's now in the local tier as well
+        shared_cache.data.clear()
+        self.assertStructuresEqual(structure, cache.get(structure['_id']))
@@ -0,0 +1,76 @@
+"""
+Tests for the indexes of split structures.
+"""
+import unittest
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex
+
+
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests for StructureIndex.
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.problems = [BlockKey('problem', 'problem_{}'.format(index)) for index in range(2)]
+        self.blocks = {
+            self.course: BlockData(block_type='course', fields={'children': [self.chapter]}),
+            self.chapter: BlockData(block_type='chapter', fields={'children': self.problems}),
+            self.problems[0]: BlockData(block_type='problem', fields={'display_name': 'Problem', 'tags': ['a', 'b']}),
+            self.problems[1]: BlockData(block_type='problem', fields={'display_name': 'Other', 'tags': [{'c': 1}]}),
+        }
+        self.index = StructureIndex(self.blocks)
+
+    def test_parents(self):
+        self.assertEqual(self.index.get_parents(self.course), [])
+        self.assertEqual(self.index.get_parents(self.chapter), [self.course])
+        self.assertEqual(self.index.get_parents(self.problems[1]), [self.chapter])
+
+    def test_block_types(self):
+        self.assertEqual(self.index.get_blocks_of_type('problem'), set(self.problems))
+        self.assertEqual(self.index.get_blocks_of_type('html'), set())
+
+    def test_field_values(self):
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'display_name', 'Other'), {self.problems[1]})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'tags', 'b'), {self.problems[0]})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'tags', 'c'), set())
+
+    def test_changes(self):
+        self.index.get_blocks_with_value(self.blocks, 'display_name', 'Problem')
+
+        del self.blocks[self.chapter]
+        self.index.remove_block(self.chapter)
+        del self.blocks[self.problems[0]]
+        self.index.remove_block(self.problems[0])
+        self.assertEqual(self.index.get_parents(self.problems[1]), [])
+        self.assertEqual(self.index.get_blocks_of_type('problem'), {self.problems[1]})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'display_name', 'Problem'), set())
+
+        html = BlockKey('html', 'html')
+        self.blocks[html] = BlockData(block_type='html', fields={'display_name': 'Problem'})
+        self.index.add_block(html, self.blocks[html])
+        self.assertEqual(self.index.get_blocks_of_type('html'), {html})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'display_name', 'Problem'), {html})
+
+    def test_sync(self):
+        self.index.get_blocks_with_value(self.blocks, 'display_name', 'Problem')
+
+        # change blocks in place, remove one and add another
+        self.blocks[self.chapter].fields['children'] = [self.problems[1]]
+        self.blocks[self.problems[1]].fields['display_name'] = 'Problem'
+        del self.blocks[self.problems[0]]
+        html = BlockKey('html', 'html')
+        self.blocks[html] = BlockData(block_type='html', fields={})
+        self.blocks[self.course].fields['children'].append(html)
+        self.index.sync(self.blocks)
+
+        self.assertEqual(self.index.get_parents(self.problems[0]), [])
+        self.assertEqual(self.index.get_parents(html), [self.course])
+        self.assertEqual(self.index.get_blocks_of_type('problem'), {self.problems[1]})
+        self.assertEqual(self.index.get_blocks_of_type('html'), {html})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'display_name', 'Problem'), {self.problems[1]})
+        self.assertEqual(self.index.get_blocks_with_value(self.blocks, 'display_name', 'Other'), set())
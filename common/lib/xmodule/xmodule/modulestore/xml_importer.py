@@ -22,12 +22,17 @@ Modulestore virtual   |          XML physical (draft, published)
 """
 import logging
 from abc import abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
 from path import path
 import json
 import re
+import time
 from lxml import etree
 
 from xmodule.modulestore.xml import XMLModuleStore, LibraryXMLModuleStore, ImportSystem
@@ -55,10 +60,16 @@ log = logging.getLogger(__name__)
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
-
-    remap_dict = {}
+        target_id, subpath='static', verbose=False, workers=1):
+    """
+    Import the files in the `subpath` directory of `course_data_path` into
+    `static_content_store`, as assets of `target_id`.
 
+    The files are read and saved by a pool of `workers` threads, so that
+    saving one file doesn't wait for the previous one; only the files being
+    saved are held in memory. Returns a dict mapping each file's path in
+    `subpath` to its asset key.
+    """
     # now import all static assets
     static_dir = course_data_path / subpath
     try:
@@ -75,68 +86,101 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
+    def content_paths():
+        """
+        Yield the paths of the files to import.
+        """
+        for dirname, _, filenames in os.walk(static_dir):
+            for filename in filenames:
+                content_path = os.path.join(dirname, filename)
 
-            content_path = os.path.join(dirname, filename)
+                if re.match(ASSET_IGNORE_REGEX, filename):
+                    if verbose:
+                        log.debug('skipping static content %s...', content_path)
+                    continue
 
-            if re.match(ASSET_IGNORE_REGEX, filename):
-                if verbose:
-                    log.debug('skipping static content %s...', content_path)
-                continue
+                yield content_path
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+    import_file = partial(
+        _import_static_file,
+        static_dir=static_dir,
+        static_content_store=static_content_store,
+        target_id=target_id,
+        policy=policy,
+        mimetypes_list=mimetypes_list,
+        verbose=verbose,
+    )
+    if workers > 1:
+        pool = ThreadPool(workers)
+        try:
+            imported = list(pool.imap_unordered(import_file, content_paths()))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        imported = [import_file(content_path) for content_path in content_paths()]
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
+    # store the remapping information which will be needed
+    # to subsitute in the module data
+    return dict(remapping for remapping in imported if remapping is not None)
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
-
-            policy_ele = policy.get(asset_key.path, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+def _import_static_file(content_path, static_dir, static_content_store, target_id, policy, mimetypes_list, verbose):
+    """
+    Import the file `content_path` into `static_content_store`, as described in
+    `import_static_content`. Returns its path in `static_dir` and its asset
+    key, or None if it's skipped.
+    """
+    filename = os.path.basename(content_path)
+
+    if verbose:
+        log.debug('importing static content %s...', content_path)
+
+    try:
+        with open(content_path, 'rb') as f:
+            data = f.read()
+    except IOError:
+        if filename.startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    # strip away leading path from the name
+    fullname_with_subpath = content_path.replace(static_dir, '')
+    if fullname_with_subpath.startswith('/'):
+        fullname_with_subpath = fullname_with_subpath[1:]
+    asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+
+    policy_ele = policy.get(asset_key.path, {})
+    displayname = policy_ele.get('displayname', filename)
+    locked = policy_ele.get('locked', False)
+    mime_type = policy_ele.get('contentType')
+
+    # Check extracted contentType in list of all valid mimetypes
+    if not mime_type or mime_type not in mimetypes_list:
+        mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=fullname_with_subpath, locked=locked
+    )
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+    # first let's save a thumbnail so we can get back a thumbnail location
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+    # then commit the content
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception(u'Error importing {0}, error={1}'.format(
+            fullname_with_subpath, err
+        ))
 
-    return remap_dict
+    return fullname_with_subpath, asset_key
 
 
 class ImportManager(object):
@@ -171,6 +215,11 @@ class ImportManager(object):
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_import_workers: the number of threads which import static files into static_content_store
+
+    The time taken by each phase of the import is added up in `phase_timings`,
+    a dict mapping phase name to seconds.
     """
     store_class = XMLModuleStore
 
@@ -180,7 +229,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, static_import_workers=1
     ):
         self.store = store
         self.user_id = user_id
@@ -193,17 +242,34 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
-        self.xml_module_store = self.store_class(
-            data_dir,
-            default_class=default_class,
-            source_dirs=source_dirs,
-            load_error_modules=load_error_modules,
-            xblock_mixins=store.xblock_mixins,
-            xblock_select=store.xblock_select,
-            target_course_id=target_id,
-        )
+        self.static_import_workers = static_import_workers
+        self.phase_timings = defaultdict(float)
+        with self.timed_phase('parse'):
+            self.xml_module_store = self.store_class(
+                data_dir,
+                default_class=default_class,
+                source_dirs=source_dirs,
+                load_error_modules=load_error_modules,
+                xblock_mixins=store.xblock_mixins,
+                xblock_select=store.xblock_select,
+                target_course_id=target_id,
+            )
         self.logger, self.errors = make_error_tracker()
 
+    @contextmanager
+    def timed_phase(self, phase):
+        """
+        Add the time taken by the body of the with statement to the timing of
+        the import phase `phase`.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            self.phase_timings[phase] += elapsed
+            log.info(u'Import phase %s took %.3f seconds', phase, elapsed)
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -221,7 +287,8 @@ class ImportManager(object):
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose,
+                workers=self.static_import_workers
             )
 
         elif self.verbose and not self.do_import_static:
@@ -244,7 +311,8 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose,
+                workers=self.static_import_workers
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -428,27 +496,34 @@ class ImportManager(object):
                 continue
 
             # This bulk operation wraps all the operations to populate the published branch.
+            # Stores which support bulk operations write the imported blocks out together,
+            # when it ends.
             with self.store.bulk_operations(dest_id):
                 # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
+                with self.timed_phase('courselike'):
+                    source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
                 # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                with self.timed_phase('static'):
+                    self.import_static(data_path, dest_id)
 
                 # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                with self.timed_phase('asset_metadata'):
+                    self.import_asset_metadata(data_path, dest_id)
 
                 # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                with self.timed_phase('children'):
+                    self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
-            with self.store.bulk_operations(dest_id):
-                # Import all draft items into the courselike.
-                courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+            with self.timed_phase('drafts'):
+                with self.store.bulk_operations(dest_id):
+                    # Import all draft items into the courselike.
+                    courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
             yield courselike
 
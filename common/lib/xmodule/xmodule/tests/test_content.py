@@ -164,6 +164,14 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test StaticContent stream_data_in_range function, asserts that we get exactly the requested bytes
+        """
+        static_content = StaticContent('loc', 'name', 'type', SAMPLE_STRING, length=len(SAMPLE_STRING))
+        data = ''.join(static_content.stream_data_in_range(100, 1500))
+        self.assertEqual(data, SAMPLE_STRING[100:1501])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -132,6 +132,40 @@ class InheritingFieldDataTest(unittest.TestCase):
         child.parent = "parent"
         self.assertEqual(child.not_inherited, "nothing")
 
+    def test_inherited_value_memoized(self):
+        # Resolving a value on one block memoizes it for its ancestors too.
+        grandparent = self.get_a_block(usage_id="grandparent")
+        grandparent.inherited = "Changed!"
+        parent = self.get_a_block(usage_id="parent")
+        parent.parent = "grandparent"
+        for child_num in range(3):
+            child = self.get_a_block(usage_id="child_{}".format(child_num))
+            child.parent = "parent"
+
+        cache = self.field_data.inheritance_cache
+        self.assertEqual(self.all_blocks["child_0"].inherited, "Changed!")
+        hits = cache.hits
+        self.assertEqual(self.all_blocks["child_1"].inherited, "Changed!")
+        self.assertEqual(self.all_blocks["child_2"].inherited, "Changed!")
+        self.assertEqual(self.all_blocks["parent"].inherited, "Changed!")
+        self.assertEqual(cache.hits, hits + 3)
+
+    def test_memoized_value_invalidated(self):
+        # Changing an ancestor's value is seen by its descendants.
+        grandparent = self.get_a_block(usage_id="grandparent")
+        grandparent.inherited = "Changed!"
+        parent = self.get_a_block(usage_id="parent")
+        parent.parent = "grandparent"
+        child = self.get_a_block(usage_id="child")
+        child.parent = "parent"
+        self.assertEqual(child.inherited, "Changed!")
+
+        grandparent.inherited = "Changed again!"
+        grandparent.save()
+        other_child = self.get_a_block(usage_id="other_child")
+        other_child.parent = "parent"
+        self.assertEqual(other_child.inherited, "Changed again!")
+
 
 class EditableMetadataFieldsTest(unittest.TestCase):
     def test_display_name_field(self):
@@ -0,0 +1,77 @@
+"""
+A rate limiter for sending bulk email, shared by all the subtasks sending
+email, in all processes, through the cache.
+"""
+import logging
+from time import sleep, time
+
+from django.core.cache import cache
+
+log = logging.getLogger('edx.celery.task')
+
+
+class SendRateLimiter(object):
+    """
+    Limits the rate at which messages are sent, across processes, to a
+    number of messages per second which adapts to the mail server.
+
+    The limit works like a token bucket refilled every second: the messages
+    sent in each second are counted in the cache, and senders wait for the
+    next second once the count is over the rate. The rate is kept in the cache
+    too: it's halved (down to `min_rate`) each time the mail server throttles
+    a sender, and grows back by one message per second (up to `max_rate`)
+    every second from then on. A rate left unchanged for RATE_TIMEOUT seconds
+    is forgotten, going back to `max_rate`.
+    """
+    RATE_TIMEOUT = 60 * 60
+
+    def __init__(self, max_rate, min_rate=1, key_prefix='bulk_email.send_rate'):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.key_prefix = key_prefix
+        self.rate_key = u'{0}.rate'.format(key_prefix)
+
+    @property
+    def rate(self):
+        """
+        The current number of messages which may be sent per second.
+        """
+        return cache.get(self.rate_key) or self.max_rate
+
+    def acquire(self):
+        """
+        Wait until a message may be sent. Returns the number of seconds waited.
+        """
+        waited = 0.0
+        while True:
+            now = time()
+            second = int(now)
+            count_key = u'{0}.count.{1}'.format(self.key_prefix, second)
+            cache.add(count_key, 0, 60)
+            try:
+                count = cache.incr(count_key)
+            except ValueError:
+                # The count expired in between; don't hold up the sender for it
+                return waited
+            if count <= self.rate:
+                self._recover(second)
+                return waited
+            delay = second + 1 - now
+            sleep(delay)
+            waited += delay
+
+    def throttled(self):
+        """
+        Record that the mail server throttled a sender, halving the rate.
+        """
+        rate = max(self.min_rate, self.rate // 2)
+        cache.set(self.rate_key, rate, self.RATE_TIMEOUT)
+        log.warning(u'BulkEmail ==> Throttled by the mail server, sending at most %s messages per second', rate)
+
+    def _recover(self, second):
+        """
+        Grow the rate by one, once per `second`.
+        """
+        rate = self.rate
+        if rate < self.max_rate and cache.add(u'{0}.recovered.{1}'.format(self.key_prefix, second), True, 60):
+            cache.set(self.rate_key, rate + 1, self.RATE_TIMEOUT)
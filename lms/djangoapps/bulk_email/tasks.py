@@ -5,7 +5,7 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+from time import sleep, time
 from collections import Counter
 import logging
 
@@ -38,6 +38,7 @@ from bulk_email.models import (
     SEND_TO_MYSELF, SEND_TO_ALL, TO_OPTIONS,
     SEND_TO_STAFF,
 )
+from bulk_email.rate_limit import SendRateLimiter
 from courseware.courses import get_course, course_image_url
 from student.roles import CourseStaffRole, CourseInstructorRole
 from instructor_task.models import InstructorTask
@@ -482,16 +483,23 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    rate_limiter = _get_rate_limiter()
+    throughput = Counter()
+    start_time = time()
     try:
         connection = get_connection()
         connection.open()
 
         # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
+        email_context = {'course_id': course_email.course_id}
         email_context.update(global_email_context)
 
+        # Render the messages once, leaving only the user-specific values to fill in per recipient:
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
+
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
+            # Fill in the messages with user-specific values from the user at the end of the list.
             # At the end of processing this user, they will be popped off of the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
@@ -499,14 +507,11 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             recipient_num += 1
             current_recipient = to_list[-1]
             email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
 
             # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            name, user_id = current_recipient['profile__name'], current_recipient['pk']
+            plaintext_msg = plaintext_template.render(name, email, user_id)
+            html_msg = html_template.render(name, email, user_id)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -518,12 +523,12 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             )
             email_msg.attach_alternative(html_msg, 'text/html')
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
+            # Without a shared rate limiter, throttle if we have gotten the rate limiter.
+            # This is not very high-tech, but if a task has been retried for rate-limiting
+            # reasons, then we sleep for a period of time between all emails within this task.
+            # Choice of the value depends on the number of workers that might be sending email
+            # in parallel, and what the SES throttle rate is.
+            if rate_limiter is None and subtask_status.retried_nomax > 0:
                 sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
 
             try:
@@ -539,7 +544,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     email
                 )
                 with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
+                    _send_message(connection, email_msg, rate_limiter, throughput, course_title)
 
             except SMTPDataError as exc:
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
@@ -608,6 +613,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                 else:
                     log.debug('Email with id %s sent to %s', email_id, email)
                 subtask_status.increment(succeeded=1)
+                throughput['sent'] += 1
 
             # Pop the user that was emailed off the end of the list only once they have
             # successfully been processed.  (That way, if there were a failure that
@@ -693,6 +699,78 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     finally:
         # Clean up at the end.
         connection.close()
+        _record_throughput(parent_task_id, task_id, email_id, course_title, throughput, time() - start_time)
+
+
+def _get_rate_limiter():
+    """
+    Returns the SendRateLimiter shared by all subtasks, or None if the rate
+    of sending email isn't limited.
+    """
+    if not settings.BULK_EMAIL_MAX_SEND_RATE:
+        return None
+    return SendRateLimiter(settings.BULK_EMAIL_MAX_SEND_RATE, settings.BULK_EMAIL_MIN_SEND_RATE)
+
+
+def _is_throttling_error(exc):
+    """
+    Returns whether `exc`, raised when sending a message, means that the mail
+    server is throttling us: a 4xx SMTPDataError, or SES's sending rate error.
+    """
+    if isinstance(exc, SMTPDataError):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, SESMaxSendingRateExceededError)
+
+
+def _send_message(connection, email_msg, rate_limiter, throughput, course_title):
+    """
+    Send `email_msg` over `connection`, at the rate allowed by `rate_limiter`
+    (if any), adding to the counts in `throughput`.
+
+    With a rate limiter, if the mail server throttles us, slow down and send
+    the message again, up to settings.BULK_EMAIL_MAX_THROTTLED_SENDS times.
+    The throttling error is raised after that, or at once without a rate
+    limiter, so that the whole subtask gets retried later.
+    """
+    if rate_limiter is None:
+        connection.send_messages([email_msg])
+        return
+
+    attempts = 0
+    while True:
+        throughput['rate_limit_wait'] += rate_limiter.acquire()
+        try:
+            connection.send_messages([email_msg])
+            return
+        except INFINITE_RETRY_ERRORS as exc:
+            attempts += 1
+            if not _is_throttling_error(exc) or attempts >= settings.BULK_EMAIL_MAX_THROTTLED_SENDS:
+                raise
+            dog_stats_api.increment('course_email.throttled', tags=[_statsd_tag(course_title)])
+            throughput['throttled'] += 1
+            rate_limiter.throttled()
+
+
+def _record_throughput(parent_task_id, task_id, email_id, course_title, throughput, duration):
+    """
+    Log and report the throughput of a subtask, which sent email for `duration` seconds.
+    """
+    rate = throughput['sent'] / duration if duration > 0 else 0.0
+    tags = [_statsd_tag(course_title)]
+    dog_stats_api.histogram('course_email.subtask.messages_per_second', rate, tags=tags)
+    dog_stats_api.histogram('course_email.subtask.rate_limit_wait', throughput['rate_limit_wait'], tags=tags)
+    log.info(
+        "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Sent %s emails in %.2fs (%.1f/s), \
+        waited %.2fs for the rate limiter, throttled %s times",
+        parent_task_id,
+        task_id,
+        email_id,
+        throughput['sent'],
+        duration,
+        rate,
+        throughput['rate_limit_wait'],
+        throughput['throttled'],
+    )
 
 
 def _get_current_task():
@@ -137,6 +137,53 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def assert_compiled_renders_same(self, template, body, context):
+        """
+        Check that the compiled messages render as the messages rendered in full do.
+        """
+        recipients = [
+            (u'Ann Onymous', u'ann@test.com', 1),
+            (u'B\u00e9a ' + u'x' * 2000, u'bea@test.com', 2),
+        ]
+        compiled_plain = template.compile_plaintext(body, context)
+        compiled_html = template.compile_htmltext(body, context)
+        for name, email, user_id in recipients:
+            user_context = dict(context, name=name, email=email, user_id=user_id)
+            self.assertEqual(
+                compiled_plain.render(name, email, user_id), template.render_plaintext(body, user_context)
+            )
+            self.assertEqual(
+                compiled_html.render(name, email, user_id), template.render_htmltext(body, user_context)
+            )
+
+    def test_compiled_render(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['email']
+        context['course_id'] = SlashSeparatedCourseKey('abc', '123', 'doremi')
+        context['course_end_date'] = 'the end'
+        body = u"Dear %%USER_FULLNAME%%,\n%%COURSE_DISPLAY_NAME%% ends on %%COURSE_END_DATE%%.\n" + u"y " * 1000
+
+        self.assert_compiled_renders_same(template, body, context)
+
+    @patch('bulk_email.models.anonymous_id_from_user_id', Mock(side_effect=lambda user_id: u'anon{}'.format(user_id)))
+    def test_compiled_render_anonymous_id(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['email']
+        context['course_id'] = SlashSeparatedCourseKey('abc', '123', 'doremi')
+
+        anonymous_id = Mock(side_effect=lambda user_id: u'anon{}'.format(user_id))
+        with patch('util.keyword_substitution.anonymous_id_from_user_id', anonymous_id):
+            self.assert_compiled_renders_same(template, u"Your id is %%USER_ID%%.", context)
+
+    def test_compiled_render_formatted_slot(self):
+        template = CourseEmailTemplate(
+            plain_template=u"To {name!r} at {email:>30}\n{{message_body}}",
+            html_template=u"<p>To {name} at {email}</p>{{message_body}}",
+        )
+        self.assert_compiled_renders_same(template, u"Hello", {})
+
 
 @attr('shard_1')
 class CourseAuthorizationTest(TestCase):
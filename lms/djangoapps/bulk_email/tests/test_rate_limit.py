@@ -0,0 +1,68 @@
+"""
+Unit tests for the bulk email rate limiter.
+"""
+from uuid import uuid4
+
+from django.test import TestCase
+from mock import patch
+
+from bulk_email.rate_limit import SendRateLimiter
+
+
+class FakeClock(object):
+    """A clock which only moves when slept on."""
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):  # pylint: disable=missing-docstring
+        return self.now
+
+    def sleep(self, seconds):  # pylint: disable=missing-docstring
+        self.now += seconds
+
+
+class SendRateLimiterTest(TestCase):
+    """Test the SendRateLimiter."""
+
+    def setUp(self):
+        super(SendRateLimiterTest, self).setUp()
+        self.clock = FakeClock()
+        for name in ('time', 'sleep'):
+            patcher = patch('bulk_email.rate_limit.{}'.format(name), getattr(self.clock, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def limiter(self, max_rate, min_rate=1):
+        """A limiter with its own cache keys."""
+        return SendRateLimiter(max_rate, min_rate, key_prefix=uuid4().hex)
+
+    def test_limits_rate(self):
+        limiter = self.limiter(3)
+        waits = [limiter.acquire() for __ in range(7)]
+
+        self.assertEqual(waits, [0, 0, 0, 1.0, 0, 0, 1.0])
+        self.assertEqual(self.clock.now, 1002.0)
+
+    def test_shared_between_limiters(self):
+        limiter = self.limiter(2)
+        other_limiter = SendRateLimiter(2, key_prefix=limiter.key_prefix)
+        limiter.acquire()
+        other_limiter.acquire()
+
+        self.assertEqual(limiter.acquire(), 1.0)
+
+    def test_throttled(self):
+        limiter = self.limiter(8, min_rate=3)
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 4)
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 3)
+
+    def test_recovers(self):
+        limiter = self.limiter(8)
+        limiter.throttled()
+        for __ in range(3):
+            limiter.acquire()
+            self.clock.sleep(1)
+
+        self.assertEqual(limiter.rate, 7)
@@ -0,0 +1,147 @@
+"""
+Performance test of sending bulk email through a local SMTP server.
+"""
+import asyncore
+import json
+import smtpd
+import threading
+import unittest
+from time import time
+from uuid import uuid4
+
+import ddt
+#from nose.plugins.attrib import attr
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from bulk_email.models import CourseEmail, SEND_TO_ALL
+from instructor_task.models import InstructorTask
+from instructor_task.tasks import send_bulk_course_email
+from instructor_task.tests.factories import InstructorTaskFactory
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase
+
+# Numbers of students emailed per test run.
+NUM_STUDENTS = (100, 1000)
+
+# Send rate limits (in messages per second) per test run, or None for no limit.
+MAX_SEND_RATES = (None, 50)
+
+# The stub server throttles every Nth message per test run, or none if 0.
+THROTTLE_EVERY = (0, 20)
+
+
+class StubSMTPServer(smtpd.SMTPServer):
+    """
+    An SMTP server which counts the messages it receives, and answers every
+    `throttle_every`th message with a 4xx throttling response, if set.
+    """
+    def __init__(self, throttle_every=0):
+        smtpd.SMTPServer.__init__(self, ('127.0.0.1', 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.throttle_every = throttle_every
+        self.received = 0
+        self.throttled = 0
+        self.stopped = threading.Event()
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        if self.throttle_every and (self.received + self.throttled + 1) % self.throttle_every == 0:
+            self.throttled += 1
+            return '451 Too many messages, slow down'
+        self.received += 1
+
+    def serve(self):
+        """
+        Handle connections until `stop` is called, then close them all.
+        """
+        while not self.stopped.is_set():
+            asyncore.loop(timeout=0.1, count=1, map=self._map)
+        asyncore.close_all(self._map)
+
+    def start(self):
+        """
+        Start serving in a daemon thread.
+        """
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop serving, and wait until the server is closed.
+        """
+        self.stopped.set()
+        self.thread.join()
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+@ddt.ddt
+class BulkEmailSendTest(InstructorTaskCourseTestCase):
+    """
+    This class exists to time sending a course email to all of a course's
+    students through a local SMTP server, with and without a send rate limit
+    and with a server that throttles us.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(BulkEmailSendTest, self).setUp()
+        self.initialize_course()
+        self.instructor = self.create_instructor('instructor')
+        call_command("loaddata", "course_email_template.json")
+
+    @ddt.data(*[
+        (num_students, max_send_rate, throttle_every)
+        for num_students in NUM_STUDENTS
+        for max_send_rate in MAX_SEND_RATES
+        for throttle_every in THROTTLE_EVERY
+    ])
+    @ddt.unpack
+    def test_generate_send_timings(self, num_students, max_send_rate, throttle_every):
+        """
+        Generate the timing of sending a course email to `num_students` students.
+        """
+        for i in xrange(num_students - 1):
+            self.create_student('robot%d' % i)
+
+        course_email = CourseEmail.create(
+            self.course.id, self.instructor, SEND_TO_ALL, "Test Subject", "<p>This is a test message</p>"
+        )
+        task_entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            requester=self.instructor,
+            task_input=json.dumps({'email_id': course_email.id}),  # pylint: disable=no-member
+            task_key='dummy value',
+            task_id=str(uuid4()),
+        )
+
+        server = StubSMTPServer(throttle_every)
+        server.start()
+        desc = "BulkEmailSend:{}:{}:{}".format(num_students, max_send_rate, throttle_every)
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=server.port,
+                EMAIL_HOST_USER='',
+                EMAIL_HOST_PASSWORD='',
+                EMAIL_USE_TLS=False,
+                BULK_EMAIL_MAX_SEND_RATE=max_send_rate,
+            ):
+                start = time()
+                send_bulk_course_email.apply([task_entry.id, {}], task_id=task_entry.task_id).get()
+                duration = time() - start
+        finally:
+            server.stop()
+
+        status = json.loads(InstructorTask.objects.get(id=task_entry.id).task_output)
+        self.assertEqual(status['succeeded'], num_students)
+        self.assertEqual(server.received, num_students)
+        print "{} - sent {} emails in {:.3f}s ({:.1f}/s), throttled {} times".format(
+            desc, server.received, duration, server.received / duration, server.throttled
+        )
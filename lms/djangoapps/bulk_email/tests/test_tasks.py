@@ -28,6 +28,7 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
 
@@ -355,6 +356,7 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle(
                 chain(repeat(exception, expected_retries), [None])
             )
+            # Without a rate limiter, every throttling error retries the task.
             self._test_run_with_task(
                 send_bulk_course_email,
                 'emailed',
@@ -370,6 +372,50 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
     def test_retry_after_ses_throttling_error(self):
         self._test_retry_after_unlimited_retry_error(SESMaxSendingRateExceededError(455, "Throttling: Sending rate exceeded"))
 
+    @override_settings(BULK_EMAIL_MAX_SEND_RATE=4, BULK_EMAIL_MIN_SEND_RATE=1)
+    def _test_send_again_after_throttling_error(self, exception):
+        """
+        Test that with a rate limiter, messages throttled a few times are sent
+        again, without retrying the task.
+        """
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle(
+                chain(repeat(exception, settings.BULK_EMAIL_MAX_THROTTLED_SENDS - 1), [None])
+            )
+            with patch('bulk_email.tasks.SendRateLimiter.acquire', return_value=0):
+                with patch('bulk_email.tasks.SendRateLimiter.throttled'):
+                    self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(
+            get_conn.return_value.send_messages.call_count,
+            num_emails * settings.BULK_EMAIL_MAX_THROTTLED_SENDS
+        )
+
+    def test_send_again_after_smtp_throttling_error(self):
+        self._test_send_again_after_throttling_error(SMTPDataError(455, "Throttling: Sending rate exceeded"))
+
+    def test_send_again_after_ses_throttling_error(self):
+        self._test_send_again_after_throttling_error(
+            SESMaxSendingRateExceededError(455, "Throttling: Sending rate exceeded")
+        )
+
+    @override_settings(BULK_EMAIL_MAX_SEND_RATE=4, BULK_EMAIL_MIN_SEND_RATE=1)
+    def test_shared_rate_limiter(self):
+        num_emails = 8
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle(
+                [SMTPDataError(455, "Throttling: Sending rate exceeded"), None]
+            )
+            with patch('bulk_email.tasks.SendRateLimiter.acquire', return_value=0.5) as acquire:
+                with patch('bulk_email.tasks.SendRateLimiter.throttled') as throttled:
+                    self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(acquire.call_count, num_emails * 2)
+        self.assertEquals(throttled.call_count, num_emails)
+
     def _test_immediate_failure(self, exception):
         """Test that celery can hit a maximum number of retries."""
         # Doesn't really matter how many recipients, since we expect
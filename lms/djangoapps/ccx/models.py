@@ -3,6 +3,7 @@ Models for the custom course feature
 """
 from datetime import datetime
 import logging
+from uuid import uuid4
 
 from django.contrib.auth.models import User
 from django.db import models
@@ -18,6 +19,13 @@ from xmodule.modulestore.django import modulestore
 log = logging.getLogger("edx.ccx")
 
 
+def make_overrides_version():
+    """
+    Return a new, unique, version stamp for the field overrides of a CCX.
+    """
+    return uuid4().hex
+
+
 class CustomCourseForEdX(models.Model):
     """
     A Custom Course.
@@ -25,6 +33,9 @@ class CustomCourseForEdX(models.Model):
     course_id = CourseKeyField(max_length=255, db_index=True)
     display_name = models.CharField(max_length=255)
     coach = models.ForeignKey(User, db_index=True)
+    # Changed whenever the CCX's field overrides change, so that caches of
+    # its overrides can be keyed by it
+    overrides_version = models.CharField(max_length=32, default=make_overrides_version)
 
     @lazy
     def course(self):
@@ -7,12 +7,13 @@ import threading
 
 from contextlib import contextmanager
 
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
 
-from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
+from courseware.field_overrides import FieldOverrideProvider, overrides_changed  # pylint: disable=import-error
 from ccx import ACTIVE_CCX_KEY  # pylint: disable=import-error
 
-from .models import CcxMembership, CcxFieldOverride
+from .models import CcxMembership, CcxFieldOverride, CustomCourseForEdX, make_overrides_version
 
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
@@ -30,6 +31,15 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             return get_override_for_ccx(ccx, block, name, default)
         return default
 
+    def get_overrides(self, block):
+        """
+        Return all of the block's overrides in the current ccx, if there is one
+        """
+        ccx = get_current_ccx()
+        if ccx:
+            return _get_block_overrides(ccx, block)
+        return {}
+
 
 class _CcxContext(threading.local):
     """
@@ -53,8 +63,12 @@ def ccx_context(ccx):
     """
     prev = _CCX_CONTEXT.ccx
     _CCX_CONTEXT.ccx = ccx
+    if ccx is not prev:
+        overrides_changed()
     yield
     _CCX_CONTEXT.ccx = prev
+    if ccx is not prev:
+        overrides_changed()
 
 
 def get_current_ccx():
@@ -79,32 +93,79 @@ def get_override_for_ccx(ccx, block, name, default=None):
     specify the block and the name of the field.  If the field is not
     overridden for the given ccx, returns `default`.
     """
+    return _get_block_overrides(ccx, block).get(name, default)
+
+
+def _get_block_overrides(ccx, block):
+    """
+    Returns a dictionary mapping field name to overriden value for any
+    overrides set on this block for this CCX, kept on the block until the
+    CCX's overrides change.
+    """
     if not hasattr(block, '_ccx_overrides'):
         block._ccx_overrides = {}  # pylint: disable=protected-access
-    overrides = block._ccx_overrides.get(ccx.id)  # pylint: disable=protected-access
-    if overrides is None:
-        overrides = _get_overrides_for_ccx(ccx, block)
-        block._ccx_overrides[ccx.id] = overrides  # pylint: disable=protected-access
-    return overrides.get(name, default)
+    version, overrides = block._ccx_overrides.get(ccx.id, (None, None))  # pylint: disable=protected-access
+    if version != ccx.overrides_version:
+        overrides = _get_overrides_for_block(ccx, block)
+        block._ccx_overrides[ccx.id] = (ccx.overrides_version, overrides)  # pylint: disable=protected-access
+    return overrides
 
 
-def _get_overrides_for_ccx(ccx, block):
+def _get_overrides_for_block(ccx, block):
     """
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
     """
     overrides = {}
-    query = CcxFieldOverride.objects.filter(
-        ccx=ccx,
-        location=block.location
-    )
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    serialized = _get_overrides_for_ccx(ccx).get(_location_key(block.location), {})
+    for name, value in serialized.iteritems():
+        overrides[name] = block.fields[name].from_json(json.loads(value))
+    return overrides
+
+
+def _get_overrides_for_ccx(ccx):
+    """
+    Returns a dictionary mapping location (as given by `_location_key`) to a
+    dictionary mapping field name to the JSON serialized override, for all of
+    the overrides set in this CCX.
+
+    The overrides are all loaded with one query, and cached for the current
+    version of the CCX's overrides, on the CCX object and across requests.
+    """
+    version, overrides = getattr(ccx, '_overrides', (None, None))
+    if version == ccx.overrides_version:
+        return overrides
+
+    cache_key = u'ccx.overrides.{}.{}'.format(ccx.id, ccx.overrides_version)
+    overrides = cache.get(cache_key)
+    if overrides is None:
+        overrides = {}
+        query = CcxFieldOverride.objects.filter(ccx=ccx).values_list('location', 'field', 'value')
+        for location, field, value in query:
+            overrides.setdefault(unicode(location), {})[field] = value
+        cache.set(cache_key, overrides)
+    ccx._overrides = (ccx.overrides_version, overrides)  # pylint: disable=protected-access
     return overrides
 
 
+def _location_key(location):
+    """
+    Returns the key of `location` in the overrides returned by
+    `_get_overrides_for_ccx`: the location as it's stored in the database.
+    """
+    return CcxFieldOverride._meta.get_field('location').get_prep_value(location)  # pylint: disable=protected-access
+
+
+def _bump_overrides_version(ccx):
+    """
+    Gives the overrides of `ccx` a new version, so that cached overrides are
+    no longer used.
+    """
+    ccx.overrides_version = make_overrides_version()
+    CustomCourseForEdX.objects.filter(id=ccx.id).update(overrides_version=ccx.overrides_version)
+    overrides_changed()
+
+
 @transaction.commit_on_success
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -115,7 +176,7 @@ def override_field_for_ccx(ccx, block, name, value):
     field = block.fields[name]
     value = json.dumps(field.to_json(value))
     try:
-        override = CcxFieldOverride.objects.create(
+        CcxFieldOverride.objects.create(
             ccx=ccx,
             location=block.location,
             field=name,
@@ -127,9 +188,8 @@ def override_field_for_ccx(ccx, block, name, value):
             location=block.location,
             field=name)
         override.value = value
-    override.save()
-    if hasattr(block, '_ccx_overrides'):
-        del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
+        override.save()
+    _bump_overrides_version(ccx)
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -145,8 +205,7 @@ def clear_override_for_ccx(ccx, block, name):
             location=block.location,
             field=name).delete()
 
-        if hasattr(block, '_ccx_overrides'):
-            del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
+        _bump_overrides_version(ccx)
 
     except CcxFieldOverride.DoesNotExist:
         pass
@@ -13,7 +13,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from ..models import CustomCourseForEdX
-from ..overrides import override_field_for_ccx
+from ..overrides import clear_override_for_ccx, get_override_for_ccx, override_field_for_ccx
 
 from .test_views import flatten, iter_blocks
 
@@ -91,7 +91,7 @@ class TestFieldOverrides(ModuleStoreTestCase):
         """
         ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
         chapter = self.course.get_children()[0]
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(3):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
             dummy = chapter.start
 
@@ -101,7 +101,7 @@ class TestFieldOverrides(ModuleStoreTestCase):
         """
         ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
         chapter = self.course.get_children()[0]
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(3):
             override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
             dummy1 = chapter.start
             dummy2 = chapter.start
@@ -129,3 +129,36 @@ class TestFieldOverrides(ModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    def test_overrides_loaded_in_one_query(self):
+        """
+        Test that the overrides of all blocks are loaded with one query.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.course.get_children()
+        for chapter in chapters:
+            override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        with self.assertNumQueries(1):
+            for chapter in chapters:
+                self.assertEqual(chapter.start, ccx_start)
+                self.assertEqual(chapter.get_children()[0].start, ccx_start)
+
+    def test_overrides_cached_across_requests(self):
+        """
+        Test that another request, with its own copy of the CCX, uses the
+        cached overrides until they change.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+        ccx = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        sequential = chapter.get_children()[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(get_override_for_ccx(ccx, chapter, 'start'), ccx_start)
+            self.assertIsNone(get_override_for_ccx(ccx, sequential, 'start'))
+
+        clear_override_for_ccx(ccx, chapter, 'start')
+        ccx = CustomCourseForEdX.objects.get(id=self.ccx.id)
+        self.assertIsNone(get_override_for_ccx(ccx, chapter, 'start'))
@@ -174,22 +174,69 @@ def certificate_status_for_student(student, course_id):
     try:
         generated_certificate = GeneratedCertificate.objects.get(
             user=student, course_id=course_id)
-        d = {'status': generated_certificate.status,
-             'mode': generated_certificate.mode}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
+        return _certificate_status(generated_certificate)
     except GeneratedCertificate.DoesNotExist:
         pass
     return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
 
 
-def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
+def certificate_statuses_for_students(user_ids, course_id):
+    """
+    Bulk version of `certificate_status_for_student`.
+
+    Returns a dict mapping each of `user_ids` to the dictionary that
+    `certificate_status_for_student` would return for that user, using a
+    single query.
+    """
+    statuses = {
+        user_id: {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+        for user_id in user_ids
+    }
+    generated_certificates = GeneratedCertificate.objects.filter(user__in=user_ids, course_id=course_id)
+    for generated_certificate in generated_certificates:
+        statuses[generated_certificate.user_id] = _certificate_status(generated_certificate)
+    return statuses
+
+
+def certificate_statuses_for_courses(student, course_ids):
+    """
+    Bulk version of `certificate_status_for_student`.
+
+    Returns a dict mapping each of `course_ids` to the dictionary that
+    `certificate_status_for_student` would return for that course, using a
+    single query.
+    """
+    statuses = {
+        course_id: {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+        for course_id in course_ids
+    }
+    generated_certificates = GeneratedCertificate.objects.filter(user=student, course_id__in=course_ids)
+    for generated_certificate in generated_certificates:
+        statuses[generated_certificate.course_id] = _certificate_status(generated_certificate)
+    return statuses
+
+
+def _certificate_status(generated_certificate):
+    """
+    Build the status dictionary described in `certificate_status_for_student`
+    from a GeneratedCertificate.
+    """
+    d = {'status': generated_certificate.status,
+         'mode': generated_certificate.mode}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+
+    return d
+
+
+def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None, certificate_status=None):
     """
     Returns the certificate info for a user for grade report.
+
+    `certificate_status` may be passed in (in the format returned by
+    `certificate_status_for_student`) when it has already been loaded.
     """
     if user_is_whitelisted is None:
         user_is_whitelisted = CertificateWhitelist.objects.filter(
@@ -201,7 +248,8 @@ def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
     if eligible_for_certificate:
         user_is_eligible = 'Y'
 
-        certificate_status = certificate_status_for_student(user, course_id)
+        if certificate_status is None:
+            certificate_status = certificate_status_for_student(user, course_id)
         certificate_generated = certificate_status['status'] == CertificateStatuses.downloadable
         certificate_is_delivered = 'Y' if certificate_generated else 'N'
 
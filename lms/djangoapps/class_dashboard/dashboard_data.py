@@ -2,6 +2,7 @@
 Computes the data to display on the Instructor Dashboard
 """
 from util.json_request import JsonResponse
+from util.query import use_read_replica_if_available
 import json
 
 from courseware import models
@@ -11,6 +12,7 @@ from django.utils.translation import ugettext as _
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.inheritance import own_metadata
 from instructor_analytics.csvs import create_csv_response
+from class_dashboard.models import ProblemGradeCount, SequentialOpenCount, aggregates_enabled
 
 from opaque_keys.edx.locations import Location
 
@@ -18,6 +20,34 @@ from opaque_keys.edx.locations import Location
 MAX_SCREEN_LIST_LENGTH = 250
 
 
+def _usage_key(course_id, module_state_key):
+    """
+    Returns the usage key in the course `course_id` of `module_state_key`,
+    either a StudentModule's module_id column or a key read from the counts.
+    """
+    if isinstance(module_state_key, basestring):
+        return course_id.make_usage_key_from_deprecated_string(module_state_key)
+    return module_state_key.map_into_course(course_id)
+
+
+def _problem_grade_counts(course_id, problem_set=None):
+    """
+    Returns the stored grade counts of the problems of the course `course_id`
+    (or just of those in `problem_set`), as rows like those of the
+    StudentModule aggregate queries, ordered by problem and grade.
+    """
+    counts = ProblemGradeCount.counts_for_course(course_id)
+    if problem_set is not None:
+        counts = counts.filter(module_state_key__in=problem_set)
+    for count in counts.order_by('module_state_key', 'grade').iterator():
+        yield {
+            'module_state_key': count.module_state_key,
+            'grade': count.grade,
+            'max_grade': None if count.max_grade == ProblemGradeCount.NO_MAX_GRADE else count.max_grade,
+            'count_grade': count.count,
+        }
+
+
 def get_problem_grade_distribution(course_id):
     """
     Returns the grade distribution per problem for the course
@@ -30,21 +60,26 @@ def get_problem_grade_distribution(course_id):
         'grade_distrib' - array of tuples (`grade`,`count`).
       'total_student_count' where the key is problem 'module_id' and the value is number of students
         attempting the problem
+
+    The grades are read from the stored ProblemGradeCounts when the ENABLE_CLASS_DASHBOARD_AGGREGATES feature is on.
     """
 
-    # Aggregate query on studentmodule table for grade data for all problems in course
-    db_query = models.StudentModule.objects.filter(
-        course_id__exact=course_id,
-        grade__isnull=False,
-        module_type__exact="problem",
-    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+    if aggregates_enabled():
+        db_query = _problem_grade_counts(course_id)
+    else:
+        # Aggregate query on studentmodule table for grade data for all problems in course
+        db_query = models.StudentModule.objects.filter(
+            course_id__exact=course_id,
+            grade__isnull=False,
+            module_type__exact="problem",
+        ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
 
     prob_grade_distrib = {}
     total_student_count = {}
 
     # Loop through resultset building data for each problem
     for row in db_query:
-        curr_problem = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
+        curr_problem = _usage_key(course_id, row['module_state_key'])
 
         # Build set of grade distributions for each problem that has student responses
         if curr_problem in prob_grade_distrib:
@@ -73,18 +108,26 @@ def get_sequential_open_distrib(course_id):
     `course_id` the course ID for the course interested in
 
     Outputs a dict mapping the 'module_id' to the number of students that have opened that subsection/sequential.
+
+    The counts are read from the stored SequentialOpenCounts when the ENABLE_CLASS_DASHBOARD_AGGREGATES feature is on.
     """
 
-    # Aggregate query on studentmodule table for "opening a subsection" data
-    db_query = models.StudentModule.objects.filter(
-        course_id__exact=course_id,
-        module_type__exact="sequential",
-    ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
+    if aggregates_enabled():
+        db_query = (
+            {'module_state_key': count.module_state_key, 'count_sequential': count.count}
+            for count in SequentialOpenCount.counts_for_course(course_id).iterator()
+        )
+    else:
+        # Aggregate query on studentmodule table for "opening a subsection" data
+        db_query = models.StudentModule.objects.filter(
+            course_id__exact=course_id,
+            module_type__exact="sequential",
+        ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
 
     # Build set of "opened" data for each subsection that has "opened" data
     sequential_open_distrib = {}
     for row in db_query:
-        row_loc = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
+        row_loc = _usage_key(course_id, row['module_state_key'])
         sequential_open_distrib[row_loc] = row['count_sequential']
 
     return sequential_open_distrib
@@ -103,25 +146,30 @@ def get_problem_set_grade_distrib(course_id, problem_set):
     Returns a dict, where the key is the problem 'module_id' and the value is a dict with two parts:
       'max_grade' - the maximum grade possible for the course
       'grade_distrib' - array of tuples (`grade`,`count`) ordered by `grade`
+
+    The grades are read from the stored ProblemGradeCounts when the ENABLE_CLASS_DASHBOARD_AGGREGATES feature is on.
     """
 
-    # Aggregate query on studentmodule table for grade data for set of problems in course
-    db_query = models.StudentModule.objects.filter(
-        course_id__exact=course_id,
-        grade__isnull=False,
-        module_type__exact="problem",
-        module_state_key__in=problem_set,
-    ).values(
-        'module_state_key',
-        'grade',
-        'max_grade',
-    ).annotate(count_grade=Count('grade')).order_by('module_state_key', 'grade')
+    if aggregates_enabled():
+        db_query = _problem_grade_counts(course_id, problem_set)
+    else:
+        # Aggregate query on studentmodule table for grade data for set of problems in course
+        db_query = models.StudentModule.objects.filter(
+            course_id__exact=course_id,
+            grade__isnull=False,
+            module_type__exact="problem",
+            module_state_key__in=problem_set,
+        ).values(
+            'module_state_key',
+            'grade',
+            'max_grade',
+        ).annotate(count_grade=Count('grade')).order_by('module_state_key', 'grade')
 
     prob_grade_distrib = {}
 
     # Loop through resultset building data for each problem
     for row in db_query:
-        row_loc = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
+        row_loc = _usage_key(course_id, row['module_state_key'])
         if row_loc not in prob_grade_distrib:
             prob_grade_distrib[row_loc] = {
                 'max_grade': 0,
@@ -438,10 +486,10 @@ def get_students_opened_subsection(request, csv=False):
     csv = request.GET.get('csv')
 
     # Query for "opened a subsection" students
-    students = models.StudentModule.objects.select_related('student').filter(
+    students = use_read_replica_if_available(models.StudentModule.objects.select_related('student').filter(
         module_state_key__exact=module_state_key,
         module_type__exact='sequential',
-    ).values('student__username', 'student__profile__name').order_by('student__profile__name')
+    ).values('student__username', 'student__profile__name').order_by('student__profile__name'))
 
     results = []
     if not csv:
@@ -490,11 +538,11 @@ def get_students_problem_grades(request, csv=False):
     csv = request.GET.get('csv')
 
     # Query for "problem grades" students
-    students = models.StudentModule.objects.select_related('student').filter(
+    students = use_read_replica_if_available(models.StudentModule.objects.select_related('student').filter(
         module_state_key=module_state_key,
         module_type__exact='problem',
         grade__isnull=False,
-    ).values('student__username', 'student__profile__name', 'grade', 'max_grade').order_by('student__profile__name')
+    ).values('student__username', 'student__profile__name', 'grade', 'max_grade').order_by('student__profile__name'))
 
     results = []
     if not csv:
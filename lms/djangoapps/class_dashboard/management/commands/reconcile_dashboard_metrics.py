@@ -0,0 +1,52 @@
+"""
+Reconcile the stored class dashboard metrics of courses with students' module state.
+"""
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from class_dashboard.models import ProblemGradeCount, SequentialOpenCount
+from xmodule.modulestore.django import modulestore
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Replace the problem grade and subsection open counts of courses by those
+    aggregated from their StudentModules, on the read replica if there is one.
+
+    Run this for all courses when turning on the
+    ENABLE_CLASS_DASHBOARD_AGGREGATES feature, since the counts are only kept
+    up to date from then on, and periodically (e.g. nightly, from cron) to
+    correct any drift.
+    """
+    args = '<course_id course_id ...>'
+    help = 'Reconciles the stored class dashboard metrics of one or more courses.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+                    action='store_true',
+                    default=False,
+                    help='Reconcile the metrics of all courses.'),
+    )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_courses()]
+        elif args:
+            try:
+                course_keys = [CourseKey.from_string(arg) for arg in args]
+            except InvalidKeyError as exc:
+                raise CommandError(u'Invalid course id: {}'.format(exc))
+        else:
+            raise CommandError('No courses specified.')
+
+        for course_key in course_keys:
+            ProblemGradeCount.reconcile(course_key)
+            SequentialOpenCount.reconcile(course_key)
+            log.info(u'Reconciled the class dashboard metrics of %s.', course_key)
@@ -0,0 +1,271 @@
+"""
+Metrics shown on the instructor dashboard, kept up to date as students' module
+state is saved, so that the dashboard doesn't have to aggregate every
+StudentModule of the course each time it's viewed.
+
+The counts are only kept when the ENABLE_CLASS_DASHBOARD_AGGREGATES feature is
+on. Saving a StudentModule doesn't update the counts itself: the changes are
+sent to a celery task, so that requests don't hold locks on the counts, which
+are shared by every student of a problem, until they commit. The counts can
+drift, e.g. when StudentModules are changed with queryset updates or when a
+request's transaction is rolled back, so they should be reconciled with the
+StudentModules regularly with the reconcile_dashboard_metrics management
+command.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from courseware.models import DeferredStudentModule, StudentModule, deferred_student_modules_saved
+from util.query import use_read_replica_if_available
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+
+class DashboardMetricCount(models.Model):
+    """
+    Base class for the counts of StudentModules kept for the dashboard.
+
+    Subclasses list the fields a count is kept per in `KEY_FIELDS`.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        abstract = True
+
+    KEY_FIELDS = ()
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = UsageKeyField(max_length=255, db_index=True)
+    count = models.IntegerField(default=0)
+
+    @classmethod
+    def normalize_key(cls, key):
+        """
+        Return `key`, a tuple of the values of `KEY_FIELDS`, as it's stored.
+        """
+        return tuple(key)
+
+    @classmethod
+    def serialize_key(cls, key):
+        """
+        Return `key` as a list of JSON-serializable values.
+        """
+        return [cls._meta.get_field(field).get_prep_value(value) for field, value in zip(cls.KEY_FIELDS, key)]
+
+    @classmethod
+    def deserialize_key(cls, values):
+        """
+        Return the key serialized as `values` by `serialize_key`.
+        """
+        return tuple(cls._meta.get_field(field).to_python(value) for field, value in zip(cls.KEY_FIELDS, values))
+
+    @classmethod
+    def add(cls, key, delta):
+        """
+        Add `delta` to the count with `key`, a tuple of the values of
+        `KEY_FIELDS`.
+        """
+        lookup = dict(zip(cls.KEY_FIELDS, cls.normalize_key(key)))
+        if cls.objects.filter(**lookup).update(count=F('count') + delta) or delta <= 0:
+            return
+        __, created = cls.objects.get_or_create(defaults={'count': delta}, **lookup)
+        if not created:
+            # Another process created the row since we tried to update it
+            cls.objects.filter(**lookup).update(count=F('count') + delta)
+
+    @classmethod
+    def counts_for_course(cls, course_id):
+        """
+        Return the non-zero counts of the course `course_id`, read from the
+        read replica if there is one.
+        """
+        return use_read_replica_if_available(cls.objects.filter(course_id=course_id, count__gt=0))
+
+    @classmethod
+    def aggregate(cls, course_id):
+        """
+        Return a StudentModule aggregate query for the course `course_id`,
+        with a row of `KEY_FIELDS` and their `count` per count of the course.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def reconcile(cls, course_id):
+        """
+        Replace the counts of the course `course_id` by those aggregated from
+        its StudentModules, read from the read replica if there is one.
+
+        StudentModules saved while this runs may be counted twice, or not at all.
+        """
+        rows = list(use_read_replica_if_available(cls.aggregate(course_id)))
+        with transaction.commit_on_success():
+            cls.objects.filter(course_id=course_id).delete()
+            cls.objects.bulk_create([
+                cls(count=row['count'], **dict(zip(
+                    cls.KEY_FIELDS, cls.normalize_key(row[field] for field in cls.KEY_FIELDS)
+                )))
+                for row in rows
+            ])
+
+
+class ProblemGradeCount(DashboardMetricCount):
+    """
+    The number of students with `grade` out of `max_grade` on a problem.
+
+    StudentModules without a max grade are counted with a `max_grade` of
+    NO_MAX_GRADE, since unique indexes don't treat NULLs as equal.
+    """
+    KEY_FIELDS = ('course_id', 'module_state_key', 'grade', 'max_grade')
+    NO_MAX_GRADE = -1.0
+
+    grade = models.FloatField()
+    max_grade = models.FloatField()
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'module_state_key', 'grade', 'max_grade'),)
+
+    @classmethod
+    def normalize_key(cls, key):
+        course_id, module_state_key, grade, max_grade = key
+        return (course_id, module_state_key, grade, cls.NO_MAX_GRADE if max_grade is None else max_grade)
+
+    @classmethod
+    def aggregate(cls, course_id):
+        return StudentModule.objects.filter(
+            course_id=course_id,
+            grade__isnull=False,
+            module_type='problem',
+        ).values('course_id', 'module_state_key', 'grade', 'max_grade').annotate(count=Count('id')).order_by()
+
+
+class SequentialOpenCount(DashboardMetricCount):
+    """
+    The number of students who opened a subsection.
+    """
+    KEY_FIELDS = ('course_id', 'module_state_key')
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'module_state_key'),)
+
+    @classmethod
+    def aggregate(cls, course_id):
+        return StudentModule.objects.filter(
+            course_id=course_id,
+            module_type='sequential',
+        ).values('course_id', 'module_state_key').annotate(count=Count('id')).order_by()
+
+
+METRIC_MODELS = {model.__name__: model for model in (ProblemGradeCount, SequentialOpenCount)}
+
+
+def aggregates_enabled():
+    """
+    Whether the dashboard metrics are kept up to date, and read from the counts.
+    """
+    return settings.FEATURES.get('ENABLE_CLASS_DASHBOARD_AGGREGATES', False)
+
+
+def apply_metric_deltas(deltas):
+    """
+    Apply `deltas`, a list of [count model name, serialized key, delta], to
+    the counts, in a fixed order so that concurrent callers can't deadlock.
+    """
+    totals = Counter()
+    for model_name, key, delta in deltas:
+        totals[(model_name, tuple(key))] += delta
+    for (model_name, key), delta in sorted(totals.items()):
+        if delta:
+            model = METRIC_MODELS[model_name]
+            model.add(model.deserialize_key(key), delta)
+
+
+def _metric(student_module):
+    """
+    Return the count model and key that `student_module` counts towards, or
+    None if it isn't counted.
+    """
+    if student_module.module_type == 'problem' and student_module.grade is not None:
+        return ProblemGradeCount, ProblemGradeCount.normalize_key((
+            student_module.course_id,
+            student_module.module_state_key,
+            student_module.grade,
+            student_module.max_grade,
+        ))
+    if student_module.module_type == 'sequential':
+        return SequentialOpenCount, (student_module.course_id, student_module.module_state_key)
+    return None
+
+
+def _move_metric(student_module, deltas, created=False):
+    """
+    Add to `deltas` the moves of `student_module` from the count it was last
+    stored with to the one it's counted towards now.
+    """
+    old_metric = None if created else student_module.stored_metric
+    new_metric = _metric(student_module)
+    if old_metric != new_metric:
+        if old_metric is not None:
+            deltas.append([old_metric[0].__name__, old_metric[0].serialize_key(old_metric[1]), -1])
+        if new_metric is not None:
+            deltas.append([new_metric[0].__name__, new_metric[0].serialize_key(new_metric[1]), 1])
+    student_module.stored_metric = new_metric
+
+
+def _update_counts(deltas):
+    """
+    Have the counts updated with `deltas` once the caller is done.
+    """
+    if deltas:
+        # Import tasks here to avoid a circular import.
+        from class_dashboard.tasks import update_dashboard_metrics
+        update_dashboard_metrics.delay(deltas)
+
+
+@receiver(post_init, sender=StudentModule)
+@receiver(post_init, sender=DeferredStudentModule)
+def remember_stored_metric(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the count a StudentModule was loaded with, so that no query is
+    needed to take it out of that count when it's saved.
+    """
+    instance.stored_metric = _metric(instance)
+
+
+@receiver(post_save, sender=StudentModule)
+def update_saved_dashboard_metrics(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Move a saved StudentModule to the count it's counted towards now.
+    """
+    if aggregates_enabled():
+        deltas = []
+        _move_metric(instance, deltas, created)
+        _update_counts(deltas)
+    else:
+        instance.stored_metric = _metric(instance)
+
+
+@receiver(deferred_student_modules_saved)
+def update_deferred_dashboard_metrics(sender, student_modules, **kwargs):  # pylint: disable=unused-argument
+    """
+    Move StudentModules saved together, e.g. when rescoring, to the counts
+    they're counted towards now.
+    """
+    deltas = []
+    for student_module in student_modules:
+        if aggregates_enabled():
+            _move_metric(student_module, deltas)
+        else:
+            student_module.stored_metric = _metric(student_module)
+    _update_counts(deltas)
+
+
+@receiver(post_delete, sender=StudentModule)
+def remove_dashboard_metrics(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Take a deleted StudentModule out of its count.
+    """
+    if aggregates_enabled() and instance.stored_metric is not None:
+        model, key = instance.stored_metric
+        _update_counts([[model.__name__, model.serialize_key(key), -1]])
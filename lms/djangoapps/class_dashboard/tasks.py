@@ -0,0 +1,18 @@
+"""
+Asynchronous tasks for the class dashboard.
+"""
+from celery.task import task
+
+from class_dashboard.models import apply_metric_deltas
+
+
+@task(name=u'class_dashboard.tasks.update_dashboard_metrics')
+def update_dashboard_metrics(deltas):
+    """
+    Apply `deltas`, a list of [count model name, serialized key, delta], to
+    the dashboard metric counts.
+
+    Each count is updated in its own short transaction, rather than in that of
+    the request which saved the StudentModules.
+    """
+    apply_metric_deltas(deltas)
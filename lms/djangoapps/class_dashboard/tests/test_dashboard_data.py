@@ -10,6 +10,7 @@ from mock import patch
 from nose.plugins.attrib import attr
 
 from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory, AdminFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -22,6 +23,7 @@ from class_dashboard.dashboard_data import (
     get_section_display_name, get_array_section_has_problem,
     get_students_opened_subsection, get_students_problem_grades,
 )
+from class_dashboard.models import ProblemGradeCount, SequentialOpenCount, apply_metric_deltas
 from class_dashboard.views import has_instructor_access_for_class
 
 USER_COUNT = 11
@@ -318,3 +320,72 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
         """
         ret_val = has_instructor_access_for_class(self.instructor, self.course.id)
         self.assertEquals(ret_val, True)
+
+
+@attr('shard_1')
+class TestGetProblemGradeDistributionFromCounts(TestGetProblemGradeDistribution):
+    """
+    Tests of the dashboard metrics read from the stored counts.
+    """
+
+    def setUp(self):
+        # Turned on before the student modules are created, so that they're counted
+        patcher = patch.dict('django.conf.settings.FEATURES', {'ENABLE_CLASS_DASHBOARD_AGGREGATES': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(TestGetProblemGradeDistributionFromCounts, self).setUp()
+
+    def assert_counts_reconciled(self):
+        """
+        Check that the stored counts are those aggregated from the student modules.
+        """
+        for model in (ProblemGradeCount, SequentialOpenCount):
+            def counts(model=model):  # pylint: disable=missing-docstring
+                return {
+                    tuple(getattr(count, field) for field in model.KEY_FIELDS): count.count
+                    for count in model.objects.filter(count__gt=0)
+                }
+            stored_counts = counts()
+            model.reconcile(self.course.id)
+            self.assertEqual(stored_counts, counts())
+
+    def test_counts_are_kept(self):
+        self.assert_counts_reconciled()
+
+    def test_changed_grade(self):
+        student_module = StudentModule.objects.get(student=self.users[0], module_state_key=self.item.location)
+        student_module.grade = 0.5
+        student_module.save()
+
+        self.assert_counts_reconciled()
+
+    def test_deleted_student_modules(self):
+        StudentModule.objects.filter(student=self.users[0]).delete()
+
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEqual(total_student_count[self.item.location], USER_COUNT - 1)
+        self.assert_counts_reconciled()
+
+    def test_counts_are_updated_by_task(self):
+        student_module = StudentModule.objects.get(student=self.users[0], module_state_key=self.item.location)
+        student_module.grade = 0.5
+        with patch('class_dashboard.tasks.update_dashboard_metrics.delay') as update_dashboard_metrics:
+            student_module.save()
+
+        (deltas,), __ = update_dashboard_metrics.call_args
+        self.assertEqual([delta for __, __, delta in deltas], [-1, 1])
+        self.assertFalse(ProblemGradeCount.objects.filter(grade=0.5).exists())
+        apply_metric_deltas(deltas)
+        self.assert_counts_reconciled()
+
+    def test_no_max_grade(self):
+        for user in self.users[:2]:
+            student_module = StudentModule.objects.get(student=user, module_state_key=self.item.location)
+            student_module.max_grade = None
+            student_module.save()
+
+        counts = ProblemGradeCount.objects.filter(
+            module_state_key=self.item.location, max_grade=ProblemGradeCount.NO_MAX_GRADE
+        )
+        self.assertEqual([count.count for count in counts], [2])
+        self.assert_counts_reconciled()
@@ -4,6 +4,7 @@ Run these tests @ Devstack:
 """
 # pylint: disable=missing-docstring,invalid-name,maybe-no-member,attribute-defined-outside-init
 from datetime import datetime
+import urllib
 
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -350,6 +351,25 @@ class CourseStructureTests(CourseDetailMixin, CourseViewTestsMixin, ModuleStoreT
         self.maxDiff = None
         self.assertDictEqual(response.data, expected)
 
+    def test_get_subtree(self):
+        """
+        The view should return only the blocks under the requested root.
+        """
+        sequential = self.store.get_course(self.course.id, depth=None).get_children()[0]
+        problem = sequential.get_children()[0]
+        url = reverse(self.view, kwargs={'course_id': self.course_id})
+
+        response = self.http_get(url + '?root=' + urllib.quote(unicode(sequential.location)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['root'], unicode(sequential.location))
+        self.assertEqual(set(response.data['blocks']), {unicode(sequential.location), unicode(problem.location)})
+
+    def test_get_subtree_not_found(self):
+        url = reverse(self.view, kwargs={'course_id': self.course_id})
+        response = self.http_get(url + '?root=nonexistent')
+        self.assertEqual(response.status_code, 404)
+
 
 class CourseGradingPolicyTests(CourseDetailMixin, CourseViewTestsMixin, ModuleStoreTestCase):
     view = 'course_structure_api:v0:grading_policy'
@@ -203,6 +203,13 @@ class CourseStructure(CourseViewMixin, RetrieveAPIView):
 
         GET /api/course_structure/v0/course_structures/{course_id}/
 
+        GET /api/course_structure/v0/course_structures/{course_id}/?root={block_id}
+
+    **Query Parameters**
+
+        * root: The ID of a block of the course. If given, only that block
+          and the blocks below it are returned.
+
     **Response Values**
 
         * root: The ID of the root node of the course structure.
@@ -242,7 +249,13 @@ class CourseStructure(CourseViewMixin, RetrieveAPIView):
         # Make sure the course exists and the user has permissions to view it.
         self.course = self.get_course_or_404()
         course_structure = models.CourseStructure.objects.get(course_id=self.course.id)
-        return course_structure.structure
+        root = self.request.QUERY_PARAMS.get('root', None)
+        if root is None:
+            return course_structure.structure
+        try:
+            return course_structure.get_structure(root)
+        except models.CourseStructureBlock.DoesNotExist:
+            raise Http404
 
 
 class CourseGradingPolicy(CourseViewMixin, ListAPIView):
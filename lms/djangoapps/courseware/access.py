@@ -33,6 +33,7 @@ from student.roles import (
     OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
 )
 from util.milestones_helpers import get_pre_requisite_courses_not_completed
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 
 import dogstats_wrapper as dog_stats_api
 
@@ -86,6 +87,9 @@ def has_access(user, action, obj, course_key=None):
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, action, obj)
 
+    if isinstance(obj, CourseOverview):
+        return _has_access_course_overview(user, action, obj)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, action, obj, course_key)
 
@@ -279,24 +283,9 @@ def _has_access_course_desc(user, action, course):
             _has_staff_access_to_descriptor(user, course, course.id)
         )
 
-    def can_view_courseware_with_prerequisites():  # pylint: disable=invalid-name
-        """
-        Checks if prerequisite courses feature is enabled and course has prerequisites
-        and user is neither staff nor anonymous then it returns False if user has not
-        passed prerequisite courses otherwise return True.
-        """
-        if settings.FEATURES['ENABLE_PREREQUISITE_COURSES'] \
-                and not _has_staff_access_to_descriptor(user, course, course.id) \
-                and course.pre_requisite_courses \
-                and not user.is_anonymous() \
-                and get_pre_requisite_courses_not_completed(user, [course.id]):
-            return False
-        else:
-            return True
-
     checkers = {
         'load': can_load,
-        'view_courseware_with_prerequisites': can_view_courseware_with_prerequisites,
+        'view_courseware_with_prerequisites': lambda: _can_view_courseware_with_prerequisites(user, course),
         'load_forum': can_load_forum,
         'load_mobile': can_load_mobile,
         'load_mobile_no_enrollment_check': can_load_mobile_no_enroll_check,
@@ -311,6 +300,74 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _can_view_courseware_with_prerequisites(user, course):  # pylint: disable=invalid-name
+    """
+    Checks if prerequisite courses feature is enabled and course has prerequisites
+    and user is neither staff nor anonymous then it returns False if user has not
+    passed prerequisite courses otherwise return True.
+
+    `course` is a CourseDescriptor or a CourseOverview.
+    """
+    if settings.FEATURES['ENABLE_PREREQUISITE_COURSES'] \
+            and not _has_staff_access_to_location(user, None, course.id) \
+            and course.pre_requisite_courses \
+            and not user.is_anonymous() \
+            and get_pre_requisite_courses_not_completed(user, [course.id]):
+        return False
+    else:
+        return True
+
+
+def _has_access_course_overview(user, action, course_overview):
+    """
+    Check if user has access to a course, given its CourseOverview.
+
+    Valid actions:
+
+    'load' -- load the courseware, see inside the course
+    'view_courseware_with_prerequisites' -- the user has passed the course's prerequisites
+    'staff' -- staff access to course.
+    'instructor' -- instructor access to course.
+
+    Unlike for a CourseDescriptor, 'load' doesn't check the group_access of the
+    course itself, which listings don't show.
+    """
+    course_key = course_overview.id
+
+    def can_load():
+        """
+        Can this user load this course? Mirrors the 'load' check of
+        _has_access_descriptor for the course's root block.
+        """
+        if course_overview.visible_to_staff_only and not _has_staff_access_to_location(user, None, course_key):
+            return False
+
+        # If start dates are off, can always load
+        if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
+            debug("Allow: DISABLE_START_DATES")
+            return True
+
+        if course_overview.start is not None:
+            now = datetime.now(UTC())
+            effective_start = _adjust_start_date_for_beta_testers(user, course_overview, course_key=course_key)
+            if in_preview_mode() or now > effective_start:
+                debug("Allow: now > effective start date")
+                return True
+            return _has_staff_access_to_location(user, None, course_key)
+
+        debug("Allow: no start date")
+        return True
+
+    checkers = {
+        'load': can_load,
+        'view_courseware_with_prerequisites': lambda: _can_view_courseware_with_prerequisites(user, course_overview),
+        'staff': lambda: _has_staff_access_to_location(user, None, course_key),
+        'instructor': lambda: _has_instructor_access_to_location(user, None, course_key),
+    }
+
+    return _dispatch(checkers, action, user, course_overview)
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -696,3 +753,117 @@ def in_preview_mode():
     """
     hostname = get_current_request_hostname()
     return hostname and settings.PREVIEW_DOMAIN in hostname.split('.')
+
+
+def get_load_access_fields(descriptor):
+    """
+    Returns the fields of `descriptor` which decide who can load it, in the
+    form BlockLoadAccess.can_load takes. They can be stored (e.g. cached) to
+    check access to the block later without loading it.
+    """
+    return {
+        'visible_to_staff_only': descriptor.visible_to_staff_only,
+        'group_access': descriptor.merged_group_access,
+        'start': None if 'detached' in descriptor._class_tags else descriptor.start,  # pylint: disable=protected-access
+        'days_early_for_beta': descriptor.days_early_for_beta,
+    }
+
+
+class BlockLoadAccess(object):
+    """
+    Decides whether `user` can load blocks of `course` from their load access
+    fields (see get_load_access_fields), by the same rules as
+    has_access(user, 'load', descriptor).
+
+    What it looks up about the user is kept, so that checking many blocks
+    costs little more than checking one.
+    """
+    def __init__(self, user, course):
+        self.user = user or AnonymousUser()
+        self.course = course
+        self._is_staff = None
+        self._is_beta_tester = None
+        self._user_groups = {}
+
+    def can_load(self, access_fields):
+        """
+        Returns whether the user can load the block with `access_fields`.
+        """
+        if self.is_staff:
+            return True
+
+        if access_fields['visible_to_staff_only']:
+            return False
+
+        if not self._has_group_access(access_fields['group_access']):
+            return False
+
+        if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(self.user, self.course.id):
+            return True
+
+        start = access_fields['start']
+        if start is not None:
+            if access_fields['days_early_for_beta'] is not None and self.is_beta_tester:
+                start -= timedelta(access_fields['days_early_for_beta'])
+            return bool(in_preview_mode() or datetime.now(UTC()) > start)
+
+        return True
+
+    @property
+    def is_staff(self):
+        """
+        Whether the user has staff access to the course.
+        """
+        if self._is_staff is None:
+            self._is_staff = _has_staff_access_to_descriptor(self.user, self.course, self.course.id)
+        return self._is_staff
+
+    @property
+    def is_beta_tester(self):
+        """
+        Whether the user is a beta tester of the course.
+        """
+        if self._is_beta_tester is None:
+            self._is_beta_tester = CourseBetaTesterRole(self.course.id).has_user(self.user)
+        return self._is_beta_tester
+
+    def _has_group_access(self, merged_access):
+        """
+        Returns whether the user's groups satisfy `merged_access`, the merged
+        group access of a block (see _has_group_access).
+        """
+        user_partitions = self.course.user_partitions
+        if len(user_partitions) == len(get_split_user_partitions(user_partitions)):
+            # The split_test module handles its own access via updating its children.
+            return True
+
+        if False in merged_access.values():
+            return False
+
+        partitions = {partition.id: partition for partition in user_partitions}
+        for partition_id, group_ids in merged_access.items():
+            if group_ids is None:
+                continue
+            partition = partitions.get(partition_id)
+            if partition is None:
+                log.warning("Error looking up user partition %s, access will be denied.", partition_id)
+                return False
+            try:
+                groups = [partition.get_group(group_id) for group_id in group_ids]
+            except NoSuchUserPartitionGroupError:
+                log.warning("Error looking up referenced user partition group, access will be denied.", exc_info=True)
+                return False
+            if groups and self._get_user_group(partition) not in groups:
+                return False
+
+        return True
+
+    def _get_user_group(self, partition):
+        """
+        Returns the user's group in `partition`.
+        """
+        if partition.id not in self._user_groups:
+            self._user_groups[partition.id] = partition.scheme.get_group_for_user(
+                self.course.id, self.user, partition
+            )
+        return self._user_groups[partition.id]
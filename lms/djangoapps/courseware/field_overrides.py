@@ -14,6 +14,7 @@ package and is used to wrap the `authored_data` when constructing an
 `LmsFieldData`.  This means overrides will be in effect for all scopes covered
 by `authored_data`, e.g. course content and settings stored in Mongo.
 """
+import itertools
 import threading
 
 from abc import ABCMeta, abstractmethod
@@ -24,6 +25,10 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 
 
 NOTSET = object()
+_UNRESOLVED = object()
+
+# The names of the fields whose values blocks inherit from their ancestors
+INHERITABLE_FIELDS = frozenset(InheritanceMixin.fields)
 
 
 def resolve_dotted(name):
@@ -81,20 +86,81 @@ class OverrideFieldData(FieldData):
         return wrapped
 
     def __init__(self, user, fallback):
+        self.user = user
         self.fallback = fallback
         self.providers = tuple((cls(user) for cls in self.provider_classes))
+        # The overrides resolved so far, by block id; see `_resolved`
+        self._resolved_overrides = {}
+        self._generation = _OVERRIDES_GENERATION.value
+
+    def _resolved(self, block):
+        """
+        Returns the overrides resolved so far for `block`, as a tuple of
+
+          (block,
+           the overrides of the providers with bulk APIs,
+           a dict mapping field name to its own override or `NOTSET`,
+           a dict mapping field name to its ancestors' override or `NOTSET`)
+
+        Overrides are resolved once, and then kept until overrides change.
+        """
+        if self._generation != _OVERRIDES_GENERATION.value:
+            self._resolved_overrides = {}
+            self._generation = _OVERRIDES_GENERATION.value
+        resolved = self._resolved_overrides.get(id(block))
+        if resolved is None:
+            # The block is kept so that its id isn't reused while it's a key
+            resolved = (block, [provider.get_overrides(block) for provider in self.providers], {}, {})
+            self._resolved_overrides[id(block)] = resolved
+        return resolved
 
     def get_override(self, block, name):
         """
         Checks for an override for the field identified by `name` in `block`.
         Returns the overridden value or `NOTSET` if no override is found.
         """
-        if not overrides_disabled():
-            for provider in self.providers:
-                value = provider.get(block, name, NOTSET)
+        if overrides_disabled():
+            return NOTSET
+        __, bulk_overrides, own, __ = self._resolved(block)
+        value = own.get(name, _UNRESOLVED)
+        if value is _UNRESOLVED:
+            value = NOTSET
+            for provider, overrides in zip(self.providers, bulk_overrides):
+                if overrides is None:
+                    value = provider.get(block, name, NOTSET)
+                else:
+                    value = overrides.get(name, NOTSET)
                 if value is not NOTSET:
-                    return value
-        return NOTSET
+                    break
+            own[name] = value
+        return value
+
+    def get_inherited_override(self, block, name):
+        """
+        Returns the override of the inheritable field `name` in the nearest
+        ancestor of `block` which has one, or `NOTSET` if none has.
+
+        The overrides of ancestors are resolved by their own
+        `OverrideFieldData`s where possible, so that they're shared by all of
+        their descendants.
+        """
+        if overrides_disabled():
+            return NOTSET
+        __, __, __, inherited = self._resolved(block)
+        value = inherited.get(name, _UNRESOLVED)
+        if value is _UNRESOLVED:
+            parent = block.get_parent()
+            if parent is None:
+                value = NOTSET
+            else:
+                field_data = getattr(parent, '_field_data', None)
+                if not isinstance(field_data, OverrideFieldData) or field_data.user != self.user:
+                    field_data = self
+                value = field_data.get_override(parent, name)
+                if value is NOTSET:
+                    value = field_data.get_inherited_override(parent, name)
+            inherited[name] = value
+        return value
 
     def get(self, block, name):
         value = self.get_override(block, name)
@@ -114,11 +180,8 @@ class OverrideFieldData(FieldData):
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in INHERITABLE_FIELDS and self.get_inherited_override(block, name) is not NOTSET:
+                return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -128,13 +191,10 @@ class OverrideFieldData(FieldData):
     def default(self, block, name):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
-        if not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+        if name in INHERITABLE_FIELDS:
+            value = self.get_inherited_override(block, name)
+            if value is not NOTSET:
+                return value
         return self.fallback.default(block, name)
 
 
@@ -168,6 +228,42 @@ def overrides_disabled():
     return bool(_OVERRIDES_DISABLED.disabled)
 
 
+class _OverridesGeneration(threading.local):
+    """
+    A thread local holding the generation of the overrides seen by the current
+    thread, so that `OverrideFieldData` knows when the overrides it has
+    resolved are out of date.
+    """
+    value = 0
+
+
+_OVERRIDES_GENERATION = _OverridesGeneration()
+
+# Generations are numbered across all threads, so that one thread's
+# generation is never mistaken for another's.
+_GENERATIONS = itertools.count(1)
+
+
+def overrides_changed():
+    """
+    Tells `OverrideFieldData` in the current thread that overrides have been
+    set or cleared, or that the context that providers look up overrides in
+    has changed, so that it resolves overrides again.  Override providers
+    should call this whenever that happens.
+    """
+    _OVERRIDES_GENERATION.value = next(_GENERATIONS)
+
+
+def overrides_generation():
+    """
+    Returns the generation of the overrides in the current thread, which
+    changes whenever `overrides_changed` is called in it, so that providers
+    which keep the overrides they have loaded can tell when those are out of
+    date.
+    """
+    return _OVERRIDES_GENERATION.value
+
+
 class FieldOverrideProvider(object):
     """
     Abstract class which defines the interface that a `FieldOverrideProvider`
@@ -192,13 +288,11 @@ class FieldOverrideProvider(object):
         """
         raise NotImplementedError
 
-
-def _lineage(block):
-    """
-    Returns an iterator over all ancestors of the given block, starting with
-    its immediate parent and ending at the root of the block tree.
-    """
-    parent = block.get_parent()
-    while parent:
-        yield parent
-        parent = parent.get_parent()
+    def get_overrides(self, block):
+        """
+        Returns a dict mapping the name of each field overridden in `block` to
+        its overridden value, for providers which can find all of a block's
+        overrides at once.  Providers which can't return None, and their
+        overrides are looked up one field at a time with `get`.
+        """
+        return None
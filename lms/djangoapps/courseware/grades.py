@@ -1,30 +1,34 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from datetime import datetime
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
 from courseware.model_data import FieldDataCache
-from student.models import anonymous_id_for_user
+from student.models import CourseAccessRole, anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendents
+from util.query import use_read_replica_if_available
 from xmodule import graders
 from xmodule.graders import Score
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import get_course_version, modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import AnswerDistributionCount, StudentGradeSummary, StudentModule
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
+from pytz import UTC
 
 
 log = logging.getLogger("edx.courseware")
@@ -58,6 +62,10 @@ def answer_distributions(course_key):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
+
+    When the ENABLE_ANSWER_DISTRIBUTION_AGGREGATE feature is on, the counts are
+    read from the AnswerDistributionCounts kept up to date as students submit
+    answers, rather than computed from all the StudentModules.
     """
     # dict: { module.module_state_key : (url_name, display_name) }
     state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
@@ -80,13 +88,32 @@ def answer_distributions(course_key):
 
         return state_keys_to_problem_info[usage_key]
 
+    answer_counts = defaultdict(lambda: defaultdict(int))
+
+    if settings.FEATURES.get('ENABLE_ANSWER_DISTRIBUTION_AGGREGATE', False):
+        # Stream the counts, which are per distinct answer, rather than per student
+        counts = use_read_replica_if_available(
+            AnswerDistributionCount.objects.filter(course_id=course_key, count__gt=0)
+        )
+        for count in counts.iterator():
+            try:
+                url, display_name = url_and_display_name(count.module_state_key.map_into_course(course_key))
+            except (ItemNotFoundError, InvalidKeyError):
+                log.warning(
+                    u"Answer Distribution: Item %s in course %s not found; its answers will be "
+                    u"omitted from the answer distribution CSV.",
+                    count.module_state_key,
+                    course_key,
+                )
+                continue
+            answer_counts[(url, display_name, count.problem_part_id)][count.answer] += count.count
+        return answer_counts
+
     # Iterate through all problems submitted for this course in no particular
     # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
     for module in StudentModule.all_submitted_problems_read_only(course_key):
         try:
-            state_dict = json.loads(module.state) if module.state else {}
-            raw_answers = state_dict.get("student_answers", {})
+            answers = AnswerDistributionCount.submitted_answers(module.module_type, module.state, module.grade)
         except ValueError:
             log.error(
                 u"Answer Distribution: Could not parse module state for StudentModule id=%s, course=%s",
@@ -99,12 +126,7 @@ def answer_distributions(course_key):
             url, display_name = url_and_display_name(module.module_state_key.map_into_course(course_key))
             # Each problem part has an ID that is derived from the
             # module.module_state_key (with some suffix appended)
-            for problem_part_id, raw_answer in raw_answers.items():
-                # Convert whatever raw answers we have (numbers, unicode, None, etc.)
-                # to be unicode values. Note that if we get a string, it's always
-                # unicode and not str -- state comes from the json decoder, and that
-                # always returns unicode for strings.
-                answer = unicode(raw_answer)
+            for problem_part_id, answer in answers.items():
                 answer_counts[(url, display_name, problem_part_id)][answer] += 1
 
         except (ItemNotFoundError, InvalidKeyError):
@@ -122,16 +144,24 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, prefetched_scores=None, field_data_cache=None,
+          definitions_prefetched=False):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
+
+    The content of each section that has to be graded is loaded with one
+    query, unless `definitions_prefetched` says the caller already loaded
+    the whole course's (see `iterate_grades_for`).
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(
+            student, request, course, keep_raw_scores, prefetched_scores, field_data_cache, definitions_prefetched
+        )
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, prefetched_scores=None, field_data_cache=None,
+           definitions_prefetched=False):
     """
     Unwrapped version of "grade"
 
@@ -150,17 +180,42 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    `prefetched_scores` is an optional StudentScores instance (see
+    `prefetch_student_scores`) holding this student's submissions scores and
+    StudentModule rows, loaded in bulk. When given, no per-section or
+    per-problem StudentModule queries are issued.
+
+    `field_data_cache` is an optional FieldDataCache for `student` (see
+    `FieldDataCache.cache_for_course`) used to create the modules that have to
+    be instantiated. If it holds all of the student's StudentModules, they are
+    used in place of `prefetched_scores`.
+
     More information on the format is in the docstring for CourseGrader.
     """
+    if prefetched_scores is None and field_data_cache is not None and field_data_cache.course_scoped:
+        prefetched_scores = _student_scores_from_cache(student, course, field_data_cache)
+
+    if _grade_summaries_enabled():
+        if prefetched_scores is None:
+            prefetched_scores = prefetch_student_scores(course, [student])[student.id]
+        return _grade_with_summary(
+            student, request, course, keep_raw_scores, prefetched_scores, field_data_cache, definitions_prefetched
+        )
+
     grading_context = course.grading_context
     raw_scores = []
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
-    )
+    if prefetched_scores is not None:
+        submissions_scores = prefetched_scores.submissions_scores
+        student_modules = prefetched_scores.student_modules
+    else:
+        # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+        # scores that were registered with the submissions API, which for the moment
+        # means only openassessment (edx-ora2)
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
+        student_modules = None
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -168,85 +223,132 @@ def _grade(student, request, course, keep_raw_scores):
     for section_format, sections in grading_context['graded_sections'].iteritems():
         format_scores = []
         for section in sections:
-            section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
-
-            # some problems have state that is updated independently of interaction
-            # with the LMS, so they need to always be scored. (E.g. foldit.,
-            # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+            scores, graded_total = _grade_section(
+                student, request, course, section, submissions_scores, student_modules, field_data_cache,
+                definitions_prefetched
             )
+            if keep_raw_scores:
+                raw_scores += scores
+            _add_graded_total(format_scores, graded_total, section['section_descriptor'])
 
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
-                )
+        totaled_scores[section_format] = format_scores
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
-            # If we haven't seen a single problem in the section, we don't have
-            # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
+    return _summarize_grades(course, totaled_scores, raw_scores if keep_raw_scores else None)
 
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+def _grade_section(student, request, course, section, submissions_scores, student_modules, field_data_cache=None,
+                   definitions_prefetched=False):
+    """
+    Grade a single graded section (an entry of `grading_context['graded_sections']`).
+
+    Returns a tuple of (scores, graded_total): the list of Scores for every
+    scored module in the section, and the section's aggregate Score.
+    `student_modules` is either the prefetched dict of this student's
+    StudentModule rows or None, in which case the database is queried.
+    Modules are created with `field_data_cache` if given, and otherwise with
+    a new FieldDataCache each. The content of the section's blocks is loaded
+    with one query, unless `definitions_prefetched`.
+    """
+    section_descriptor = section['section_descriptor']
+    section_name = section_descriptor.display_name_with_default
 
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
+    # some problems have state that is updated independently of interaction
+    # with the LMS, so they need to always be scored. (E.g. foldit.,
+    # combinedopenended)
+    should_grade_section = any(
+        descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+    )
 
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
+    # If there are no problems that always have to be regraded, check to
+    # see if any of our locations are in the scores from the submissions
+    # API. If scores exist, we have to calculate grades for this section.
+    if not should_grade_section:
+        should_grade_section = any(
+            descriptor.location.to_deprecated_string() in submissions_scores
+            for descriptor in section['xmoduledescriptors']
+        )
 
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
+    if not should_grade_section and student_modules is not None:
+        should_grade_section = any(
+            _stripped_usage_key(descriptor.location) in student_modules
+            for descriptor in section['xmoduledescriptors']
+        )
+    elif not should_grade_section:
+        with manual_transaction():
+            should_grade_section = StudentModule.objects.filter(
+                student=student,
+                module_state_key__in=[
+                    descriptor.location for descriptor in section['xmoduledescriptors']
+                ]
+            ).exists()
+
+    # If we haven't seen a single problem in the section, we don't have
+    # to grade it at all! We can assume 0%
+    if not should_grade_section:
+        return [], Score(0.0, 1.0, True, section_name)
+
+    if not definitions_prefetched:
+        # Load the content of all the section's blocks with one query, rather than one per block
+        modulestore().prefetch_definitions(section_descriptor.location)
+
+    scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            if field_data_cache is not None:
+                module_field_data_cache = field_data_cache
+                module_field_data_cache.add_descriptors_to_cache([descriptor])
+            else:
+                module_field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, module_field_data_cache, course.id)
 
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
-                _, graded_total = graders.aggregate_scores(scores, section_name)
-                if keep_raw_scores:
-                    raw_scores += scores
-            else:
-                graded_total = Score(0.0, 1.0, True, section_name)
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+            student_modules=student_modules
+        )
+        if correct is None and total is None:
+            continue
 
-            #Add the graded total to totaled_scores
-            if graded_total.possible > 0:
-                format_scores.append(graded_total)
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
             else:
-                log.info(
-                    "Unable to grade a section with a total possible score of zero. " +
-                    str(section_descriptor.location)
-                )
+                correct = total
 
-        totaled_scores[section_format] = format_scores
+        graded = module_descriptor.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+
+    _, graded_total = graders.aggregate_scores(scores, section_name)
+    return scores, graded_total
 
+
+def _add_graded_total(format_scores, graded_total, section_descriptor):
+    """
+    Add a section's graded total to the scores passed to the grader for its format.
+    """
+    if graded_total.possible > 0:
+        format_scores.append(graded_total)
+    else:
+        log.info(
+            "Unable to grade a section with a total possible score of zero. " +
+            str(section_descriptor.location)
+        )
+
+
+def _summarize_grades(course, totaled_scores, raw_scores=None):
+    """
+    Run the course grader over `totaled_scores` and add the final letter grade.
+    If `raw_scores` is not None it is included in the result as 'raw_scores'.
+    """
     # Grading policy might be overriden by a CCX, need to reset it
     course.set_grading_policy(course.grading_policy)
     grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
@@ -258,13 +360,188 @@ def _grade(student, request, course, keep_raw_scores):
     letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
     grade_summary['grade'] = letter_grade
     grade_summary['totaled_scores'] = totaled_scores  	# make this available, eg for instructor download & debugging
-    if keep_raw_scores:
+    if raw_scores is not None:
         # way to get all RAW scores out to instructor
         # so grader can be double-checked
         grade_summary['raw_scores'] = raw_scores
     return grade_summary
 
 
+def _grade_summaries_enabled():
+    """
+    Whether per-section grading results are persisted in StudentGradeSummary.
+    Random profile scores are never persisted.
+    """
+    return settings.FEATURES.get('PERSISTENT_GRADE_SUMMARIES', False) and not settings.GENERATE_PROFILE_SCORES
+
+
+def grade_summary_version(course, student):
+    """
+    Return the version key that the stored StudentGradeSummary of `student`
+    in `course` must match, or None if the course's modulestore doesn't track
+    its versions.
+
+    It's a hash of the course's published version, its grading policy, and
+    what `student` can access as staff: their global staff status and course
+    roles. Changes to their cohort, partition groups and due date extensions
+    discard the stored summary instead (see `courseware.signals`).
+    """
+    course_version = get_course_version(course)
+    if course_version is None:
+        return None
+    roles = sorted(
+        [org, unicode(course_id or ''), role]
+        for org, course_id, role in CourseAccessRole.objects.filter(user=student).values_list(
+            'org', 'course_id', 'role'
+        )
+    )
+    payload = json.dumps(
+        [course_version, course.grading_policy, course.grade_cutoffs, student.is_staff, roles],
+        sort_keys=True,
+        default=unicode,
+    )
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _iter_static_descendants(descriptor):
+    """
+    Yield `descriptor` and every descriptor below it in the course tree.
+    """
+    yield descriptor
+    for child in descriptor.get_children():
+        for child_descriptor in _iter_static_descendants(child):
+            yield child_descriptor
+
+
+def _section_inputs(section, student_scores, now):
+    """
+    Collect what a graded section's result depends on for one student.
+
+    Returns a tuple of (fingerprint, next_start). `fingerprint` is a hash of the
+    student's submissions scores and StudentModule grades for every block in the
+    section (plus the last modification of containers with dynamic children,
+    whose state decides which children are graded), or None if the section
+    contains problems that must always be regraded. `next_start` is the earliest
+    start date in the section that is still in the future, or None.
+    """
+    if any(descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']):
+        return None, None
+
+    inputs = []
+    next_start = None
+    for descriptor in _iter_static_descendants(section['section_descriptor']):
+        start = getattr(descriptor, 'start', None)
+        if start is not None and start > now and (next_start is None or start < next_start):
+            next_start = start
+
+        usage_key = _stripped_usage_key(descriptor.location)
+        entry = [usage_key, student_scores.submissions_scores.get(descriptor.location.to_deprecated_string())]
+        student_module = student_scores.student_modules.get(usage_key)
+        if student_module is not None:
+            entry.extend([student_module.grade, student_module.max_grade])
+            if descriptor.has_dynamic_children():
+                entry.append(unicode(student_module.modified))
+        inputs.append(entry)
+
+    return hashlib.sha1(json.dumps(inputs, default=unicode)).hexdigest(), next_start
+
+
+def _grade_with_summary(student, request, course, keep_raw_scores, student_scores, field_data_cache=None,
+                        definitions_prefetched=False):
+    """
+    Grade `student` like `_grade`, reusing the per-section results stored in
+    their StudentGradeSummary for `course`.
+
+    Only sections whose score inputs changed since they were stored (see
+    `_section_inputs`) are regraded; the grader itself is always rerun. Stored
+    results are discarded wholesale when the course content, grading policy or
+    the student's access changed (see `grade_summary_version`), or when a start
+    date passed since they were stored. Nothing is stored for courses whose
+    versions aren't tracked.
+    """
+    now = datetime.now(UTC)
+    with manual_transaction():
+        course_version = grade_summary_version(course, student)
+
+    summary = None
+    if course_version is not None:
+        with manual_transaction():
+            try:
+                summary = StudentGradeSummary.objects.get(user=student, course_id=course.id)
+            except StudentGradeSummary.DoesNotExist:
+                pass
+
+    stored_sections = {}
+    if (
+            summary is not None and
+            summary.course_version == course_version and
+            (summary.valid_until is None or summary.valid_until > now)
+    ):
+        stored_sections = json.loads(summary.summary)
+
+    sections_data = {}
+    valid_until = None
+    changed = summary is None or not stored_sections
+    totaled_scores = {}
+    raw_scores = []
+    for section_format, sections in course.grading_context['graded_sections'].iteritems():
+        format_scores = []
+        for section in sections:
+            section_key = _stripped_usage_key(section['section_descriptor'].location)
+            fingerprint, next_start = _section_inputs(section, student_scores, now)
+            if next_start is not None and (valid_until is None or next_start < valid_until):
+                valid_until = next_start
+
+            stored = stored_sections.get(section_key)
+            if fingerprint is not None and stored is not None and stored['fingerprint'] == fingerprint:
+                scores = [Score(*score) for score in stored['scores']]
+                graded_total = Score(*stored['graded_total'])
+            else:
+                scores, graded_total = _grade_section(
+                    student, request, course, section,
+                    student_scores.submissions_scores, student_scores.student_modules, field_data_cache,
+                    definitions_prefetched
+                )
+                changed = True
+
+            if fingerprint is not None:
+                sections_data[section_key] = {
+                    'fingerprint': fingerprint,
+                    'scores': [list(score) for score in scores],
+                    'graded_total': list(graded_total),
+                }
+            if keep_raw_scores:
+                raw_scores += scores
+            _add_graded_total(format_scores, graded_total, section['section_descriptor'])
+
+        totaled_scores[section_format] = format_scores
+
+    if course_version is not None and (changed or summary.course_version != course_version):
+        _save_grade_summary(student, course, summary, course_version, valid_until, sections_data)
+
+    return _summarize_grades(course, totaled_scores, raw_scores if keep_raw_scores else None)
+
+
+def _save_grade_summary(student, course, summary, course_version, valid_until, sections_data):
+    """
+    Store `sections_data` as the StudentGradeSummary of `student` in `course`.
+    A failure to store is logged and otherwise ignored; the grades themselves
+    have already been computed.
+    """
+    if summary is None:
+        summary = StudentGradeSummary(user=student, course_id=course.id)
+    summary.course_version = course_version
+    summary.valid_until = valid_until
+    summary.summary = json.dumps(sections_data)
+    try:
+        with manual_transaction():
+            summary.save()
+    except IntegrityError:
+        # Another request stored a summary for this student concurrently; theirs
+        # is as good as ours.
+        pass
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -288,19 +565,19 @@ def grade_for_percentage(grade_cutoffs, percentage):
 
 
 @transaction.commit_manually
-def progress_summary(student, request, course):
+def progress_summary(student, request, course, field_data_cache=None):
     """
     Wraps "_progress_summary" with the manual_transaction context manager just
     in case there are unanticipated errors.
     """
     with manual_transaction():
-        return _progress_summary(student, request, course)
+        return _progress_summary(student, request, course, field_data_cache)
 
 
 # TODO: This method is not very good. It was written in the old course style and
 # then converted over and performance is not good. Once the progress page is redesigned
 # to not have the progress summary this method should be deleted (so it won't be copied).
-def _progress_summary(student, request, course):
+def _progress_summary(student, request, course, field_data_cache=None):
     """
     Unwrapped version of "progress_summary".
 
@@ -316,15 +593,20 @@ def _progress_summary(student, request, course):
     Arguments:
         student: A User object for the student to grade
         course: A Descriptor containing the course to grade
+        field_data_cache: An optional FieldDataCache for the student, to which
+            the whole course is added. A new one is created if it isn't given.
 
     If the student does not have access to load the course module, this function
     will return None.
 
     """
     with manual_transaction():
-        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-            course.id, student, course, depth=None
-        )
+        if field_data_cache is None:
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                course.id, student, course, depth=None
+            )
+        else:
+            field_data_cache.add_descriptor_descendents(course, depth=None)
         # TODO: We need the request to pass into here. If we could
         # forego that, our arguments would be simpler
         course_module = get_module_for_descriptor(student, request, course, field_data_cache, course.id)
@@ -391,7 +673,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_modules=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -405,6 +687,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_modules: An optional dict of stripped usage key strings to this
+           user's StudentModule rows, as built by `prefetch_student_scores`.
+           If given, it is treated as complete and the database is not queried.
     """
     scores_cache = scores_cache or {}
 
@@ -431,14 +716,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_modules is not None:
+        student_module = student_modules.get(_stripped_usage_key(problem_descriptor.location))
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -484,7 +772,93 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_or_id, students):
+def _stripped_usage_key(usage_key):
+    """
+    Return the string under which `usage_key` is stored in the
+    StudentModule.module_state_key column (branch and version removed).
+    """
+    if hasattr(usage_key, 'version_agnostic') and hasattr(usage_key, 'for_branch'):
+        usage_key = usage_key.for_branch(None).version_agnostic()
+    return unicode(usage_key)
+
+
+class StudentScores(object):
+    """
+    The raw score data needed to grade one student in one course, loaded
+    ahead of time by `prefetch_student_scores`.
+
+    `submissions_scores` is the dict returned by `submissions.api.get_scores`
+    and `student_modules` maps stripped usage key strings to the student's
+    StudentModule rows for the course.
+    """
+    def __init__(self, submissions_scores=None, student_modules=None):
+        self.submissions_scores = submissions_scores if submissions_scores is not None else {}
+        self.student_modules = student_modules if student_modules is not None else {}
+
+
+def _student_scores_from_cache(student, course, field_data_cache):
+    """
+    Return the StudentScores of `student` in `course`, using the StudentModules
+    in `field_data_cache`, which must hold all of them (see
+    `FieldDataCache.cache_for_course`).
+    """
+    return StudentScores(
+        sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)),
+        {
+            _stripped_usage_key(student_module.module_state_key): student_module
+            for student_module in field_data_cache.student_modules()
+        },
+    )
+
+
+def prefetch_student_scores(course, students):
+    """
+    Load the raw score data for a chunk of `students` in `course`.
+
+    All StudentModule rows for the chunk are fetched with a single query
+    (restricted to the grade columns), rather than one `exists()` query per
+    section and one `get()` per problem for each student.
+
+    Returns a dict of student id -> StudentScores.
+    """
+    prefetched = {student.id: StudentScores() for student in students}
+    if not prefetched:
+        return prefetched
+
+    with manual_transaction():
+        rows = StudentModule.objects.filter(
+            course_id=course.id,
+            student_id__in=prefetched.keys(),
+        ).only('id', 'student', 'module_state_key', 'grade', 'max_grade', 'modified')
+        for student_module in rows:
+            prefetched[student_module.student_id].student_modules[
+                unicode(student_module.module_state_key)
+            ] = student_module
+
+    course_id_string = course.id.to_deprecated_string()
+    for student in students:
+        prefetched[student.id].submissions_scores = sub_api.get_scores(
+            course_id_string, anonymous_id_for_user(student, course.id)
+        )
+
+    return prefetched
+
+
+def _chunked(iterable, chunk_size):
+    """
+    Yield successive lists of at most `chunk_size` items from `iterable`.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iterate_grades_for(course_or_id, students, batch_size=None):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -501,6 +875,11 @@ def iterate_grades_for(course_or_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If `batch_size` is given, students are graded in chunks of that many, and
+    the StudentModule rows for each chunk are loaded in bulk up front (see
+    `prefetch_student_scores`). The resulting gradesets are identical to the
+    unbatched ones.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
@@ -512,6 +891,32 @@ def iterate_grades_for(course_or_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
+    if batch_size:
+        student_chunks = _chunked(students, batch_size)
+    else:
+        student_chunks = ([student] for student in students)
+
+    # Load the content of all the course's blocks with one query up front,
+    # rather than one per block (or per section) for every student.
+    modulestore().prefetch_definitions(course.location)
+
+    for student_chunk in student_chunks:
+        if batch_size:
+            with dog_stats_api.timer('lms.grades.prefetch_student_scores', tags=[u'action:{}'.format(course.id)]):
+                prefetched = prefetch_student_scores(course, student_chunk)
+        else:
+            prefetched = {}
+
+        for student, gradeset, err_msg in _iterate_grades_for_chunk(course, request, student_chunk, prefetched):
+            yield student, gradeset, err_msg
+
+
+def _iterate_grades_for_chunk(course, request, students, prefetched):
+    """
+    Grade each of `students`, yielding (student, gradeset, err_msg) tuples as
+    described in `iterate_grades_for`. `prefetched` maps student ids to
+    StudentScores; students missing from it are graded without prefetching.
+    """
     for student in students:
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
@@ -521,7 +926,10 @@ def iterate_grades_for(course_or_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                student_scores = prefetched.get(student.id)
+                gradeset = grade(
+                    student, request, course, prefetched_scores=student_scores, definitions_prefetched=True
+                )
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -0,0 +1,72 @@
+"""
+Recompute the stored answer distribution counts of courses from students' problem state.
+"""
+import logging
+from optparse import make_option
+
+from celery import group
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from courseware.models import StudentModule
+from courseware.tasks import recompute_answer_distributions
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Recompute the answer distribution counts of the problems in courses, in
+    chunks of problems recomputed by parallel celery tasks.
+
+    Run this for all courses when turning on the
+    ENABLE_ANSWER_DISTRIBUTION_AGGREGATE feature, since the counts are only
+    kept up to date from then on.
+    """
+    args = '<course_id course_id ...>'
+    help = 'Recomputes the stored answer distribution counts of one or more courses.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size',
+                    type='int',
+                    default=20,
+                    help='Number of problems recomputed by each task.'),
+        make_option('--sync',
+                    action='store_true',
+                    default=False,
+                    help='Recompute in this process, rather than with celery tasks.'),
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError('No courses specified.')
+        try:
+            course_keys = [CourseKey.from_string(arg) for arg in args]
+        except InvalidKeyError as exc:
+            raise CommandError(u'Invalid course id: {}'.format(exc))
+
+        chunk_size = options['chunk_size']
+        for course_key in course_keys:
+            # As strings, which the tasks can take as arguments
+            module_state_keys = [
+                unicode(module_state_key)
+                for module_state_key in StudentModule.all_submitted_problems_read_only(course_key).values_list(
+                    'module_state_key', flat=True
+                ).distinct()
+            ]
+            chunks = [
+                recompute_answer_distributions.subtask((unicode(course_key), module_state_keys[i:i + chunk_size]))
+                for i in xrange(0, len(module_state_keys), chunk_size)
+            ]
+            log.info(
+                u'Recomputing answer distributions of %d problems in %s with %d tasks.',
+                len(module_state_keys), course_key, len(chunks)
+            )
+            if options['sync']:
+                for chunk in chunks:
+                    chunk.apply()
+            else:
+                group(chunks).apply_async().join()
+            log.info(u'Recomputed answer distributions of %s.', course_key)
@@ -2,9 +2,15 @@
 Middleware for the courseware app
 """
 
+from django.conf import settings
+from django.db import connections
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
 
+import dogstats_wrapper as dog_stats_api
+from request_cache.middleware import RequestCache
+from xmodule.modulestore.split_mongo.split import DEFINITION_QUERIES_KEY
+
 from courseware.courses import UserNotEnrolled
 
 
@@ -22,3 +28,93 @@ class RedirectUnenrolledMiddleware(object):
                     args=[course_key.to_deprecated_string()]
                 )
             )
+
+
+class _CountingCursor(object):
+    """
+    Wraps a database cursor, counting the queries run through it in `counter`.
+    """
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def execute(self, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.counter.count += 1
+        return self.cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.counter.count += 1
+        return self.cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+
+class _QueryCounter(object):
+    """
+    Counts the queries made through the connections it's installed on, until
+    it's removed.
+    """
+    def __init__(self):
+        self.count = 0
+        self.connections = []
+
+    def install(self, connection):
+        """
+        Count the queries run through the cursors of `connection`.
+        """
+        cursor = connection.cursor
+        connection.cursor = lambda: _CountingCursor(cursor(), self)
+        self.connections.append(connection)
+
+    def remove(self):
+        """
+        Stop counting queries.
+        """
+        for connection in self.connections:
+            del connection.cursor
+        self.connections = []
+
+
+class QueryCountMiddleware(object):
+    """
+    Count the database queries made by the views named in
+    settings.QUERY_COUNT_VIEWS by their dotted paths (such as
+    'courseware.views.index'), and report them as the
+    `courseware.queries_per_page` histogram, tagged with the view.
+    The queries for split modulestore definitions made during the request are
+    reported as the `courseware.definition_queries_per_page` histogram.
+
+    Queries are counted by wrapping the cursors of the request's connections,
+    which doesn't record them the way Django's debug cursor does.
+    """
+    def process_view(self, request, view_func, _view_args, _view_kwargs):
+        view_name = u'{}.{}'.format(view_func.__module__, view_func.__name__)
+        if view_name not in getattr(settings, 'QUERY_COUNT_VIEWS', ()):
+            return None
+
+        request.query_counter = _QueryCounter()
+        for connection in connections.all():
+            request.query_counter.install(connection)
+        request.query_count_view = view_name
+        return None
+
+    def process_response(self, request, response):
+        query_counter = getattr(request, 'query_counter', None)
+        if query_counter is None:
+            return response
+
+        query_counter.remove()
+        del request.query_counter
+
+        tags = [u'view:{}'.format(request.query_count_view)]
+        dog_stats_api.histogram('courseware.queries_per_page', query_counter.count, tags=tags)
+        dog_stats_api.histogram(
+            'courseware.definition_queries_per_page',
+            RequestCache.get_request_cache().data.get(DEFINITION_QUERIES_KEY, 0),
+            tags=tags
+        )
+        return response
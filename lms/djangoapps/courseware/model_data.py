@@ -64,6 +64,10 @@ class FieldDataCache(object):
         self.cache = {}
         self.select_for_update = select_for_update
 
+        # Scopes whose rows for this user have all been loaded, so that
+        # descriptors added later need no queries for them.
+        self.preloaded_scopes = set()
+
         if asides is None:
             self.asides = []
         else:
@@ -81,6 +85,8 @@ class FieldDataCache(object):
         """
         if self.user.is_authenticated():
             for scope, fields in self._fields_to_cache(descriptors).items():
+                if scope in self.preloaded_scopes:
+                    continue
                 for field_object in self._retrieve_fields(scope, fields, descriptors):
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
 
@@ -142,6 +148,81 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
+    @classmethod
+    def cache_for_course(cls, course_id, user, select_for_update=False, asides=None):
+        """
+        Returns a FieldDataCache holding all of the user_state, preferences
+        and user_info rows that `user` has for `course_id`, loaded with one
+        query per scope.
+
+        Descriptors added to it afterwards (with `add_descriptors_to_cache`
+        or `add_descriptor_descendents`) only query for user_state_summary
+        fields, which aren't stored per user, so a single instance can serve
+        every module rendered or graded for the user in a request.
+        """
+        cache = cls([], course_id, user, select_for_update, asides=asides)
+        cache.preload_course()
+        return cache
+
+    def preload_course(self):
+        """
+        Load all of the user_state, preferences and user_info rows of this
+        cache's user for its course, and stop querying those scopes when
+        descriptors are added.
+        """
+        if not self.user.is_authenticated():
+            return
+
+        preloads = (
+            (Scope.user_state, self._query(StudentModule, course_id=self.course_id, student=self.user.pk)),
+            (Scope.preferences, self._query(XModuleStudentPrefsField, student=self.user.pk)),
+            (Scope.user_info, self._query(XModuleStudentInfoField, student=self.user.pk)),
+        )
+        for scope, field_objects in preloads:
+            for field_object in field_objects:
+                cache_key = self._cache_key_from_field_object(scope, field_object)
+                # Don't replace rows that were already loaded (and may have been changed)
+                self.cache.setdefault(cache_key, field_object)
+            self.preloaded_scopes.add(scope)
+
+    @property
+    def course_scoped(self):
+        """
+        True if this cache holds all of the user's StudentModules for the course.
+        """
+        return Scope.user_state in self.preloaded_scopes
+
+    def student_modules(self):
+        """
+        Return the StudentModules in this cache.
+        """
+        return [
+            field_object for cache_key, field_object in self.cache.iteritems()
+            if cache_key[0] == Scope.user_state
+        ]
+
+    @classmethod
+    def cache_for_student_modules(cls, course_id, user, descriptors, student_modules):
+        """
+        Returns a FieldDataCache for `descriptors` (not their descendents) that
+        uses the already loaded StudentModules of `user` in `student_modules`,
+        rather than querying them again. Fields in other scopes are queried
+        as usual.
+
+        This lets bulk operations over many students' state load it in batches.
+        """
+        cache = cls([], course_id, user)
+        for student_module in student_modules:
+            cache.cache[cache._cache_key_from_field_object(Scope.user_state, student_module)] = student_module
+
+        if user.is_authenticated():
+            for scope, fields in cache._fields_to_cache(descriptors).items():
+                if scope == Scope.user_state:
+                    continue
+                for field_object in cache._retrieve_fields(scope, fields, descriptors):
+                    cache.cache[cache._cache_key_from_field_object(scope, field_object)] = field_object
+        return cache
+
     def _query(self, model_class, **kwargs):
         """
         Queries model_class with **kwargs, optionally adding select_for_update if
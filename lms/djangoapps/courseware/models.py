@@ -12,15 +12,24 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+from collections import Counter
+import hashlib
+import json
+
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 
 from model_utils.models import TimeStampedModel
 
-from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
+from util.query import use_read_replica_if_available
+from xmodule_django.models import (  # pylint: disable=import-error
+    CourseKeyField, LocationKeyField, BlockTypeKeyField, UsageKeyField
+)
 
 
 class StudentModule(models.Model):
@@ -132,6 +141,61 @@ class StudentModuleHistory(models.Model):
             history_entry.save()
 
 
+# Sent with the StudentModules written by DeferredStudentModule.save_changed,
+# for which post_save isn't sent
+deferred_student_modules_saved = Signal(providing_args=["student_modules"])
+
+
+class DeferredStudentModule(StudentModule):
+    """
+    A StudentModule whose save() only marks it as changed.
+
+    Used by bulk operations such as rescoring, which change many rows, so that
+    changes can be written out together with `save_changed` rather than one
+    row (and one history entry) at a time, possibly several times per row.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        proxy = True
+
+    changed = False
+
+    def save(self, *args, **kwargs):  # pylint: disable=unused-argument
+        self.changed = True
+
+    @classmethod
+    def save_changed(cls, student_modules):
+        """
+        Write the state and grades of those `student_modules` which have
+        changed, and their history entries. Run this inside a transaction.
+        """
+        changed = [student_module for student_module in student_modules if student_module.changed]
+        modified = timezone.now()
+        for student_module in changed:
+            student_module.modified = modified
+            StudentModule.objects.filter(pk=student_module.pk).update(
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade,
+                modified=modified,
+            )
+            student_module.changed = False
+
+        StudentModuleHistory.objects.bulk_create([
+            StudentModuleHistory(
+                student_module_id=student_module.pk,
+                version=None,
+                created=modified,
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade,
+            )
+            for student_module in changed
+            if student_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+        ])
+        deferred_student_modules_saved.send(sender=cls, student_modules=changed)
+        return len(changed)
+
+
 class XBlockFieldBase(models.Model):
     """
     Base class for all XBlock field storage.
@@ -248,3 +312,241 @@ class StudentFieldOverride(TimeStampedModel):
 
     field = models.CharField(max_length=255)
     value = models.TextField(default='null')
+
+
+class StudentGradeSummary(TimeStampedModel):
+    """
+    Persisted per-section grading results for a student in a course.
+
+    `summary` holds a JSON dict keyed by section location; each entry keeps the
+    section's raw scores, its graded total and a fingerprint of the score inputs
+    it was computed from, so that `courseware.grades` only has to regrade the
+    sections whose inputs changed.  The whole row is disregarded when
+    `course_version` no longer matches the course's content and grading policy,
+    or once `valid_until` (the next start date that changes which blocks are
+    graded) has passed.
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    course_version = models.CharField(max_length=40)
+    valid_until = models.DateTimeField(null=True, blank=True)
+    summary = models.TextField(default='{}')
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id'),)
+
+    def __unicode__(self):
+        return "[StudentGradeSummary] %s: %s (%s)" % (self.user, self.course_id, self.course_version)
+
+
+class AnswerDistributionCount(models.Model):
+    """
+    The number of students whose latest submitted answer to a problem part is
+    `answer`.
+
+    These counts are kept up to date as students' problem state is saved, when
+    the ENABLE_ANSWER_DISTRIBUTION_AGGREGATE feature is on, so that the answer
+    distribution report doesn't have to read every student's state.  They can
+    be recomputed from the state, one problem at a time, with `recompute`.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = UsageKeyField(max_length=255, db_index=True)
+    problem_part_id = models.CharField(max_length=255)
+    # The answer itself can be too long to index
+    answer_hash = models.CharField(max_length=40)
+    answer = models.TextField()
+    count = models.IntegerField(default=0)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_id', 'module_state_key', 'problem_part_id', 'answer_hash'),)
+
+    @staticmethod
+    def submitted_answers(module_type, state, grade):
+        """
+        Return a dict mapping each problem part id to the answer submitted for
+        it, as unicode, in a StudentModule with the given type, state and
+        grade.  Only submitted problems, with a grade, count.
+
+        Raises ValueError if the state can't be parsed.
+        """
+        if module_type != 'problem' or grade is None or not state:
+            return {}
+        # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+        # to be unicode values. Note that if we get a string, it's always
+        # unicode and not str -- state comes from the json decoder, and that
+        # always returns unicode for strings.
+        return {
+            problem_part_id: unicode(raw_answer)
+            for problem_part_id, raw_answer in json.loads(state).get('student_answers', {}).iteritems()
+        }
+
+    @classmethod
+    def add(cls, course_id, module_state_key, answers, delta):
+        """
+        Add `delta` to the counts of `answers`, a dict mapping problem part ids
+        of the problem `module_state_key` to answers.
+        """
+        for problem_part_id, answer in answers.iteritems():
+            answer_hash = hashlib.sha1(answer.encode('utf-8')).hexdigest()
+            lookup = dict(
+                course_id=course_id,
+                module_state_key=module_state_key,
+                problem_part_id=problem_part_id,
+                answer_hash=answer_hash,
+            )
+            if cls.objects.filter(**lookup).update(count=F('count') + delta) or delta <= 0:
+                continue
+            __, created = cls.objects.get_or_create(defaults={'answer': answer, 'count': delta}, **lookup)
+            if not created:
+                # Another process created the row since we tried to update it
+                cls.objects.filter(**lookup).update(count=F('count') + delta)
+
+    @classmethod
+    def recompute(cls, course_id, module_state_key):
+        """
+        Replace the counts of the problem `module_state_key` by those of the
+        answers in its StudentModules, read from the read replica if there is one.
+
+        Answers saved while this runs may be counted twice, or not at all.
+        """
+        counts = Counter()
+        student_modules = use_read_replica_if_available(
+            StudentModule.objects.filter(
+                course_id=course_id,
+                module_state_key=module_state_key,
+                module_type='problem',
+                grade__isnull=False,
+            ).values_list('state', 'grade')
+        )
+        for state, grade in student_modules.iterator():
+            try:
+                counts.update(cls.submitted_answers('problem', state, grade).iteritems())
+            except ValueError:
+                continue
+
+        with transaction.commit_on_success():
+            cls.objects.filter(course_id=course_id, module_state_key=module_state_key).delete()
+            cls.objects.bulk_create([
+                cls(
+                    course_id=course_id,
+                    module_state_key=module_state_key,
+                    problem_part_id=problem_part_id,
+                    answer_hash=hashlib.sha1(answer.encode('utf-8')).hexdigest(),
+                    answer=answer,
+                    count=count,
+                )
+                for (problem_part_id, answer), count in counts.iteritems()
+            ])
+
+
+def _answer_distribution_enabled():
+    """
+    Whether answer distribution counts are kept up to date.
+    """
+    return settings.FEATURES.get('ENABLE_ANSWER_DISTRIBUTION_AGGREGATE', False)
+
+
+def _remember_stored_state(student_module):
+    """
+    Remember what of `student_module` is stored, so that its answers can be
+    taken out of the counts when it's next saved or deleted.
+    """
+    student_module.stored_state = (
+        student_module.course_id,
+        student_module.module_state_key,
+        student_module.state,
+        student_module.grade,
+    )
+
+
+def _answers(course_id, module_state_key, state, grade):
+    """
+    Return the answers that count for a problem's StudentModule with the
+    given state and grade, keyed by (course_id, module_state_key, problem part id).
+    """
+    try:
+        answers = AnswerDistributionCount.submitted_answers('problem', state, grade)
+    except ValueError:
+        return {}
+    return {
+        (course_id, module_state_key, problem_part_id): answer
+        for problem_part_id, answer in answers.iteritems()
+    }
+
+
+def _add_answers(answers, delta):
+    """
+    Add `delta` to the counts of `answers`, as returned by `_answers`.
+    """
+    by_problem = {}
+    for (course_id, module_state_key, problem_part_id), answer in answers.iteritems():
+        by_problem.setdefault((course_id, module_state_key), {})[problem_part_id] = answer
+    for (course_id, module_state_key), problem_answers in by_problem.iteritems():
+        AnswerDistributionCount.add(course_id, module_state_key, problem_answers, delta)
+
+
+def _move_answers(student_module, created=False):
+    """
+    Move the counts of a problem's StudentModule from the answers it was last
+    stored with to its current ones. StudentModules loaded before counts were
+    kept have no stored answers to take out.
+    """
+    stored_state = None if created else getattr(student_module, 'stored_state', None)
+    if student_module.module_type == 'problem':
+        old_answers = _answers(*stored_state) if stored_state is not None else {}
+        new_answers = _answers(
+            student_module.course_id, student_module.module_state_key, student_module.state, student_module.grade
+        )
+        _add_answers(
+            {key: answer for key, answer in old_answers.iteritems() if new_answers.get(key) != answer}, -1
+        )
+        _add_answers(
+            {key: answer for key, answer in new_answers.iteritems() if old_answers.get(key) != answer}, 1
+        )
+    _remember_stored_state(student_module)
+
+
+@receiver(post_init, sender=StudentModule)
+@receiver(post_init, sender=DeferredStudentModule)
+def remember_stored_state(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the state a StudentModule was loaded with.
+    """
+    if _answer_distribution_enabled():
+        _remember_stored_state(instance)
+
+
+@receiver(post_save, sender=StudentModule)
+def update_answer_distribution(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Move the counts of a saved StudentModule's answers from its old answers to
+    its new ones.
+    """
+    if _answer_distribution_enabled():
+        _move_answers(instance, created)
+
+
+@receiver(deferred_student_modules_saved)
+def update_deferred_answer_distribution(sender, student_modules, **kwargs):  # pylint: disable=unused-argument
+    """
+    Move the counts of StudentModules saved together, e.g. when rescoring,
+    from their old answers to their new ones.
+    """
+    if _answer_distribution_enabled():
+        for student_module in student_modules:
+            _move_answers(student_module)
+
+
+@receiver(post_delete, sender=StudentModule)
+def remove_answer_distribution(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Take a deleted StudentModule's answers out of the counts.
+    """
+    stored_state = getattr(instance, 'stored_state', None)
+    if instance.module_type == 'problem' and stored_state is not None and _answer_distribution_enabled():
+        _add_answers(_answers(*stored_state), -1)
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
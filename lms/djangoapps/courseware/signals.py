@@ -0,0 +1,78 @@
+"""
+Signal handlers discarding stored grade summaries when something they depend
+on, but which `courseware.grades` doesn't track, changes: a student's cohort,
+partition groups, or their individual due date extensions. (Course roles are
+also granted from Studio, where these handlers aren't installed, so they are
+part of the summaries' version key instead.)
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+
+from .models import StudentFieldOverride, StudentGradeSummary
+
+# The prefix of the UserCourseTag keys holding a student's partition groups.
+PARTITION_TAG_PREFIX = 'xblock.partition_service.partition_'
+
+
+def clear_grade_summaries(user_ids, course_key=None):
+    """
+    Delete the stored StudentGradeSummary rows of `user_ids`, in `course_key`
+    if given and otherwise in every course.
+    """
+    summaries = StudentGradeSummary.objects.filter(user_id__in=list(user_ids))
+    if course_key:
+        summaries = summaries.filter(course_id=course_key)
+    summaries.delete()
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def _cohort_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the summaries of students added to or removed from a group.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # `instance` is a user, and `pk_set` their groups.
+        if action == 'pre_clear':
+            groups = CourseUserGroup.objects.filter(users=instance)
+        else:
+            groups = CourseUserGroup.objects.filter(id__in=pk_set)
+        for course_key in set(groups.values_list('course_id', flat=True)):
+            clear_grade_summaries([instance.id], course_key)
+    else:
+        user_ids = instance.users.values_list('id', flat=True) if action == 'pre_clear' else pk_set
+        clear_grade_summaries(user_ids, instance.course_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def _cohort_partition_group_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the summaries of a cohort's students when the partition group it
+    is linked to changes.
+    """
+    cohort = instance.course_user_group
+    clear_grade_summaries(cohort.users.values_list('id', flat=True), cohort.course_id)
+
+
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+def _partition_tag_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard a student's summaries when they're assigned to another partition group.
+    """
+    if instance.key.startswith(PARTITION_TAG_PREFIX):
+        clear_grade_summaries([instance.user_id], instance.course_id)
+
+
+@receiver(post_save, sender=StudentFieldOverride)
+@receiver(post_delete, sender=StudentFieldOverride)
+def _student_override_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard a student's summary when their due dates are extended or reset.
+    """
+    clear_grade_summaries([instance.student_id], instance.course_id)
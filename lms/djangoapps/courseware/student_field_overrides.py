@@ -4,7 +4,7 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import FieldOverrideProvider, overrides_changed, overrides_generation
 from .models import StudentFieldOverride
 
 
@@ -17,6 +17,9 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def get_overrides(self, block):
+        return _get_block_overrides(self.user, block)
+
 
 def get_override_for_user(user, block, name, default=None):
     """
@@ -24,13 +27,22 @@ def get_override_for_user(user, block, name, default=None):
     specify the block and the name of the field.  If the field is not
     overridden for the given user, returns `default`.
     """
+    return _get_block_overrides(user, block).get(name, default)
+
+
+def _get_block_overrides(user, block):
+    """
+    Gets all of the individual student overrides for given user and block,
+    kept on the block once loaded until overrides change.
+    """
     if not hasattr(block, '_student_overrides'):
         block._student_overrides = {}  # pylint: disable=protected-access
-    overrides = block._student_overrides.get(user.id)  # pylint: disable=protected-access
-    if overrides is None:
+    generation, overrides = block._student_overrides.get(user.id, (None, None))  # pylint: disable=protected-access
+    if generation != overrides_generation():
+        generation = overrides_generation()
         overrides = _get_overrides_for_user(user, block)
-        block._student_overrides[user.id] = overrides  # pylint: disable=protected-access
-    return overrides.get(name, default)
+        block._student_overrides[user.id] = (generation, overrides)  # pylint: disable=protected-access
+    return overrides
 
 
 def _get_overrides_for_user(user, block):
@@ -65,6 +77,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    overrides_changed()
 
 
 def clear_override_for_user(user, block, name):
@@ -80,5 +93,6 @@ def clear_override_for_user(user, block, name):
             student_id=user.id,
             location=block.location,
             field=name).delete()
+        overrides_changed()
     except StudentFieldOverride.DoesNotExist:
         pass
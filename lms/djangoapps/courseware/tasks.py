@@ -0,0 +1,28 @@
+"""
+Asynchronous tasks for the courseware app.
+"""
+import logging
+
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from courseware.models import AnswerDistributionCount
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'courseware.tasks.recompute_answer_distributions')
+def recompute_answer_distributions(course_id, module_state_keys):
+    """
+    Recompute the answer distribution counts of the problems
+    `module_state_keys` in the course `course_id`.
+
+    The keys are passed as strings, so that the task's arguments can be
+    serialized, and so that a course's problems can be recomputed in chunks
+    by parallel tasks.
+    """
+    course_key = CourseKey.from_string(course_id)
+    for module_state_key in module_state_keys:
+        AnswerDistributionCount.recompute(course_key, UsageKey.from_string(module_state_key))
+    log.info(u'Recomputed answer distributions of %d problems in %s', len(module_state_keys), course_id)
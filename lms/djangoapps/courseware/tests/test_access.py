@@ -170,6 +170,30 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         mock_unit.visible_to_staff_only = False
         self.verify_access(mock_unit, False)
 
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    @patch('courseware.access.get_current_request_hostname', Mock(return_value='localhost'))
+    def test_block_load_access(self):
+        """
+        Tests that BlockLoadAccess decides as _has_access_descriptor does.
+        """
+        course = Mock(id=self.course.course_key, user_partitions=[])
+        now = datetime.datetime.now(pytz.utc)
+        for visible_to_staff_only in (True, False):
+            for start in (None, now - datetime.timedelta(days=1), now + datetime.timedelta(days=1)):
+                access_fields = {
+                    'visible_to_staff_only': visible_to_staff_only,
+                    'group_access': {},
+                    'start': start,
+                    'days_early_for_beta': None,
+                }
+                mock_unit = Mock(user_partitions=[], merged_group_access={}, days_early_for_beta=None, **access_fields)
+                mock_unit._class_tags = {}  # Needed for detached check in _has_access_descriptor
+                for user in (self.anonymous_user, self.course_staff):
+                    self.assertEqual(
+                        access.BlockLoadAccess(user, course).can_load(access_fields),
+                        access._has_access_descriptor(user, 'load', mock_unit, course_key=self.course.course_key)
+                    )
+
     @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
     @patch('courseware.access.get_current_request_hostname', Mock(return_value='preview.localhost'))
     def test__has_access_descriptor_in_preview_mode(self):
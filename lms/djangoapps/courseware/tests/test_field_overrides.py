@@ -1,6 +1,7 @@
 """
 Tests for `field_overrides` module.
 """
+import threading
 import unittest
 from nose.plugins.attrib import attr
 
@@ -12,6 +13,8 @@ from ..field_overrides import (
     disable_overrides,
     FieldOverrideProvider,
     OverrideFieldData,
+    overrides_changed,
+    overrides_generation,
     resolve_dotted,
 )
 
@@ -91,6 +94,66 @@ class OverrideFieldDataTests(TestCase):
         self.assertIsInstance(data, DictFieldData)
 
 
+class FakeBlock(object):
+    """
+    Just enough of a block to resolve inherited overrides for.
+    """
+    def __init__(self, parent=None, **overrides):
+        self.parent = parent
+        self.overrides = overrides
+        self._field_data = OverrideFieldData.wrap(TESTUSER, DictFieldData({}))
+
+    def get_parent(self):  # pylint: disable=missing-docstring
+        return self.parent
+
+
+@attr('shard_1')
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'courseware.tests.test_field_overrides.BulkOverrideProvider',))
+class InheritedOverrideTests(TestCase):
+    """
+    Tests for the resolution of overrides set on ancestors.
+    """
+
+    def setUp(self):
+        super(InheritedOverrideTests, self).setUp()
+        OverrideFieldData.provider_classes = None
+        BulkOverrideProvider.blocks_loaded = 0
+        self.root = FakeBlock(due='tomorrow')
+        self.parent = FakeBlock(self.root)
+        self.children = [FakeBlock(self.parent) for __ in range(3)]
+
+    def tearDown(self):
+        super(InheritedOverrideTests, self).tearDown()
+        OverrideFieldData.provider_classes = None
+
+    def test_inherited(self):
+        for child in self.children:
+            self.assertFalse(child._field_data.has(child, 'due'))  # pylint: disable=protected-access
+            self.assertEqual(child._field_data.default(child, 'due'), 'tomorrow')  # pylint: disable=protected-access
+        self.assertTrue(self.root._field_data.has(self.root, 'due'))  # pylint: disable=protected-access
+
+        # The overrides of each block were only loaded once
+        self.assertEqual(BulkOverrideProvider.blocks_loaded, 5)
+
+    def test_overrides_changed(self):
+        child = self.children[0]
+        self.assertEqual(child._field_data.default(child, 'due'), 'tomorrow')  # pylint: disable=protected-access
+
+        self.parent.overrides['due'] = 'today'
+        overrides_changed()
+
+        self.assertEqual(child._field_data.default(child, 'due'), 'today')  # pylint: disable=protected-access
+
+    def test_overrides_changed_in_other_thread(self):
+        generation = overrides_generation()
+        thread = threading.Thread(target=overrides_changed)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(overrides_generation(), generation)
+
+
 @attr('shard_1')
 class ResolveDottedTests(unittest.TestCase):
     """
@@ -124,3 +187,18 @@ class TestOverrideProvider(FieldOverrideProvider):
         if name == 'oh':
             return 'man'
         return default
+
+
+class BulkOverrideProvider(FieldOverrideProvider):
+    """
+    A `FieldOverrideProvider` for testing, which finds all of a block's
+    overrides at once.
+    """
+    blocks_loaded = 0
+
+    def get(self, block, name, default):
+        return block.overrides.get(name, default)
+
+    def get_overrides(self, block):
+        BulkOverrideProvider.blocks_loaded += 1
+        return dict(block.overrides)
@@ -1,18 +1,26 @@
 """
 Test grade calculation.
 """
+from django.conf import settings
 from django.http import Http404
+from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from courseware import grades
+from courseware.grades import grade, iterate_grades_for, prefetch_student_scores
+from courseware.models import StudentFieldOverride, StudentGradeSummary, StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
+from student.roles import CourseStaffRole
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -23,7 +31,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 @attr('shard_1')
@@ -121,3 +129,224 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@attr('shard_1')
+class TestBatchedGradeIteration(ModuleStoreTestCase):
+    """
+    Test that grading students in batches gives the same results as grading
+    them one at a time.
+    """
+    def setUp(self):
+        super(TestBatchedGradeIteration, self).setUp()
+
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        self.sections = []
+        self.problems = []
+        for index in range(2):
+            section = ItemFactory.create(
+                parent_location=chapter.location,
+                category='sequential',
+                metadata={'graded': True, 'format': 'Homework'},
+                display_name='Homework {}'.format(index),
+            )
+            self.problems.append(ItemFactory.create(
+                parent_location=section.location,
+                category='problem',
+                display_name='Problem {}'.format(index),
+            ))
+            self.sections.append(section)
+        self.course = self.store.get_course(self.course.id)
+
+        self.students = [UserFactory.create() for __ in range(5)]
+        # First student got everything right, second student only attempted
+        # the first problem, and the rest never showed up.
+        for problem in self.problems:
+            self._add_score(self.students[0], problem, 1, 1)
+        self._add_score(self.students[1], self.problems[0], 0, 1)
+
+    def _add_score(self, student, problem, grade_value, max_grade):
+        """Store a StudentModule row holding the given grade."""
+        StudentModuleFactory.create(
+            student=student,
+            course_id=self.course.id,
+            module_state_key=problem.location,
+            grade=grade_value,
+            max_grade=max_grade,
+        )
+
+    def test_prefetch_student_scores(self):
+        prefetched = prefetch_student_scores(self.course, self.students)
+        self.assertEqual(len(prefetched[self.students[0].id].student_modules), 2)
+        self.assertEqual(len(prefetched[self.students[1].id].student_modules), 1)
+        self.assertEqual(prefetched[self.students[2].id].student_modules, {})
+
+    def test_batched_matches_unbatched(self):
+        unbatched = list(iterate_grades_for(self.course, self.students))
+        batched = list(iterate_grades_for(self.course, self.students, batch_size=2))
+        self.assertEqual(len(batched), len(self.students))
+        for (student, gradeset, err_msg), (batch_student, batch_gradeset, batch_err_msg) in zip(unbatched, batched):
+            self.assertEqual(student, batch_student)
+            self.assertEqual(err_msg, batch_err_msg)
+            self.assertEqual(gradeset['percent'], batch_gradeset['percent'])
+            self.assertEqual(gradeset['grade'], batch_gradeset['grade'])
+            self.assertEqual(gradeset['section_breakdown'], batch_gradeset['section_breakdown'])
+            self.assertEqual(gradeset['totaled_scores'], batch_gradeset['totaled_scores'])
+        self.assertGreater(batched[0][1]['percent'], batched[1][1]['percent'])
+
+    def test_definitions_prefetched_once(self):
+        with patch.object(
+            self.store, 'prefetch_definitions', wraps=self.store.prefetch_definitions
+        ) as mock_prefetch:
+            list(iterate_grades_for(self.course, self.students, batch_size=2))
+        mock_prefetch.assert_called_once_with(self.course.location)
+
+    def test_single_student_prefetches_graded_sections(self):
+        # The second student only attempted the first section's problem.
+        student = self.students[1]
+        request = RequestFactory().get('/')
+        request.user = student
+        request.session = {}
+        with patch.object(
+            self.store, 'prefetch_definitions', wraps=self.store.prefetch_definitions
+        ) as mock_prefetch:
+            grade(student, request, self.course)
+        mock_prefetch.assert_called_once_with(self.sections[0].location)
+
+    def test_prefetched_grading_skips_student_module_queries(self):
+        student = self.students[0]
+        prefetched = prefetch_student_scores(self.course, [student])
+        request = RequestFactory().get('/')
+        request.user = student
+        request.session = {}
+        with patch('courseware.grades.StudentModule') as mock_student_module:
+            gradeset = grade(student, request, self.course, prefetched_scores=prefetched[student.id])
+        self.assertFalse(mock_student_module.objects.filter.called)
+        self.assertFalse(mock_student_module.objects.get.called)
+        self.assertGreater(gradeset['percent'], 0)
+
+
+@attr('shard_1')
+@patch.dict(settings.FEATURES, {'PERSISTENT_GRADE_SUMMARIES': True})
+class TestPersistentGradeSummary(ModuleStoreTestCase):
+    """
+    Test that stored grade summaries are reused, and only regraded where
+    the scores they depend on changed.
+    """
+    def setUp(self):
+        super(TestPersistentGradeSummary, self).setUp()
+
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        self.problems = []
+        for index in range(2):
+            section = ItemFactory.create(
+                parent_location=chapter.location,
+                category='sequential',
+                metadata={'graded': True, 'format': 'Homework'},
+                display_name='Homework {}'.format(index),
+            )
+            self.problems.append(ItemFactory.create(
+                parent_location=section.location,
+                category='problem',
+                display_name='Problem {}'.format(index),
+            ))
+        self.course = self.store.get_course(self.course.id)
+
+        self.student = UserFactory.create()
+        for problem in self.problems:
+            StudentModuleFactory.create(
+                student=self.student,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                grade=0,
+                max_grade=1,
+            )
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _grade(self):
+        """Grade the student, returning the gradeset and the number of sections regraded."""
+        with patch('courseware.grades._grade_section', wraps=grades._grade_section) as mock_grade_section:
+            gradeset = grade(self.student, self.request, self.course)
+        return gradeset, mock_grade_section.call_count
+
+    def test_summary_reused(self):
+        gradeset, regraded = self._grade()
+        self.assertEqual(regraded, 2)
+        self.assertTrue(StudentGradeSummary.objects.filter(user=self.student, course_id=self.course.id).exists())
+
+        cached_gradeset, regraded = self._grade()
+        self.assertEqual(regraded, 0)
+        self.assertEqual(cached_gradeset['percent'], gradeset['percent'])
+        self.assertEqual(cached_gradeset['totaled_scores'], gradeset['totaled_scores'])
+
+    def test_score_change_regrades_one_section(self):
+        gradeset, __ = self._grade()
+        StudentModule.objects.filter(
+            student=self.student, module_state_key=self.problems[1].location
+        ).update(grade=1)
+
+        new_gradeset, regraded = self._grade()
+        self.assertEqual(regraded, 1)
+        self.assertGreater(new_gradeset['percent'], gradeset['percent'])
+        with patch.dict(settings.FEATURES, {'PERSISTENT_GRADE_SUMMARIES': False}):
+            uncached_gradeset = grade(self.student, self.request, self.course)
+        self.assertEqual(new_gradeset['percent'], uncached_gradeset['percent'])
+        self.assertEqual(new_gradeset['section_breakdown'], uncached_gradeset['section_breakdown'])
+
+    def test_course_version_change_regrades_everything(self):
+        self._grade()
+        StudentGradeSummary.objects.filter(user=self.student).update(course_version='outdated')
+        __, regraded = self._grade()
+        self.assertEqual(regraded, 2)
+
+    def test_published_edit_regrades_everything(self):
+        self._grade()
+        problem = self.store.get_item(self.problems[0].location)
+        problem.weight = 5
+        self.store.update_item(problem, ModuleStoreEnum.UserID.test)
+        self.store.publish(problem.location, ModuleStoreEnum.UserID.test)
+        self.course = self.store.get_course(self.course.id)
+
+        __, regraded = self._grade()
+        self.assertEqual(regraded, 2)
+
+    def test_unversioned_course_is_not_stored(self):
+        with patch('courseware.grades.get_course_version', return_value=None):
+            __, regraded = self._grade()
+            self.assertEqual(regraded, 2)
+            __, regraded = self._grade()
+            self.assertEqual(regraded, 2)
+        self.assertFalse(StudentGradeSummary.objects.filter(user=self.student).exists())
+
+    def test_access_change_regrades_everything(self):
+        self._grade()
+        CourseStaffRole(self.course.id).add_users(self.student)
+        __, regraded = self._grade()
+        self.assertEqual(regraded, 2)
+
+        self.student.is_staff = True
+        self.student.save()
+        __, regraded = self._grade()
+        self.assertEqual(regraded, 2)
+
+    def test_cohort_change_discards_summary(self):
+        self._grade()
+        cohort = CohortFactory(course_id=self.course.id)
+        cohort.users.add(self.student)
+        self.assertFalse(StudentGradeSummary.objects.filter(user=self.student).exists())
+
+        self._grade()
+        self.student.course_groups.remove(cohort)
+        self.assertFalse(StudentGradeSummary.objects.filter(user=self.student).exists())
+
+    def test_due_date_extension_discards_summary(self):
+        self._grade()
+        StudentFieldOverride.objects.create(
+            course_id=self.course.id, location=self.problems[0].location, student=self.student, field='due'
+        )
+        self.assertFalse(StudentGradeSummary.objects.filter(user=self.student).exists())
@@ -2,14 +2,20 @@
 Tests for courseware middleware
 """
 
+from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
 from django.test.client import RequestFactory
-from django.http import Http404
-from mock import patch
+from django.test.utils import override_settings
+from django.http import Http404, HttpResponse
+from mock import call, patch
 from nose.plugins.attrib import attr
 
 import courseware.courses as courses
-from courseware.middleware import RedirectUnenrolledMiddleware
+from courseware.middleware import QueryCountMiddleware, RedirectUnenrolledMiddleware
+from request_cache.middleware import RequestCache
+from xmodule.modulestore.split_mongo.split import DEFINITION_QUERIES_KEY
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -52,3 +58,61 @@ class CoursewareMiddlewareTestCase(ModuleStoreTestCase):
             request, Http404()
         )
         self.assertIsNone(response)
+
+
+def progress(_request):
+    """A view making two queries"""
+    assert not connection.use_debug_cursor
+    User.objects.count()
+    User.objects.count()
+    return HttpResponse()
+
+
+@attr('shard_1')
+@override_settings(QUERY_COUNT_VIEWS=('courseware.tests.test_middleware.progress',))
+@patch('courseware.middleware.dog_stats_api')
+class QueryCountMiddlewareTestCase(TestCase):
+    """Tests for counting the queries made by views"""
+
+    def setUp(self):
+        super(QueryCountMiddlewareTestCase, self).setUp()
+        RequestCache().clear_request_cache()
+
+    def run_view(self, view):
+        """Run `view` through QueryCountMiddleware"""
+        middleware = QueryCountMiddleware()
+        request = RequestFactory().get("dummy_url")
+        middleware.process_view(request, view, [], {})
+        return middleware.process_response(request, view(request))
+
+    def test_counts_queries(self, mock_dog_stats_api):
+        self.run_view(progress)
+        self.assertEqual(mock_dog_stats_api.histogram.call_args_list, [
+            call('courseware.queries_per_page', 2, tags=[u'view:courseware.tests.test_middleware.progress']),
+            call('courseware.definition_queries_per_page', 0, tags=[u'view:courseware.tests.test_middleware.progress']),
+        ])
+
+    def test_counts_definition_queries(self, mock_dog_stats_api):
+        RequestCache.get_request_cache().data[DEFINITION_QUERIES_KEY] = 3
+        self.run_view(progress)
+        mock_dog_stats_api.histogram.assert_any_call(
+            'courseware.definition_queries_per_page', 3, tags=[u'view:courseware.tests.test_middleware.progress']
+        )
+
+    def test_other_views(self, mock_dog_stats_api):
+        def other_view(request):  # pylint: disable=missing-docstring
+            return progress(request)
+        self.run_view(other_view)
+        self.assertFalse(mock_dog_stats_api.histogram.called)
+
+    def test_views_with_same_name_in_other_modules(self, mock_dog_stats_api):
+        def view(request):  # pylint: disable=missing-docstring
+            return progress(request)
+        view.__name__ = 'progress'
+        view.__module__ = 'courseware.tests.other_module'
+        self.run_view(view)
+        self.assertFalse(mock_dog_stats_api.histogram.called)
+
+    def test_stops_counting(self, _mock_dog_stats_api):
+        self.run_view(progress)
+        self.assertNotIn('cursor', connection.__dict__)
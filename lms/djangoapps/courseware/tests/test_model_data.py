@@ -8,7 +8,7 @@ from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import DeferredStudentModule, StudentModule, StudentModuleHistory
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -210,6 +210,89 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
 
+@attr('shard_1')
+class TestCourseFieldDataCache(TestCase):
+    """Tests for FieldDataCaches holding all of a user's state in a course"""
+
+    def setUp(self):
+        super(TestCourseFieldDataCache, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+        StudentPrefsFactory(student=self.user)
+        StudentInfoFactory(student=self.user)
+
+    def test_fixed_number_of_queries(self):
+        # One query for each of user_state, preferences and user_info
+        with self.assertNumQueries(3):
+            field_data_cache = FieldDataCache.cache_for_course(course_id, self.user)
+        self.assertTrue(field_data_cache.course_scoped)
+        self.assertEqual(len(field_data_cache.student_modules()), 1)
+
+        descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.user_info, 'existing_field'),
+        ])
+        kvs = DjangoKeyValueStore(field_data_cache)
+        with self.assertNumQueries(0):
+            field_data_cache.add_descriptors_to_cache([descriptor])
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertEquals('old_value', kvs.get(prefs_key('existing_field')))
+            self.assertEquals('old_value', kvs.get(user_info_key('existing_field')))
+            self.assertFalse(kvs.has(prefs_key('other_field')))
+
+    def test_user_state_summary_is_queried(self):
+        field_data_cache = FieldDataCache.cache_for_course(course_id, self.user)
+        with self.assertNumQueries(1):
+            field_data_cache.add_descriptors_to_cache([mock_descriptor([
+                mock_field(Scope.user_state, 'a_field'),
+                mock_field(Scope.user_state_summary, 'a_field'),
+            ])])
+
+
+@attr('shard_1')
+class TestDeferredStudentModuleStorage(TestCase):
+    """Tests for user_state storage in preloaded DeferredStudentModules"""
+
+    def setUp(self):
+        super(TestDeferredStudentModuleStorage, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.student_module = DeferredStudentModule.objects.get(pk=student_module.pk)
+
+        # The StudentModule is already loaded, so nothing needs to be queried
+        with self.assertNumQueries(0):
+            self.field_data_cache = FieldDataCache.cache_for_student_modules(
+                course_id, self.user, [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], [self.student_module]
+            )
+
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_get_existing_field(self):
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
+
+    def test_saves_are_deferred(self):
+        with self.assertNumQueries(0):
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.assertEquals(json.loads(StudentModule.objects.get(pk=self.student_module.pk).state)['a_field'], 'a_value')
+
+        self.student_module.grade = 1
+        self.student_module.max_grade = 2
+        self.assertEquals(DeferredStudentModule.save_changed([self.student_module]), 1)
+
+        saved = StudentModule.objects.get(pk=self.student_module.pk)
+        self.assertEquals(json.loads(saved.state)['a_field'], 'new_value')
+        self.assertEquals((saved.grade, saved.max_grade), (1, 2))
+        history = StudentModuleHistory.objects.filter(student_module=saved)
+        self.assertEquals(history.count(), 1)
+        self.assertEquals(history[0].grade, 1)
+
+        # Nothing has changed since
+        self.assertEquals(DeferredStudentModule.save_changed([self.student_module]), 0)
+
+
 @attr('shard_1')
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -18,7 +18,7 @@ from capa.tests.response_xml_factory import (
     CodeResponseXMLFactory,
 )
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import AnswerDistributionCount, DeferredStudentModule, StudentModule
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from student.tests.factories import UserFactory
@@ -1053,6 +1053,48 @@ class TestAnswerDistributions(TestSubmittingProblems):
             )
 
 
+@attr('shard_1')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_ANSWER_DISTRIBUTION_AGGREGATE': True})
+class TestAnswerDistributionCounts(TestAnswerDistributions):
+    """Check that answer distributions are right when read from the stored counts."""
+
+    def test_recompute(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        distributions = grades.answer_distributions(self.course.id)
+
+        AnswerDistributionCount.objects.all().delete()
+        for student_module in StudentModule.objects.filter(course_id=self.course.id):
+            AnswerDistributionCount.recompute(self.course.id, student_module.module_state_key)
+
+        self.assertEqual(grades.answer_distributions(self.course.id), distributions)
+
+    def test_deferred_save(self):
+        # Rescoring saves StudentModules through DeferredStudentModule.save_changed
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        student_module = DeferredStudentModule.objects.get(course_id=self.course.id, student=self.student_user)
+        state = json.loads(student_module.state)
+        state["student_answers"]['{}_2_1'.format(self.p1_html_id)] = u'Incorrect'
+        student_module.state = json.dumps(state)
+        student_module.save()
+        DeferredStudentModule.save_changed([student_module])
+
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', '{}_2_1'.format(self.p1_html_id)): {
+                    'Incorrect': 1
+                },
+            }
+        )
+
+    def test_deleted_state(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        StudentModule.objects.filter(course_id=self.course.id).delete()
+
+        self.assertFalse(grades.answer_distributions(self.course.id))
+
+
 @attr('shard_1')
 class TestConditionalContent(TestSubmittingProblems):
     """
@@ -400,8 +400,10 @@ def _index_bulk_op(request, course_key, chapter, section, position):
     masquerade = setup_masquerade(request, course_key, staff_access)
 
     try:
-        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-            course_key, user, course, depth=2)
+        # All of the user's state in the course is loaded up front, so adding
+        # the descriptors of the section below doesn't query it again.
+        field_data_cache = FieldDataCache.cache_for_course(course_key, user)
+        field_data_cache.add_descriptor_descendents(course, depth=2)
 
         course_module = get_module_for_descriptor(user, request, course, field_data_cache, course_key)
         if course_module is None:
@@ -511,6 +513,8 @@ def _index_bulk_op(request, course_key, chapter, section, position):
             # cdodge: this looks silly, but let's refetch the section_descriptor with depth=None
             # which will prefetch the children more efficiently than doing a recursive load
             section_descriptor = modulestore().get_item(section_descriptor.location, depth=None)
+            # and load the content of all of them with one query, rather than one per block
+            modulestore().prefetch_definitions(section_descriptor.location)
 
             # Load all descendants of the section, because we're going to display its
             # html, which in general will need all of its children
@@ -1064,9 +1068,12 @@ def _progress(request, course_key, student_id):
     # additional DB lookup (this kills the Progress page in particular).
     student = User.objects.prefetch_related("groups").get(id=student.id)
 
-    courseware_summary = grades.progress_summary(student, request, course)
+    # Load all of the student's state for the course at once, and share it
+    # between the summary and the grading.
+    field_data_cache = FieldDataCache.cache_for_course(course_key, student)
+    courseware_summary = grades.progress_summary(student, request, course, field_data_cache)
     studio_url = get_studio_url(course, 'settings/grading')
-    grade_summary = grades.grade(student, request, course)
+    grade_summary = grades.grade(student, request, course, field_data_cache=field_data_cache)
 
     if courseware_summary is None:
         #This means the student didn't have access to the course (which the instructor requested)
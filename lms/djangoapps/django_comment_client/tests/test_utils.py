@@ -21,6 +21,7 @@ import django_comment_client.utils as utils
 from courseware.tests.factories import InstructorFactory
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_settings
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
@@ -723,6 +724,26 @@ class CategoryMapTestCase(CategoryMapTestMixin, ModuleStoreTestCase):
             }
         )
 
+    def test_discussion_index_is_cached(self):
+        self.create_discussion("Chapter", "Discussion")
+        store = modulestore()
+        self.course = store.get_course(self.course.id)
+        index = utils.get_discussion_index(self.course)
+        self.assertEqual([entry.discussion_id for entry in index], ["discussion1"])
+
+        with mock.patch.object(store, 'get_items', wraps=store.get_items) as get_items:
+            self.assertEqual(utils.get_discussion_index(self.course), index)
+            self.assertFalse(get_items.called)
+
+            # Editing the course makes a new version of it, whose index is rebuilt
+            self.create_discussion("Chapter", "Discussion 2")
+            self.course = store.get_course(self.course.id)
+            self.assertItemsEqual(
+                [entry.discussion_id for entry in utils.get_discussion_index(self.course)],
+                ["discussion1", "discussion2"]
+            )
+            self.assertTrue(get_items.called)
+
     def test_ids_empty(self):
         self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), [])
 
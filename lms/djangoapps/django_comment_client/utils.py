@@ -1,10 +1,12 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from datetime import datetime
+import hashlib
 import json
 import logging
 
 import pytz
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
@@ -12,13 +14,13 @@ from django.utils.timezone import UTC
 import pystache_custom as pystache
 from opaque_keys.edx.locations import i4xEncoder
 from opaque_keys.edx.keys import CourseKey
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import get_course_version, modulestore
 
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, cached_has_permission
 from edxmako import lookup_template
 
-from courseware.access import has_access
+from courseware.access import BlockLoadAccess, get_load_access_fields
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_commentable_cohorted, is_course_cohorted
 )
@@ -27,6 +29,15 @@ from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 
 log = logging.getLogger(__name__)
 
+# How long the discussion index of a course version is cached for
+DISCUSSION_INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+
+# What the discussion index keeps about an inline discussion module. The names
+# are those of the module's attributes, so that entries can stand in for modules.
+DiscussionIndexEntry = namedtuple('DiscussionIndexEntry', [
+    'location', 'discussion_id', 'discussion_category', 'discussion_target', 'sort_key', 'start', 'access_fields',
+])
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -61,24 +72,58 @@ def has_forum_access(uname, course_id, rolename):
     return role.users.filter(username=uname).exists()
 
 
+def get_discussion_index(course):
+    """
+    Return the discussion index of `course`: a DiscussionIndexEntry for each
+    valid discussion module in it.
+
+    The index is cached by the course's published version, so that the
+    discussion modules are only loaded once per version of the course.
+    """
+    course_key = course.id
+    course_version = get_course_version(course)
+    cache_key = u'django_comment_client.discussion_index.{}'.format(
+        hashlib.sha1(json.dumps([unicode(course_key), course_version])).hexdigest()
+    )
+
+    index = cache.get(cache_key) if course_version is not None else None
+    if index is None:
+        def has_required_keys(module):
+            for key in ('discussion_id', 'discussion_category', 'discussion_target'):
+                if getattr(module, key, None) is None:
+                    log.warning("Required key '%s' not in discussion %s, leaving out of category map" % (key, module.location))
+                    return False
+            return True
+
+        index = [
+            DiscussionIndexEntry(
+                location=module.location,
+                discussion_id=module.discussion_id,
+                discussion_category=module.discussion_category,
+                discussion_target=module.discussion_target,
+                sort_key=module.sort_key,
+                start=module.start,
+                access_fields=get_load_access_fields(module),
+            )
+            for module in modulestore().get_items(course_key, qualifiers={'category': 'discussion'})
+            if has_required_keys(module)
+        ]
+        if course_version is not None:
+            cache.set(cache_key, index, DISCUSSION_INDEX_CACHE_TIMEOUT)
+    return index
+
+
 def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
     """
-    Return a list of all valid discussion modules in this course that
-    are accessible to the given user.
+    Return the DiscussionIndexEntry of each valid discussion module in this
+    course that is accessible to the given user.
     """
-    all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
-
-    def has_required_keys(module):
-        for key in ('discussion_id', 'discussion_category', 'discussion_target'):
-            if getattr(module, key, None) is None:
-                log.warning("Required key '%s' not in discussion %s, leaving out of category map" % (key, module.location))
-                return False
-        return True
-
-    return [
-        module for module in all_modules
-        if has_required_keys(module) and (include_all or has_access(user, 'load', module, course.id))
-    ]
+    index = get_discussion_index(course)
+    if include_all:
+        return index
+
+    load_access = BlockLoadAccess(user, course)
+    return [entry for entry in index if load_access.can_load(entry.access_fields)]
 
 
 def get_discussion_id_map(course, user):
@@ -251,6 +251,18 @@ class TestSetDueDateExtension(ModuleStoreTestCase):
         self.assertEqual(self.homework.due, extended)
         self.assertEqual(self.assignment.due, extended)
 
+    def test_change_due_date_extension(self):
+        extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        tools.set_due_date_extension(self.course, self.week1, self.user, extended)
+        self._clear_field_data_cache()
+        self.assertEqual(self.assignment.due, extended)
+
+        extended_again = datetime.datetime(2013, 12, 31, 0, 0, tzinfo=utc)
+        tools.set_due_date_extension(self.course, self.week1, self.user, extended_again)
+        self._clear_field_data_cache()
+        self.assertEqual(self.week1.due, extended_again)
+        self.assertEqual(self.assignment.due, extended_again)
+
     def test_set_due_date_extension_num_queries(self):
         extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
         with self.assertNumQueries(4):
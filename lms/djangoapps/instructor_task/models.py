@@ -18,8 +18,10 @@ from uuid import uuid4
 import csv
 import json
 import hashlib
+import os
 import os.path
 import urllib
+import zlib
 
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
@@ -190,13 +192,98 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class _ChunkBuffer(object):
+    """
+    Minimal write-only file object that collects written data until it is
+    drained. Used as the target of a GzipFile so that compressed output can
+    be handed off in pieces instead of accumulating in one buffer.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        """Collect `data`."""
+        self.chunks.append(data)
+        self.size += len(data)
+
+    def flush(self):
+        """Nothing to flush; data is held until `drain()` is called."""
+        pass
+
+    def drain(self):
+        """Return everything written since the last drain, and reset."""
+        data = ''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def _iter_lines(chunks):
+    """
+    Given an iterable of byte strings, yield the complete lines they contain
+    (line endings included), so that they can be fed to `csv.reader`.
+
+    A last line ending in a carriage return is held back until the next chunk,
+    in case that chunk starts with the line feed of a CRLF split between them.
+    """
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(True)
+        if lines and not lines[-1].endswith('\n'):
+            pending = lines.pop()
+        else:
+            pending = ''
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _gunzip_chunks(chunks):
+    """
+    Given an iterable of byte strings making up a gzip stream, yield the
+    decompressed data piece by piece.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download.
+
+    `store_rows` consumes its rows lazily and writes them out in chunks, so
+    callers can pass a generator and keep memory usage flat regardless of the
+    size of the report. Reports built in pieces (e.g. by several subtasks) can
+    be written as partial files with `partial_filename`; these are read back
+    with `read_rows`, are never returned by `links_for`, and should be removed
+    with `delete` once they have been merged into the final report.
     """
+    # Suffix used to name the partial files that make up a report while it
+    # is being generated.
+    PARTIAL_SUFFIX = '.part'
+
+    @classmethod
+    def partial_filename(cls, filename, index):
+        """
+        Return the name to use for the `index`th partial file of `filename`.
+        """
+        return u"{}.{:05d}{}".format(filename, index, cls.PARTIAL_SUFFIX)
+
+    @classmethod
+    def is_partial(cls, filename):
+        """Return whether `filename` names a partial report file."""
+        return filename.endswith(cls.PARTIAL_SUFFIX)
+
     @classmethod
     def from_config(cls):
         """
@@ -218,6 +305,14 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_unicode_rows(self, lines):
+        """
+        Given an iterable of utf-8 encoded CSV `lines`, yield each row as a
+        list of unicode strings.
+        """
+        for row in csv.reader(lines):
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -231,6 +326,10 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # Size of the parts used for multipart uploads. S3 requires every part
+    # but the last to be at least 5MB.
+    MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -308,19 +407,65 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file.
+
+        Rows are consumed lazily. Small reports are stored with a single
+        `store()`; once the compressed output grows past
+        `MULTIPART_CHUNK_SIZE` it is sent as a multipart upload, one part at a
+        time, so only one part is ever held in memory. S3 does not expose the
+        object until the upload completes, so readers never see partial files.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
+        output_buffer = _ChunkBuffer()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        multipart_upload = None
+        part_num = 0
+
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.size >= self.MULTIPART_CHUNK_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            self.key_for(course_id, filename).key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+                        )
+                    part_num += 1
+                    multipart_upload.upload_part_from_file(StringIO(output_buffer.drain()), part_num)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, StringIO(output_buffer.drain()))
+            else:
+                part_num += 1
+                multipart_upload.upload_part_from_file(StringIO(output_buffer.drain()), part_num)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of a csv file previously written with `store_rows`,
+        each as a list of unicode strings. The file is streamed from S3 and
+        decompressed as it is read.
+        """
+        key = self.bucket.get_key(self.key_for(course_id, filename).key)
+        if key is None:
+            raise IOError(u"No report named {} for course {}".format(filename, course_id))
+        return self._get_unicode_rows(_iter_lines(_gunzip_chunks(key)))
 
-        self.store(course_id, filename, output_buffer)
+    def exists(self, course_id, filename):
+        """Return whether `filename` has been stored for `course_id`."""
+        return self.bucket.get_key(self.key_for(course_id, filename).key) is not None
+
+    def delete(self, course_id, filename):
+        """Remove `filename` for `course_id`, if it exists."""
+        self.bucket.delete_key(self.key_for(course_id, filename).key)
 
     def links_for(self, course_id):
         """
@@ -331,6 +476,7 @@ class S3ReportStore(ReportStore):
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if not self.is_partial(key.key)
         ]
 
 
@@ -390,12 +536,43 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        Rows are written to a temporary file as they are consumed, which is
+        then renamed into place, so that only complete files are visible.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        temp_path = full_path + '.tmp'
+        try:
+            with open(temp_path, "wb") as f:
+                csvwriter = csv.writer(f)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of a csv file previously written with `store_rows`,
+        each as a list of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            for row in self._get_unicode_rows(f):
+                yield row
 
-        self.store(course_id, filename, output_buffer)
+    def exists(self, course_id, filename):
+        """Return whether `filename` has been stored for `course_id`."""
+        return os.path.exists(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """Remove `filename` for `course_id`, if it exists."""
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
 
     def links_for(self, course_id):
         """
@@ -408,7 +585,11 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not self.is_partial(filename) and not filename.endswith('.tmp')
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -31,10 +31,12 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
-    rescore_problem_module_state,
+    perform_problem_rescore,
+    rescore_problem_subtask,
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    generate_grade_report_shard,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -61,19 +63,33 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
+
+    Submissions are rescored in batches, and problems with more than
+    `RESCORE_STUDENT_MODULES_PER_SUBTASK` submissions are rescored by parallel
+    `rescore_problem_chunk` subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
     def filter_fcn(modules_to_update):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(perform_problem_rescore, xmodule_instance_args, filter_fcn, subtask=rescore_problem_chunk)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def rescore_problem_chunk(entry_id, action_name, student_module_ids, xmodule_instance_args, subtask_status_dict):
+    """
+    Rescore a chunk of the StudentModules of a problem, as a subtask of
+    `rescore_problem`. See `rescore_problem_subtask` for details.
+    """
+    return rescore_problem_subtask(
+        entry_id, action_name, student_module_ids, xmodule_instance_args, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -151,10 +167,23 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, shard_task=calculate_grades_csv_shard)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, shard_index, student_ids, report_info, subtask_status_dict):
+    """
+    Grade one shard of the students enrolled in a course, as a subtask of
+    `calculate_grades_csv`.
+
+    The rows are written to a partial report file, and the subtask that
+    completes last merges all partial files into the final grade report.
+    See `generate_grade_report_shard` for details.
+    """
+    return generate_grade_report_shard(entry_id, shard_index, student_ids, report_info, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -5,13 +5,16 @@ running state of a course.
 """
 import json
 from datetime import datetime
+from itertools import count, islice
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -19,23 +22,31 @@ from pytz import UTC
 
 from track.views import task_track
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
+from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
+from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 from xmodule.split_test_module import get_split_user_partitions
 
-from certificates.models import CertificateWhitelist, certificate_info_for_user
+from certificates.models import CertificateWhitelist, certificate_info_for_user, certificate_statuses_for_students
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
-from courseware.models import StudentModule
+from courseware.models import DeferredStudentModule, StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
-from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from reverification.models import MidcourseReverificationWindow
 from student.models import CourseEnrollment
 from verify_student.models import SoftwareSecurePhotoVerification
 
@@ -51,6 +62,11 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# Cache key and expiration of the lock that ensures only one grade report
+# subtask merges the shard files.
+GRADE_REPORT_MERGE_LOCK_KEY = u'instructor_task.grade_report.merge.{}'
+GRADE_REPORT_MERGE_LOCK_EXPIRE = 60 * 60
+
 
 class BaseInstructorTask(Task):
     """
@@ -300,11 +316,49 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
+    problems, modules_to_update = _get_problems_and_modules_to_update(course_id, task_input, filter_fcn)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    for module_to_update in modules_to_update:
+        task_progress.attempted += 1
+        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+            update_status = update_fcn(module_descriptor, module_to_update)
+            _count_update_status(task_progress, update_status)
+
+    return task_progress.update_task_state()
+
+
+def _count_update_status(task_progress, update_status):
+    """
+    Add the `update_status` returned by an update function to `task_progress`.
+    """
+    if update_status == UPDATE_STATUS_SUCCEEDED:
+        # If the update_fcn returns true, then it performed some kind of work.
+        # Logging of failures is left to the update_fcn itself.
+        task_progress.succeeded += 1
+    elif update_status == UPDATE_STATUS_FAILED:
+        task_progress.failed += 1
+    elif update_status == UPDATE_STATUS_SKIPPED:
+        task_progress.skipped += 1
+    else:
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+
+
+def _get_problems(course_id, task_input):
+    """
+    Returns a dict mapping the usage ids of the problems named by `task_input`
+    (either a 'problem_url' or an 'entrance_exam_url') to their descriptors,
+    and a list of their usage keys.
+    """
     usage_keys = []
+    problems = {}
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
-    student_identifier = task_input.get('student')
-    problems = {}
 
     # if problem_url is present make a usage key from it
     if problem_url:
@@ -320,6 +374,20 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         problems = get_problems_in_section(entrance_exam_url)
         usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
 
+    return problems, usage_keys
+
+
+def _get_problems_and_modules_to_update(course_id, task_input, filter_fcn):
+    """
+    Returns the problems named by `task_input` (see `_get_problems`), and a
+    queryset of the StudentModules to update for them.
+
+    If `task_input` has a 'student' identifier, only that student's modules
+    are included. `filter_fcn`, if not None, is applied to the queryset.
+    """
+    student_identifier = task_input.get('student')
+    problems, usage_keys = _get_problems(course_id, task_input)
+
     # find the modules in question
     modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
 
@@ -340,28 +408,7 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
-    task_progress.update_task_state()
-
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
-
-    return task_progress.update_task_state()
+    return problems, modules_to_update
 
 
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
@@ -391,16 +438,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    If no `field_data_cache` is given, one is loaded for `module_descriptor` and its descendents.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -446,11 +496,22 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     Returns True if problem was successfully rescored for the given student, and False
     if problem encountered some kind of error in rescoring.
     '''
+    return _rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module)
+
+
+def _rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, field_data_cache=None):
+    """
+    Does the work of `rescore_problem_module_state`, optionally using the given
+    `field_data_cache` to build the student's module.
+    """
     # unpack the StudentModule:
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        field_data_cache=field_data_cache,
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -483,6 +544,155 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
         return UPDATE_STATUS_SUCCEEDED
 
 
+def rescore_student_modules(xmodule_instance_args, course_id, problems, student_module_ids, task_progress):
+    """
+    Rescore the StudentModules with ids `student_module_ids`, whose problems'
+    descriptors are in `problems` (see `_get_problems`), counting the results
+    in `task_progress`.
+
+    StudentModules are loaded `RESCORE_BATCH_SIZE` at a time. All students
+    share the same problem descriptors, each student's module is built on the
+    StudentModule that was already loaded, and the new state and grades of a
+    whole batch are written together, in one transaction.
+
+    As with `perform_module_state_update`, an exception stops the rescoring,
+    though changes to the batch made so far are still saved.
+    """
+    action_tags = [u'action:{name}'.format(name=task_progress.action_name)]
+    for batch_ids in _chunked_iterable(student_module_ids, settings.RESCORE_BATCH_SIZE):
+        student_modules = list(DeferredStudentModule.objects.filter(pk__in=batch_ids).select_related('student'))
+        try:
+            for student_module in student_modules:
+                task_progress.attempted += 1
+                module_descriptor = problems[unicode(student_module.module_state_key)]
+                field_data_cache = FieldDataCache.cache_for_student_modules(
+                    student_module.course_id, student_module.student, [module_descriptor], [student_module]
+                )
+                with dog_stats_api.timer('instructor_tasks.module.time.step', tags=action_tags):
+                    update_status = _rescore_problem_module_state(
+                        xmodule_instance_args, module_descriptor, student_module, field_data_cache
+                    )
+                _count_update_status(task_progress, update_status)
+        finally:
+            with dog_stats_api.timer('instructor_tasks.rescore.batch_save.time', tags=action_tags):
+                with transaction.commit_on_success():
+                    DeferredStudentModule.save_changed(student_modules)
+        task_progress.update_task_state()
+
+
+def perform_problem_rescore(
+        xmodule_instance_args, filter_fcn, entry_id, course_id, task_input, action_name, subtask=None
+):
+    """
+    Rescores the StudentModules selected by `task_input` and `filter_fcn`, as
+    for `perform_module_state_update`, but in batches (see
+    `rescore_student_modules`).
+
+    If `subtask` is given and there are more than
+    `RESCORE_STUDENT_MODULES_PER_SUBTASK` StudentModules to rescore, they are
+    split among `subtask` subtasks that run in parallel, and which each record
+    their progress in the InstructorTask (see `rescore_problem_subtask`).
+    """
+    start_time = time()
+    problems, modules_to_update = _get_problems_and_modules_to_update(course_id, task_input, filter_fcn)
+    total = modules_to_update.count()
+
+    modules_per_subtask = settings.RESCORE_STUDENT_MODULES_PER_SUBTASK
+    if subtask is not None and modules_per_subtask and total > modules_per_subtask:
+        return _queue_rescore_subtasks(
+            entry_id, action_name, modules_to_update, total, xmodule_instance_args, subtask
+        )
+
+    task_progress = TaskProgress(action_name, total, start_time)
+    task_progress.update_task_state()
+    rescore_student_modules(
+        xmodule_instance_args,
+        course_id,
+        problems,
+        modules_to_update.values_list('pk', flat=True).iterator(),
+        task_progress,
+    )
+    return task_progress.update_task_state()
+
+
+def _queue_rescore_subtasks(entry_id, action_name, modules_to_update, total, xmodule_instance_args, subtask):
+    """
+    Split `modules_to_update` into chunks of `RESCORE_STUDENT_MODULES_PER_SUBTASK`
+    and queue a `subtask` to rescore each.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, a requeued parent task should not queue a second
+    # set of subtasks.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued rescore subtasks!", entry.task_id)
+        return json.loads(entry.task_output)
+
+    def _create_rescore_subtask(student_module_list, initial_subtask_status):
+        """Creates a subtask to rescore a chunk of StudentModules."""
+        return subtask.subtask(
+            (
+                entry_id,
+                action_name,
+                [student_module['pk'] for student_module in student_module_list],
+                xmodule_instance_args,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_rescore_subtask,
+        [modules_to_update],
+        [],
+        settings.RESCORE_STUDENT_MODULES_PER_SUBTASK,
+        total,
+    )
+
+
+def rescore_problem_subtask(entry_id, action_name, student_module_ids, xmodule_instance_args, subtask_status_dict):
+    """
+    Rescore a chunk of the StudentModules of a rescoring InstructorTask, and
+    add the results to the InstructorTask's progress with `update_subtask_status`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_progress = TaskProgress(action_name, len(student_module_ids), time())
+
+    try:
+        problems, __ = _get_problems(course_id, json.loads(entry.task_input))
+        rescore_student_modules(xmodule_instance_args, course_id, problems, student_module_ids, task_progress)
+    except Exception:
+        TASK_LOG.exception(
+            u'Task: %s, InstructorTask ID: %s, Course: %s, Rescore subtask failed unexpectedly',
+            current_task_id, entry_id, course_id
+        )
+        # StudentModules that were not reached count as failed, to keep the totals consistent.
+        subtask_status.increment(
+            succeeded=task_progress.succeeded,
+            skipped=task_progress.skipped,
+            failed=len(student_module_ids) - task_progress.succeeded - task_progress.skipped,
+            state=FAILURE,
+        )
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=task_progress.skipped,
+        state=SUCCESS,
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @transaction.autocommit
 def reset_attempts_module_state(xmodule_instance_args, _module_descriptor, student_module):
     """
@@ -525,6 +735,18 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
+def _report_filename(course_id, csv_name, timestamp):
+    """
+    Return the ReportStore filename for the `csv_name` report generated for
+    `course_id` at `timestamp`.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     """
     Upload data as a CSV using ReportStore.
@@ -536,22 +758,245 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This may also be a generator, in which case rows are written
+            out as they are produced.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
     report_store = ReportStore.from_config()
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    report_store.store_rows(course_id, _report_filename(course_id, csv_name, timestamp), rows)
+
+
+def _chunked_iterable(iterable, chunk_size):
+    """
+    Yield successive lists of at most `chunk_size` items from `iterable`,
+    without materializing the whole iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class GradeReportUserData(object):
+    """
+    The per-student data shown next to the grades in a grade report (cohort,
+    experiment groups, enrollment track, verification and certificate
+    status), loaded in bulk for a batch of students.
+
+    Each lookup is a single query for the whole batch, instead of several
+    queries per row.
+    """
+    def __init__(self, course, students, experiment_partitions, course_is_cohorted, has_reverification_windows):
+        course_id = course.id
+        user_ids = [student.id for student in students]
+
+        self.cohort_names = {}
+        if course_is_cohorted:
+            self.cohort_names = dict(CourseUserGroup.objects.filter(
+                course_id=course_id,
+                group_type=CourseUserGroup.COHORT,
+                users__in=user_ids,
+            ).values_list('users', 'name'))
+
+        self.partition_groups = {}
+        partitions_by_key = {
+            partition.scheme.key_for_partition(partition): partition for partition in experiment_partitions
+        }
+        if partitions_by_key:
+            course_tags = UserCourseTag.objects.filter(
+                user__in=user_ids,
+                course_id=course_id,
+                key__in=partitions_by_key.keys(),
+            ).values_list('user_id', 'key', 'value')
+            for user_id, key, value in course_tags:
+                partition = partitions_by_key[key]
+                try:
+                    self.partition_groups[(user_id, partition.id)] = partition.get_group(int(value))
+                except NoSuchUserPartitionGroupError:
+                    pass
+
+        self.enrollment_modes = dict(CourseEnrollment.objects.filter(
+            course_id=course_id,
+            user__in=user_ids,
+        ).values_list('user_id', 'mode'))
+
+        self.verified_user_ids = SoftwareSecurePhotoVerification.verified_user_ids(user_ids)
+        # Without reverification windows every verified user counts as re-verified;
+        # otherwise leave it to verification_status_for_user to check each window.
+        self.user_is_re_verified = None if has_reverification_windows else True
+
+        self.certificate_statuses = certificate_statuses_for_students(user_ids, course_id)
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+class GradeReport(object):
+    """
+    Produces the rows of the grade report for a course.
+
+    `rows()` is a generator, so that rows can be streamed straight to the
+    ReportStore; rows for students who could not be graded are collected in
+    `err_rows` as a side effect.
+    """
+    ERR_HEADER = ["id", "username", "error_msg"]
+
+    def __init__(self, course, task_progress, task_info_string, action_name, status_interval=None, header=None):
+        self.course = course
+        self.task_progress = task_progress
+        self.task_info_string = task_info_string
+        self.action_name = action_name
+        self.status_interval = status_interval
+        self.current_step = {'step': 'Calculating Grades'}
+
+        self.course_is_cohorted = is_course_cohorted(course.id)
+        self.cohorts_header = ['Cohort Name'] if self.course_is_cohorted else []
+
+        self.experiment_partitions = get_split_user_partitions(course.user_partitions)
+        self.group_configs_header = [
+            u'Experiment Group ({})'.format(partition.name) for partition in self.experiment_partitions
+        ]
+
+        self.certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+        certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course.id, whitelist=True)
+        self.whitelisted_user_ids = set(entry.user_id for entry in certificate_whitelist)
+
+        self.has_reverification_windows = MidcourseReverificationWindow.objects.filter(course_id=course.id).exists()
+
+        # The grade columns' labels. Unless given, they're taken from the
+        # first student graded successfully.
+        self.header = header
+        self.err_rows = []
+
+    def rows(self, students):
+        """
+        Grade `students` and yield the report rows, preceded by the header
+        row: at once if the grade columns were given, and otherwise once the
+        first student has been graded successfully.
+
+        Students are graded in batches of `GRADES_DOWNLOAD_BATCH_SIZE`, with
+        the non-grade columns for each batch loaded up front.
+        """
+        batch_size = settings.GRADES_DOWNLOAD_BATCH_SIZE or 1
+        student_counter = 0
+        if self.header is not None:
+            yield self._header_row()
+        for student_batch in _chunked_iterable(students, batch_size):
+            user_data = GradeReportUserData(
+                self.course,
+                student_batch,
+                self.experiment_partitions,
+                self.course_is_cohorted,
+                self.has_reverification_windows,
+            )
+            for student, gradeset, err_msg in iterate_grades_for(self.course, student_batch, batch_size=batch_size):
+                # Periodically update task status (this is a cache write)
+                if self.status_interval and self.task_progress.attempted % self.status_interval == 0:
+                    self.task_progress.update_task_state(extra_meta=self.current_step)
+                self.task_progress.attempted += 1
+
+                # Now add a log entry after certain intervals to get a hint that task is in progress
+                student_counter += 1
+                if student_counter % 1000 == 0:
+                    TASK_LOG.info(
+                        u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                        self.task_info_string,
+                        self.action_name,
+                        self.current_step,
+                        student_counter,
+                        self.task_progress.total
+                    )
+
+                if gradeset:
+                    # We were able to successfully grade this student for this course.
+                    self.task_progress.succeeded += 1
+                    if self.header is None:
+                        self.header = [section['label'] for section in gradeset[u'section_breakdown']]
+                        yield self._header_row()
+                    yield self._row_for_student(student, gradeset, user_data)
+                else:
+                    # An empty gradeset means we failed to grade a student.
+                    self.task_progress.failed += 1
+                    self.err_rows.append([student.id, student.username, err_msg])
+
+    def _header_row(self):
+        """
+        Return the report's header row.
+        """
+        return (
+            ["id", "email", "username", "grade"] + self.header + self.cohorts_header +
+            self.group_configs_header + ['Enrollment Track', 'Verification Status'] +
+            self.certificate_info_header
+        )
+
+    def _row_for_student(self, student, gradeset, user_data):
+        """
+        Return the report row for a successfully graded `student`.
+        """
+        percents = {
+            section['label']: section.get('percent', 0.0)
+            for section in gradeset[u'section_breakdown']
+            if 'label' in section
+        }
+
+        cohorts_group_name = []
+        if self.course_is_cohorted:
+            cohorts_group_name.append(user_data.cohort_names.get(student.id, ''))
+
+        group_configs_group_names = []
+        for partition in self.experiment_partitions:
+            group = user_data.partition_groups.get((student.id, partition.id))
+            group_configs_group_names.append(group.name if group else '')
+
+        enrollment_mode = user_data.enrollment_modes.get(student.id)
+        verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+            student,
+            self.course.id,
+            enrollment_mode,
+            user_is_verified=student.id in user_data.verified_user_ids,
+            user_is_re_verified=user_data.user_is_re_verified,
+        )
+        certificate_info = certificate_info_for_user(
+            student,
+            self.course.id,
+            gradeset['grade'],
+            student.id in self.whitelisted_user_ids,
+            certificate_status=user_data.certificate_statuses.get(student.id),
+        )
+
+        # Not everybody has the same gradable items. If the item is not
+        # found in the user's gradeset, just assume it's a 0. The aggregated
+        # grades for their sections and overall course will be calculated
+        # without regard for the item they didn't have access to, so it's
+        # possible for a student to have a 0.0 show up in their row but
+        # still have 100% for the course.
+        row_percents = [percents.get(label, 0.0) for label in self.header]
+        return (
+            [student.id, student.email, student.username, gradeset['percent']] +
+            row_percents + cohorts_group_name + group_configs_group_names +
+            [enrollment_mode] + [verification_status] + certificate_info
+        )
+
+
+def grade_report_labels(course):
+    """
+    Return the labels of every grade column the grading policy of `course`
+    can produce, in order: those of a student who sees every graded section.
+    """
+    totaled_scores = {
+        section_format: [
+            Score(0.0, 1.0, True, section['section_descriptor'].display_name_with_default)
+            for section in sections
+        ]
+        for section_format, sections in course.grading_context['graded_sections'].iteritems()
+    }
+    gradeset = course.grader.grade(totaled_scores)
+    return [section['label'] for section in gradeset['section_breakdown']]
+
+
+def upload_grades_csv(
+        _xmodule_instance_args, _entry_id, course_id, _task_input, action_name, shard_task=None
+):  # pylint: disable=too-many-statements
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -560,15 +1005,21 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    Rows are streamed to the ReportStore as students are graded, so memory
+    use does not grow with the size of the course.
+
+    If `shard_task` is given and there are more than
+    `GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK` enrolled students, the students
+    are split into shards which are graded in parallel by `shard_task`
+    subtasks (see `generate_grade_report_shard`), and the last subtask to
+    finish merges their output into the final report.
     """
     start_time = time()
     start_date = datetime.now(UTC)
     status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -579,25 +1030,16 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
-
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+    students_per_subtask = settings.GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK
+    if shard_task is not None and students_per_subtask and total_enrolled_students > students_per_subtask:
+        return _queue_grade_report_shards(
+            _entry_id, course_id, action_name, enrolled_students, total_enrolled_students, start_date, shard_task
+        )
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
+    course = get_course_by_id(course_id)
+    grade_report = GradeReport(course, task_progress, task_info_string, action_name, status_interval)
+    current_step = grade_report.current_step
 
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -605,106 +1047,197 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 1000 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_enrolled_students
-            )
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
-
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
-
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
-            )
-
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+    # Grade the students and stream the rows straight to the ReportStore.
+    upload_csv_to_report_store(
+        grade_report.rows(enrolled_students.select_related('profile').iterator()),
+        'grade_report',
+        course_id,
+        start_date
+    )
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_enrolled_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if grade_report.err_rows:
+        upload_csv_to_report_store(
+            [GradeReport.ERR_HEADER] + grade_report.err_rows, 'grade_report_err', course_id, start_date
+        )
 
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _queue_grade_report_shards(
+        entry_id, course_id, action_name, enrolled_students, total_enrolled_students, start_date, shard_task
+):
+    """
+    Split `enrolled_students` into shards of `GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK`
+    students and queue a `shard_task` subtask for each.
+
+    The grade columns are worked out here from the course's grading policy,
+    and every shard writes its rows against them, so that the shards' files
+    line up under the one header the merged report keeps.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, a requeued parent task should not queue a second
+    # set of subtasks.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued grade report subtasks!", entry.task_id)
+        return json.loads(entry.task_output)
+
+    report_info = {
+        'grade_report': _report_filename(course_id, 'grade_report', start_date),
+        'grade_report_err': _report_filename(course_id, 'grade_report_err', start_date),
+        'header': grade_report_labels(get_course_by_id(course_id)),
+    }
+    shard_indexes = count()
+
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade a shard of students."""
+        return shard_task.subtask(
+            (
+                entry_id,
+                next(shard_indexes),
+                [student['pk'] for student in student_list],
+                report_info,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK,
+        total_enrolled_students,
+    )
+
+
+def generate_grade_report_shard(entry_id, shard_index, student_ids, report_info, subtask_status_dict):
+    """
+    Grade one shard of students for a grade report and write its rows to
+    partial files in the ReportStore, under the grade columns given in
+    `report_info['header']`.
+
+    Progress is recorded against the parent InstructorTask with
+    `update_subtask_status`. Whichever subtask finishes last merges all of
+    the partial files into the final report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_info_string = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Shard: {shard}'.format(
+        task_id=current_task_id, entry_id=entry_id, course_id=course_id, shard=shard_index
+    )
+    task_progress = TaskProgress(entry.task_type, len(student_ids), time())
+
+    try:
+        course = get_course_by_id(course_id)
+        grade_report = GradeReport(
+            course, task_progress, task_info_string, entry.task_type, header=report_info['header']
+        )
+        students = User.objects.filter(pk__in=student_ids).select_related('profile')
+        report_store = ReportStore.from_config()
+        with dog_stats_api.timer('instructor_tasks.grade_report.shard.time'):
+            report_store.store_rows(
+                course_id,
+                ReportStore.partial_filename(report_info['grade_report'], shard_index),
+                grade_report.rows(students.iterator()),
+            )
+        if grade_report.err_rows:
+            report_store.store_rows(
+                course_id,
+                ReportStore.partial_filename(report_info['grade_report_err'], shard_index),
+                [GradeReport.ERR_HEADER] + grade_report.err_rows,
+            )
+    except Exception:
+        TASK_LOG.exception(u'%s, Grade report shard failed unexpectedly', task_info_string)
+        # Students that were not reached count as failed, to keep the totals consistent.
+        subtask_status.increment(
+            succeeded=task_progress.succeeded,
+            failed=len(student_ids) - task_progress.succeeded,
+            state=FAILURE,
+        )
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        merge_grade_report_shards_if_complete(entry_id, course_id, report_info)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    merge_grade_report_shards_if_complete(entry_id, course_id, report_info)
+    return subtask_status.to_dict()
+
+
+def merge_grade_report_shards_if_complete(entry_id, course_id, report_info):
+    """
+    If every grade report subtask of InstructorTask `entry_id` has finished,
+    merge the partial files they wrote into the final reports. A cache lock
+    makes sure only one subtask performs the merge.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    if not cache.add(GRADE_REPORT_MERGE_LOCK_KEY.format(entry_id), 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE):
+        return
+
+    report_store = ReportStore.from_config()
+    num_shards = subtask_dict['total']
+    with dog_stats_api.timer('instructor_tasks.grade_report.merge.time'):
+        for csv_name in ('grade_report', 'grade_report_err'):
+            filename = report_info[csv_name]
+            partial_filenames = [
+                ReportStore.partial_filename(filename, shard_index)
+                for shard_index in range(num_shards)
+                if report_store.exists(course_id, ReportStore.partial_filename(filename, shard_index))
+            ]
+            if partial_filenames or csv_name == 'grade_report':
+                report_store.store_rows(
+                    course_id, filename, _merged_rows(report_store, course_id, partial_filenames)
+                )
+            for partial_filename in partial_filenames:
+                report_store.delete(course_id, partial_filename)
+    TASK_LOG.info(u'InstructorTask ID: %s, Merged %s grade report shards', entry_id, num_shards)
+
+
+def _merged_rows(report_store, course_id, partial_filenames):
+    """
+    Yield the rows of each of the given partial CSV files in turn, keeping
+    only the first file's header row.
+    """
+    header_written = False
+    for partial_filename in partial_filenames:
+        rows = report_store.read_rows(course_id, partial_filename)
+        for row_index, row in enumerate(rows):
+            if row_index == 0:
+                if header_written:
+                    continue
+                header_written = True
+            yield row
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -8,7 +8,7 @@ import time
 from datetime import datetime
 from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from instructor_task.models import LocalFSReportStore, S3ReportStore, _iter_lines
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -93,6 +93,26 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_store_and_read_rows(self):
+        report_store = self.create_report_store()
+        rows = [[u'id', u'username'], [1, u'ni\xf1o'], [2, u'multi\nline']]
+        report_store.store_rows(self.course_id, 'report.csv', (row for row in rows))
+        self.assertEqual(
+            list(report_store.read_rows(self.course_id, 'report.csv')),
+            [[u'id', u'username'], [u'1', u'ni\xf1o'], [u'2', u'multi\nline']]
+        )
+
+    def test_partial_files_not_linked(self):
+        report_store = self.create_report_store()
+        partial_filename = report_store.partial_filename('report.csv', 0)
+        report_store.store_rows(self.course_id, partial_filename, [[u'id']])
+        report_store.store_rows(self.course_id, 'report.csv', [[u'id']])
+        self.assertTrue(report_store.exists(self.course_id, partial_filename))
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
+        report_store.delete(self.course_id, partial_filename)
+        self.assertFalse(report_store.exists(self.course_id, partial_filename))
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +125,16 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+
+class IterLinesTestCase(TestCase):
+    """
+    Test splitting chunks of a CSV file into lines.
+    """
+    def test_lines_split_across_chunks(self):
+        chunks = ['id,na', 'me\n1,a\n2', ',b']
+        self.assertEqual(list(_iter_lines(chunks)), ['id,name\n', '1,a\n', '2,b'])
+
+    def test_crlf_split_across_chunks(self):
+        chunks = ['id,name\r', '\n1,a\r\n2,b\r', '\n']
+        self.assertEqual(list(_iter_lines(chunks)), ['id,name\r\n', '1,a\r\n', '2,b\r\n'])
@@ -11,6 +11,7 @@ from uuid import uuid4
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
@@ -258,6 +259,28 @@ class TestRescoreInstructorTask(TestInstructorTasks):
         self.assertEquals(output.get('action_name'), 'rescored')
         self.assertGreater(output.get('duration_ms'), 0)
 
+    def test_rescoring_in_subtasks(self):
+        input_state = json.dumps({'done': True})
+        num_students = 10
+        self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(return_value={'success': 'correct'})
+        with patch('instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            with override_settings(RESCORE_STUDENT_MODULES_PER_SUBTASK=3, RESCORE_BATCH_SIZE=2):
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+        self.assertEquals(mock_instance.rescore_problem.call_count, num_students)
+        # check the progress aggregated from the subtasks
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.subtasks)['total'], 4)
+        output = json.loads(entry.task_output)
+        self.assertEquals(output.get('attempted'), num_students)
+        self.assertEquals(output.get('succeeded'), num_students)
+        self.assertEquals(output.get('total'), num_students)
+        self.assertEquals(output.get('action_name'), 'rescored')
+
     def test_rescoring_bad_result(self):
         # Confirm that rescoring does not succeed if "success" key is not an expected value.
         input_state = json.dumps({'done': True})
@@ -7,15 +7,22 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
 import unicodecsv
+from uuid import uuid4
+
+from celery.states import SUCCESS
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_grades_csv_shard
 from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
@@ -261,6 +268,82 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
 
+class TestShardedGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports split across subtasks are merged correctly.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(5)
+        ]
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_sharded_report_matches_single_task(self, _mock_current_task):
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK=None):
+            upload_grades_csv(None, None, self.course.id, None, 'graded')
+        report_store = ReportStore.from_config()
+        single_task_filename = report_store.links_for(self.course.id)[0][0]
+        single_task_rows = list(report_store.read_rows(self.course.id, single_task_filename))
+        report_store.delete(self.course.id, single_task_filename)
+
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_id=str(uuid4()),
+            task_output='',
+            subtasks='',
+        )
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK=2):
+            upload_grades_csv(None, entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        # Only the merged report is visible, and it holds the same rows.
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        sharded_rows = list(report_store.read_rows(self.course.id, links[0][0]))
+        self.assertEqual(sharded_rows[0], single_task_rows[0])
+        self.assertItemsEqual(sharded_rows[1:], single_task_rows[1:])
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    @patch('instructor_task.tasks_helper.grade_report_labels', return_value=[u'HW 01', u'HW 02'])
+    @patch('instructor_task.tasks_helper.iterate_grades_for')
+    def test_shards_share_the_header(self, mock_iterate_grades_for, _mock_labels, _mock_current_task):
+        def iterate_grades_for(_course, students, **_kwargs):
+            """Grade the first shard's students on the second homework only."""
+            for student in students:
+                labels = [u'HW 02'] if student.username in (u'student0', u'student1') else [u'HW 01', u'HW 02']
+                breakdown = [{'label': label, 'percent': 0.5} for label in labels]
+                yield student, {'section_breakdown': breakdown, 'percent': 0.5, 'grade': None}, ''
+        mock_iterate_grades_for.side_effect = iterate_grades_for
+
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_id=str(uuid4()),
+            task_output='',
+            subtasks='',
+        )
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK=2):
+            upload_grades_csv(None, entry.id, self.course.id, None, 'graded', shard_task=calculate_grades_csv_shard)
+
+        report_store = ReportStore.from_config()
+        rows = list(report_store.read_rows(self.course.id, report_store.links_for(self.course.id)[0][0]))
+        header = rows[0]
+        self.assertEqual(header[4:6], [u'HW 01', u'HW 02'])
+        rows_by_username = {row[2]: dict(zip(header, row)) for row in rows[1:]}
+        self.assertEqual(len(rows_by_username), 5)
+        self.assertEqual(rows_by_username[u'student0'][u'HW 01'], u'0.0')
+        self.assertEqual(rows_by_username[u'student0'][u'HW 02'], u'0.5')
+        self.assertEqual(rows_by_username[u'student4'][u'HW 01'], u'0.5')
+
+
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
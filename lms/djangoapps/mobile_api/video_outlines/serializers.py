@@ -1,22 +1,38 @@
 """
 Serializer for video outline
 """
+from functools import partial
+import hashlib
+import json
+
+from django.core.cache import cache
 from rest_framework.reverse import reverse
 
+from opaque_keys.edx.keys import UsageKey
+from xmodule.modulestore.django import get_course_version, modulestore
 from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
-from courseware.access import has_access
+from courseware.access import BlockLoadAccess, get_load_access_fields
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor
-from util.module_utils import get_dynamic_descriptor_children
 
 from edxval.api import (
     get_video_info_for_course_and_profiles, ValInternalError
 )
 
 
+# How long a course's video outline is cached for. Outlines are rebuilt when
+# the course changes; this bounds how stale the VAL encodings in them get.
+VIDEO_OUTLINE_CACHE_TIMEOUT = 60 * 60
+
+
 class BlockOutline(object):
     """
     Serializes course videos, pulling data from VAL and the video modules.
+
+    The outline is the same for every user: it includes all the blocks of
+    requested types, with URLs relative to the site if `request` is None, and
+    the information needed to decide which users can see each of them in its
+    "access" entry (see UserVideoOutline).
     """
     def __init__(self, course_id, start_block, block_types, request, video_profiles):
         """Create a BlockOutline using `start_block` as a starting point."""
@@ -42,17 +58,6 @@ class BlockOutline(object):
                 usage_key.block_type in BLOCK_TYPES_WITH_CHILDREN
             )
 
-        def create_module(descriptor):
-            """
-            Factory method for creating and binding a module for the given descriptor.
-            """
-            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-                self.course_id, self.request.user, descriptor, depth=0,
-            )
-            return get_module_for_descriptor(
-                self.request.user, self.request, descriptor, field_data_cache, self.course_id
-            )
-
         child_to_parent = {}
         stack = [self.start_block]
         while stack:
@@ -68,9 +73,6 @@ class BlockOutline(object):
                 continue
 
             if curr_block.location.block_type in self.block_types:
-                if not has_access(self.request.user, 'load', curr_block, course_key=self.course_id):
-                    continue
-
                 summary_fn = self.block_types[curr_block.category]
                 block_path = list(path(curr_block, child_to_parent, self.start_block))
                 unit_url, section_url = find_urls(self.course_id, curr_block, child_to_parent, self.request)
@@ -80,20 +82,131 @@ class BlockOutline(object):
                     "named_path": [b["name"] for b in block_path],
                     "unit_url": unit_url,
                     "section_url": section_url,
-                    "summary": summary_fn(self.course_id, curr_block, self.request, self.local_cache)
+                    "summary": summary_fn(self.course_id, curr_block, self.request, self.local_cache),
+                    "access": block_access(curr_block, child_to_parent),
                 }
 
             if curr_block.has_children:
-                children = get_dynamic_descriptor_children(
-                    curr_block,
-                    create_module,
-                    usage_key_filter=parent_or_requested_block_type
-                )
+                if curr_block.has_dynamic_children():
+                    # Which of these children a user sees is decided per user
+                    children = curr_block.get_children()
+                else:
+                    children = curr_block.get_children(usage_key_filter=parent_or_requested_block_type)
                 for block in reversed(children):
                     stack.append(block)
                     child_to_parent[block] = curr_block
 
 
+def block_access(block, child_to_parent):
+    """
+    Returns what UserVideoOutline needs to know to decide whether a user can
+    load `block`: its load access fields, and the blocks with dynamic
+    children on the way to it, with the child it's under.
+    """
+    dynamic_parents = []
+    child = block
+    while child in child_to_parent:
+        parent = child_to_parent[child]
+        if parent.has_dynamic_children():
+            dynamic_parents.append((unicode(parent.location), child.location.block_id))
+        child = parent
+
+    return {
+        "fields": get_load_access_fields(block),
+        "dynamic_parents": dynamic_parents,
+    }
+
+
+def get_video_outline(course, video_profiles):
+    """
+    Returns the video outline of `course` (see BlockOutline), with the
+    summaries of `video_profiles` encodings.
+
+    Outlines are cached by the course's published version, so that one is
+    built once per change to the course rather than for every request.
+    """
+    course_version = get_course_version(course)
+    cache_key = u'mobile_api.video_outline.{}'.format(hashlib.sha1(json.dumps(
+        [unicode(course.id), course_version, video_profiles]
+    )).hexdigest())
+
+    outline = cache.get(cache_key) if course_version is not None else None
+    if outline is None:
+        outline = list(BlockOutline(
+            course.id,
+            modulestore().get_course(course.id, depth=None),
+            {"video": partial(video_summary, video_profiles)},
+            None,
+            video_profiles,
+        ))
+        if course_version is not None:
+            cache.set(cache_key, outline, VIDEO_OUTLINE_CACHE_TIMEOUT)
+    return outline
+
+
+class UserVideoOutline(object):
+    """
+    Iterates over the entries of a video outline built by BlockOutline which
+    the user of `request` can load, with their URLs made absolute.
+
+    Users are allowed to load an entry by the same rules as
+    courseware.access.has_access(user, 'load', descriptor) applies to its
+    block, and they only see the children of blocks with dynamic children
+    (e.g. split tests) that those blocks show them.
+    """
+    def __init__(self, outline, course, request):
+        self.outline = outline
+        self.course = course
+        self.request = request
+        self.user = request.user
+        self.load_access = BlockLoadAccess(self.user, course)
+        self._dynamic_children = {}
+
+    def __iter__(self):
+        for entry in self.outline:
+            if not self.can_load(entry["access"]):
+                continue
+
+            entry = dict(entry)
+            del entry["access"]
+            entry["unit_url"] = self.request.build_absolute_uri(entry["unit_url"])
+            entry["section_url"] = self.request.build_absolute_uri(entry["section_url"])
+            summary = entry["summary"] = dict(entry["summary"])
+            summary["transcripts"] = {
+                lang: self.request.build_absolute_uri(url)
+                for lang, url in summary["transcripts"].iteritems()
+            }
+            yield entry
+
+    def can_load(self, access):
+        """
+        Returns whether the user can load the block whose access information
+        (see block_access) is `access`.
+        """
+        for parent_key, child_id in access["dynamic_parents"]:
+            if child_id not in self.get_dynamic_children(parent_key):
+                return False
+        return self.load_access.can_load(access["fields"])
+
+    def get_dynamic_children(self, parent_key):
+        """
+        Returns the block ids of the children the block `parent_key`, a block
+        with dynamic children, shows the user.
+        """
+        if parent_key not in self._dynamic_children:
+            descriptor = modulestore().get_item(UsageKey.from_string(parent_key))
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+                self.course.id, self.user, descriptor, depth=0,
+            )
+            module = get_module_for_descriptor(
+                self.user, self.request, descriptor, field_data_cache, self.course.id
+            )
+            self._dynamic_children[parent_key] = set(
+                child.location.block_id for child in module.get_child_descriptors()
+            ) if module is not None else set()
+        return self._dynamic_children[parent_key]
+
+
 def path(block, child_to_parent, start_block):
     """path for block"""
     block_path = []
@@ -7,6 +7,7 @@ import ddt
 import itertools
 from uuid import uuid4
 from collections import namedtuple
+from mock import patch
 
 from edxval import api
 from mobile_api.models import MobileApiConfig
@@ -861,6 +862,43 @@ class TestVideoSummaryList(
                 set(case.expected_transcripts)
             )
 
+    def test_etag(self):
+        self.login_and_enroll()
+        self._create_video_with_subs()
+        url = self.reverse_url()
+
+        etag = self.api_response()['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ItemFactory.create(parent=self.other_unit, category="video", display_name=u"another video")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_outline_is_cached(self):
+        self.login_and_enroll()
+        self._create_video_with_subs()
+        course_outline = self.api_response().data
+
+        with patch('mobile_api.video_outlines.serializers.BlockOutline') as block_outline:
+            self.assertEqual(self.api_response().data, course_outline)
+        self.assertFalse(block_outline.called)
+
+    def test_outline_is_rebuilt_when_course_changes(self):
+        self.login_and_enroll()
+        self._create_video_with_subs()
+        course_outline = self.api_response().data
+
+        ItemFactory.create(
+            parent=self.other_unit,
+            category="video",
+            display_name=u"test video omega 2 \u03a9",
+            html5_sources=[self.html5_video_url]
+        )
+        self.assertEqual(len(self.api_response().data), len(course_outline) + 1)
+
 
 class TestTranscriptsDetail(
     TestVideoAPITestCase, MobileAuthTestMixin, MobileEnrolledCourseAccessTestMixin, TestVideoAPIMixin  # pylint: disable=bad-continuation
@@ -6,9 +6,11 @@ only displayed at the course level. This is because it makes it a lot easier to
 optimize and reason about, and it avoids having to tackle the bigger problem of
 general XBlock representation in this rather specialized formatting.
 """
-from functools import partial
+import hashlib
+import json
 
 from django.http import Http404, HttpResponse
+from django.utils.http import parse_etags, quote_etag
 from mobile_api.models import MobileApiConfig
 
 from rest_framework import generics
@@ -19,7 +21,7 @@ from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import modulestore
 
 from ..utils import mobile_view, mobile_course_access
-from .serializers import BlockOutline, video_summary
+from .serializers import UserVideoOutline, get_video_outline
 
 
 @mobile_view()
@@ -75,21 +77,20 @@ class VideoSummaryList(generics.ListAPIView):
                 * id: The unique identifier for the video.
 
                 * size: The size of the video file
+
+        The response has an ETag header; if it matches the If-None-Match
+        header of the request, the response is a 304 with no content.
     """
 
-    @mobile_course_access(depth=None)
+    @mobile_course_access()
     def list(self, request, course, *args, **kwargs):
         video_profiles = MobileApiConfig.get_video_profiles()
-        video_outline = list(
-            BlockOutline(
-                course.id,
-                course,
-                {"video": partial(video_summary, video_profiles)},
-                request,
-                video_profiles,
-            )
-        )
-        return Response(video_outline)
+        video_outline = list(UserVideoOutline(get_video_outline(course, video_profiles), course, request))
+
+        etag = quote_etag(hashlib.md5(json.dumps(video_outline, sort_keys=True, default=unicode)).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=304, headers={'ETag': etag})
+        return Response(video_outline, headers={'ETag': etag})
 
 
 @mobile_view()
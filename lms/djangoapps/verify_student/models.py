@@ -214,6 +214,20 @@ class PhotoVerification(StatusModel):
             window=window
         ).exists()
 
+    @classmethod
+    def verified_user_ids(cls, user_ids, earliest_allowed_date=None, window=None):
+        """
+        Bulk version of `user_is_verified`: return the set of ids among
+        `user_ids` whose users have satisfactorily proved their identity.
+        """
+        return set(cls.objects.filter(
+            user__in=user_ids,
+            status="approved",
+            created_at__gte=(earliest_allowed_date
+                             or cls._earliest_allowed_date()),
+            window=window
+        ).values_list('user_id', flat=True))
+
     @classmethod
     def verification_valid_or_pending(cls, user, earliest_allowed_date=None, window=None, queryset=None):
         """
@@ -938,19 +952,25 @@ class SoftwareSecurePhotoVerification(PhotoVerification):
         return attempt
 
     @classmethod
-    def verification_status_for_user(cls, user, course_id, user_enrollment_mode):
+    def verification_status_for_user(cls, user, course_id, user_enrollment_mode,
+                                     user_is_verified=None, user_is_re_verified=None):
         """
         Returns the verification status for use in grade report.
+
+        `user_is_verified` and `user_is_re_verified` may be passed in when
+        they have already been determined, to avoid querying for them.
         """
         if user_enrollment_mode not in CourseMode.VERIFIED_MODES:
             return 'N/A'
 
-        user_is_verified = cls.user_is_verified(user)
+        if user_is_verified is None:
+            user_is_verified = cls.user_is_verified(user)
 
         if not user_is_verified:
             return 'Not ID Verified'
         else:
-            user_is_re_verified = cls.user_is_reverified_for_all(course_id, user)
+            if user_is_re_verified is None:
+                user_is_re_verified = cls.user_is_reverified_for_all(course_id, user)
             if not user_is_re_verified:
                 return 'ID Verification Expired'
             else:
@@ -134,6 +134,8 @@ if STATIC_URL_BASE:
 MEDIA_ROOT = ENV_TOKENS.get('MEDIA_ROOT', MEDIA_ROOT)
 MEDIA_URL = ENV_TOKENS.get('MEDIA_URL', MEDIA_URL)
 
+STATIC_CONTENT_DISK_CACHE.update(ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE', {}))
+
 PLATFORM_NAME = ENV_TOKENS.get('PLATFORM_NAME', PLATFORM_NAME)
 # For displaying on the receipt. At Stanford PLATFORM_NAME != MERCHANT_NAME, but PLATFORM_NAME is a fine default
 PLATFORM_TWITTER_ACCOUNT = ENV_TOKENS.get('PLATFORM_TWITTER_ACCOUNT', PLATFORM_TWITTER_ACCOUNT)
@@ -206,6 +208,9 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_MAX_SEND_RATE = ENV_TOKENS.get('BULK_EMAIL_MAX_SEND_RATE', BULK_EMAIL_MAX_SEND_RATE)
+BULK_EMAIL_MIN_SEND_RATE = ENV_TOKENS.get('BULK_EMAIL_MIN_SEND_RATE', BULK_EMAIL_MIN_SEND_RATE)
+BULK_EMAIL_MAX_THROTTLED_SENDS = ENV_TOKENS.get('BULK_EMAIL_MAX_THROTTLED_SENDS', BULK_EMAIL_MAX_THROTTLED_SENDS)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -403,6 +408,8 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
+SPLIT_STRUCTURE_CACHE_SIZE = ENV_TOKENS.get('SPLIT_STRUCTURE_CACHE_SIZE', SPLIT_STRUCTURE_CACHE_SIZE)
+SPLIT_DEFINITION_CACHE_SIZE = ENV_TOKENS.get('SPLIT_DEFINITION_CACHE_SIZE', SPLIT_DEFINITION_CACHE_SIZE)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
 OPEN_ENDED_GRADING_INTERFACE = AUTH_TOKENS.get('OPEN_ENDED_GRADING_INTERFACE',
@@ -477,6 +484,19 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_DOWNLOAD_BATCH_SIZE = ENV_TOKENS.get("GRADES_DOWNLOAD_BATCH_SIZE", GRADES_DOWNLOAD_BATCH_SIZE)
+GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK = ENV_TOKENS.get(
+    "GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK", GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK
+)
+
+# Problem rescoring
+RESCORE_BATCH_SIZE = ENV_TOKENS.get("RESCORE_BATCH_SIZE", RESCORE_BATCH_SIZE)
+RESCORE_STUDENT_MODULES_PER_SUBTASK = ENV_TOKENS.get(
+    "RESCORE_STUDENT_MODULES_PER_SUBTASK", RESCORE_STUDENT_MODULES_PER_SUBTASK
+)
+
+# Views whose database queries are counted
+QUERY_COUNT_VIEWS = ENV_TOKENS.get("QUERY_COUNT_VIEWS", QUERY_COUNT_VIEWS)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
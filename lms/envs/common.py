@@ -269,6 +269,23 @@ FEATURES = {
     # only edX superusers can perform the downloads)
     'ALLOW_COURSE_STAFF_GRADE_DOWNLOADS': False,
 
+    # Store per-section grading results for each student so that grading only
+    # recomputes the sections whose scores changed since the last time.
+    'PERSISTENT_GRADE_SUMMARIES': False,
+
+    # Keep counts of students' answers up to date as they submit problems, and
+    # build the answer distribution report from them instead of from every
+    # student's problem state. When turning this on, run the
+    # recompute_answer_distributions command for existing courses.
+    'ENABLE_ANSWER_DISTRIBUTION_AGGREGATE': False,
+
+    # Keep counts of students' problem grades and opened subsections up to
+    # date as their module state is saved, and build the class dashboard
+    # metrics from them instead of from every student's module state. Needs
+    # CLASS_DASHBOARD. When turning this on, and regularly from then on, run
+    # the reconcile_dashboard_metrics command.
+    'ENABLE_CLASS_DASHBOARD_AGGREGATES': False,
+
     'ENABLED_PAYMENT_REPORTS': [
         "refund_report",
         "itemized_purchase_report",
@@ -575,6 +592,8 @@ TRACK_MAX_EVENT = 50000
 
 DEBUG_TRACK_LOG = False
 
+# A backend with a 'BUFFER' entry is sent events in batches from a background
+# thread, rather than one by one while handling requests (see track.backends.buffered)
 TRACKING_BACKENDS = {
     'logger': {
         'ENGINE': 'track.backends.logger.LoggerBackend',
@@ -679,6 +698,27 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Bytes of split modulestore structures kept in each process. Structures never
+# change once written, so they're cached by version; if a 'course_structure_cache'
+# cache is configured, they're shared between processes through it as well.
+SPLIT_STRUCTURE_CACHE_SIZE = 200 * 1024 * 1024
+
+# Bytes of split modulestore definitions kept in each process. Like structures,
+# definitions never change once written, so they're cached by id.
+SPLIT_DEFINITION_CACHE_SIZE = 100 * 1024 * 1024
+
+# Keep copies of large, frequently served assets (videos, PDFs) on the app
+# server's disk, so they aren't read out of the contentstore for every request.
+# A DIRECTORY of None turns this off.
+STATIC_CONTENT_DISK_CACHE = {
+    'DIRECTORY': None,
+    # Total bytes to keep; least recently served assets are removed first.
+    'MAX_SIZE': 10 * 1024 ** 3,
+    # Larger assets are always served from the contentstore.
+    'MAX_FILE_SIZE': 1024 ** 3,
+    'CONTENT_TYPES': ('video/', 'application/pdf'),
+}
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -739,6 +779,19 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Warm sandbox workers that run jailed code without starting a new Python
+    # each time (see capa.safe_exec.pool).  A size of 0 turns the pool off.
+    'pool': {
+        # How many workers each LMS process keeps.
+        'size': 0,
+        # How many executions a worker runs before it's replaced.
+        'max_runs': 100,
+        # Seconds to wait for a free worker before running code unpooled.
+        'queue_timeout': 2,
+        # Seconds an execution may take on a worker before it's killed.
+        'exec_timeout': 10,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1108,12 +1161,19 @@ MIDDLEWARE_CLASSES = (
     # to redirected unenrolled students to the course info page
     'courseware.middleware.RedirectUnenrolledMiddleware',
 
+    # reports the number of queries made by the views in QUERY_COUNT_VIEWS
+    'courseware.middleware.QueryCountMiddleware',
+
     'course_wiki.middleware.WikiAccessMiddleware',
 
     # This must be last
     'microsite_configuration.middleware.MicrositeSessionCookieDomainMiddleware',
 )
 
+# The dotted paths of the views whose queries are counted by
+# courseware.middleware.QueryCountMiddleware
+QUERY_COUNT_VIEWS = ('courseware.views.index', 'courseware.views.progress')
+
 # Clickjacking protection can be enabled by setting this to 'DENY'
 X_FRAME_OPTIONS = 'ALLOW'
 
@@ -1577,6 +1637,19 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Maximum number of bulk email messages sent per second, by all workers
+# together.  The rate is lowered when the mail server throttles us, and
+# raised again over time up to this.  If None, the rate isn't limited, and
+# BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS is used instead.
+BULK_EMAIL_MAX_SEND_RATE = None
+
+# Rate, in messages per second, which throttling never lowers the rate below.
+BULK_EMAIL_MIN_SEND_RATE = 1
+
+# With BULK_EMAIL_MAX_SEND_RATE set, the number of times a message throttled
+# by the mail server is sent again before the whole task is retried.
+BULK_EMAIL_MAX_THROTTLED_SENDS = 5
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1744,6 +1817,7 @@ INSTALLED_APPS = (
     'lms.djangoapps.lms_xblock',
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
     'course_structure_api',
 
     # Mailchimp Syncing
@@ -1868,8 +1942,9 @@ VERIFY_STUDENT = {
 
 ### This enables the Metrics tab for the Instructor dashboard ###########
 FEATURES['CLASS_DASHBOARD'] = False
-if FEATURES.get('CLASS_DASHBOARD'):
-    INSTALLED_APPS += ('class_dashboard',)
+# Installed whatever the feature, which is often only turned on in later
+# settings, so that the tables of its stored metrics exist
+INSTALLED_APPS += ('class_dashboard',)
 
 ######################## CAS authentication ###########################
 
@@ -1926,6 +2001,25 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Number of students whose raw scores are loaded together when generating
+# grade reports. Set to None to grade students one at a time.
+GRADES_DOWNLOAD_BATCH_SIZE = 100
+
+# Grade reports for courses with more enrolled students than this are split
+# into subtasks of this many students each, which run in parallel. Set to
+# None to always generate grade reports in a single task.
+GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK = 5000
+
+###################### Problem Rescoring ######################
+# Number of StudentModules that are loaded, rescored and saved together when
+# rescoring a problem.
+RESCORE_BATCH_SIZE = 100
+
+# Rescoring tasks for problems with more submissions than this are split into
+# subtasks of this many submissions each, which run in parallel. Set to None
+# to always rescore in a single task.
+RESCORE_STUDENT_MODULES_PER_SUBTASK = 2000
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
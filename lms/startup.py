@@ -30,6 +30,8 @@ def run():
 
     add_mimetypes()
 
+    configure_safe_exec_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
@@ -59,6 +61,14 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def configure_safe_exec_pool():
+    """
+    Set up the pool of warm sandbox workers used to run problem code.
+    """
+    from capa.safe_exec import pool
+    pool.configure(**settings.CODE_JAIL.get('pool', {}))
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
@@ -0,0 +1,12 @@
+from ratelimitbackend import admin
+
+from .models import CourseOverview
+
+
+class CourseOverviewAdmin(admin.ModelAdmin):
+    search_fields = ('id',)
+    list_display = ('id', 'display_name', 'version', 'modified')
+    ordering = ('id',)
+
+
+admin.site.register(CourseOverview, CourseOverviewAdmin)
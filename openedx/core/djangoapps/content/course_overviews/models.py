@@ -0,0 +1,244 @@
+"""
+Declaration of CourseOverview model
+"""
+import json
+import logging
+from datetime import datetime
+
+from django.db import IntegrityError
+from django.db.models.fields import BooleanField, DateTimeField, FloatField, IntegerField, TextField
+from django.utils.translation import ugettext
+from model_utils.models import TimeStampedModel
+from pytz import UTC
+
+from util.date_utils import strftime_localized
+from xmodule.course_module import DEFAULT_START_DATE
+from xmodule.error_module import ErrorDescriptor
+from xmodule.fields import Date
+from xmodule.modulestore.django import modulestore
+from xmodule_django.models import CourseKeyField
+
+
+log = logging.getLogger(__name__)
+
+
+class CourseOverview(TimeStampedModel):
+    """
+    The information about a course that is shown in course listings, such as
+    the student dashboard, copied out of the modulestore so that the
+    overviews of many courses can be loaded with one query.
+
+    Overviews are built from the modulestore the first time they're asked
+    for, and are deleted when their course is published, to be rebuilt with
+    the published content.
+
+    The methods and properties used by listings mirror those of
+    CourseDescriptor, so that an overview can stand in for its course there.
+    """
+    # Increment when the fields or the way they're computed change, so that
+    # stale overviews get rebuilt
+    VERSION = 1
+
+    version = IntegerField()
+
+    # Course identification
+    id = CourseKeyField(db_index=True, primary_key=True, max_length=255)  # pylint: disable=invalid-name
+    display_name = TextField(null=True)
+    display_name_with_default = TextField()
+    display_number_with_default = TextField()
+    display_org_with_default = TextField()
+
+    # Dates
+    start = DateTimeField(null=True)
+    end = DateTimeField(null=True)
+    advertised_start = TextField(null=True)
+
+    # URLs
+    course_image_url = TextField()
+    social_sharing_url = TextField(null=True)
+    end_of_course_survey_url = TextField(null=True)
+
+    # Certificate settings
+    certificates_display_behavior = TextField(null=True)
+    certificates_show_before_end = BooleanField(default=False)
+    cert_name_short = TextField()
+    cert_name_long = TextField()
+    lowest_passing_grade = FloatField(null=True)
+
+    # Access settings
+    days_early_for_beta = FloatField(null=True)
+    mobile_available = BooleanField(default=False)
+    visible_to_staff_only = BooleanField(default=False)
+    _pre_requisite_courses_json = TextField()
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Return a new, unsaved, CourseOverview of `course`, a CourseDescriptor.
+        """
+        # Imported here because course_image_url is only available in the LMS,
+        # which is the only place overviews are built.
+        from courseware.courses import course_image_url
+
+        grade_cutoffs = course.grade_cutoffs
+        return cls(
+            version=cls.VERSION,
+            id=course.id,
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_number_with_default=course.display_number_with_default,
+            display_org_with_default=course.display_org_with_default,
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            course_image_url=course_image_url(course),
+            social_sharing_url=course.social_sharing_url,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            lowest_passing_grade=min(grade_cutoffs.values()) if grade_cutoffs else None,
+            days_early_for_beta=course.days_early_for_beta,
+            mobile_available=course.mobile_available,
+            visible_to_staff_only=course.visible_to_staff_only,
+            _pre_requisite_courses_json=json.dumps(course.pre_requisite_courses),
+        )
+
+    @classmethod
+    def load_from_module_store(cls, course_id):
+        """
+        Build and save the CourseOverview of the course `course_id` from the
+        modulestore. Returns None if the course doesn't exist or is broken.
+        """
+        store = modulestore()
+        with store.bulk_operations(course_id):
+            course = store.get_course(course_id)
+        if course is None or isinstance(course, ErrorDescriptor):
+            return None
+
+        overview = cls._create_from_course(course)
+        try:
+            overview.save()
+        except IntegrityError:
+            # Another request saved this course's overview first
+            log.info(u"Course overview of %s was saved concurrently", course_id)
+        return overview
+
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Return a dict mapping each of `course_ids` to its CourseOverview, or to
+        None if the course doesn't exist or is broken.
+
+        Up to date overviews are loaded with one query; the others are built
+        from the modulestore.
+        """
+        overviews = {
+            overview.id: overview
+            for overview in cls.objects.filter(id__in=course_ids, version=cls.VERSION)
+        }
+        for course_id in course_ids:
+            if course_id not in overviews:
+                overviews[course_id] = cls.load_from_module_store(course_id)
+        return overviews
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Return the CourseOverview of the course `course_id`, or None if the
+        course doesn't exist or is broken.
+        """
+        return cls.get_from_ids([course_id])[course_id]
+
+    @property
+    def number(self):
+        """
+        The course's number, as given by its key.
+        """
+        return self.id.course
+
+    @property
+    def org(self):
+        """
+        The course's organization, as given by its key.
+        """
+        return self.id.org
+
+    @property
+    def pre_requisite_courses(self):
+        """
+        The ids of the courses which must be completed before this one.
+        """
+        return json.loads(self._pre_requisite_courses_json)
+
+    def has_started(self):
+        """
+        Returns True if the current time is after the course start date.
+        """
+        return datetime.now(UTC) > self.start
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the course end date.
+        Returns False if there is no end date specified.
+        """
+        if self.end is None:
+            return False
+        return datetime.now(UTC) > self.end
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        show_early = (
+            self.certificates_display_behavior in ('early_with_info', 'early_no_info') or
+            self.certificates_show_before_end
+        )
+        return show_early or self.has_ended()
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, i.e. .start has not been modified,
+        and .advertised_start has not been set.
+        """
+        return self.advertised_start is None and self.start == DEFAULT_START_DATE
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the desired text corresponding the course's start date and time in UTC.  Prefers .advertised_start,
+        then falls back to .start
+        """
+        if self.advertised_start is not None:
+            try:
+                when = Date().from_json(self.advertised_start)
+            except ValueError:
+                when = None
+            if when is None:
+                return self.advertised_start.title()
+        elif self.start_date_is_still_default:
+            # Translators: TBD stands for 'To Be Determined' and is used when a course
+            # does not yet have an announced start date.
+            return ugettext('TBD')
+        else:
+            when = self.start
+
+        text = strftime_localized(when, format_string)
+        return text + u" UTC" if format_string == "DATE_TIME" else text
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the end date or date_time for the course formatted as a string.
+
+        If the course does not have an end date set (course.end is None), an empty string will be returned.
+        """
+        if self.end is None:
+            return ''
+        text = strftime_localized(self.end, format_string)
+        return text if format_string == "SHORT_DATE" else text + u" UTC"
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
@@ -0,0 +1,17 @@
+"""
+Signal handler for invalidating cached course overviews
+"""
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+
+@receiver(SignalHandler.course_published)
+def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete the published course's overview, so that it is rebuilt with the
+    published content the next time it's asked for.
+    """
+    # Import here to avoid a circular import.
+    from .models import CourseOverview
+    CourseOverview.objects.filter(id=course_key).delete()
@@ -0,0 +1,91 @@
+"""
+Tests for course_overviews app.
+"""
+import datetime
+
+from mock import Mock, patch
+from pytz import UTC
+
+from courseware.courses import course_image_url
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import SignalHandler, modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from .models import CourseOverview
+
+
+class CourseOverviewTestCase(ModuleStoreTestCase):
+    """
+    Tests for CourseOverview model.
+    """
+    def setUp(self):
+        super(CourseOverviewTestCase, self).setUp()
+        self.course = CourseFactory.create(
+            org='edX',
+            course='OverviewX',
+            run='2015',
+            display_name='Overview Course',
+            start=datetime.datetime(2015, 1, 1, tzinfo=UTC),
+            end=datetime.datetime(2015, 6, 1, tzinfo=UTC),
+            mobile_available=True,
+            certificates_show_before_end=True,
+        )
+
+    def test_overview_matches_course(self):
+        overview = CourseOverview.get_from_id(self.course.id)
+
+        for attribute_name in (
+                'id', 'display_name', 'display_name_with_default', 'display_number_with_default',
+                'display_org_with_default', 'start', 'end', 'advertised_start', 'social_sharing_url',
+                'certificates_display_behavior', 'certificates_show_before_end', 'cert_name_short',
+                'cert_name_long', 'lowest_passing_grade', 'days_early_for_beta', 'mobile_available',
+                'visible_to_staff_only', 'pre_requisite_courses', 'number', 'org',
+                'start_date_is_still_default',
+        ):
+            self.assertEqual(getattr(overview, attribute_name), getattr(self.course, attribute_name), attribute_name)
+        for method_name in ('has_started', 'has_ended', 'may_certify', 'start_datetime_text', 'end_datetime_text'):
+            self.assertEqual(getattr(overview, method_name)(), getattr(self.course, method_name)(), method_name)
+        self.assertEqual(overview.course_image_url, course_image_url(self.course))
+
+    def test_overview_is_saved(self):
+        CourseOverview.get_from_id(self.course.id)
+        other_course = CourseFactory.create()
+        CourseOverview.get_from_id(other_course.id)
+
+        with self.assertNumQueries(1):
+            overviews = CourseOverview.get_from_ids([self.course.id, other_course.id])
+        self.assertEqual(set(overviews), {self.course.id, other_course.id})
+
+    def test_outdated_overview_is_rebuilt(self):
+        CourseOverview.get_from_id(self.course.id)
+        CourseOverview.objects.filter(id=self.course.id).update(version=CourseOverview.VERSION - 1)
+
+        overview = CourseOverview.get_from_id(self.course.id)
+
+        self.assertEqual(overview.version, CourseOverview.VERSION)
+        self.assertEqual(CourseOverview.objects.get(id=self.course.id).version, CourseOverview.VERSION)
+
+    def test_publish_deletes_overview(self):
+        CourseOverview.get_from_id(self.course.id)
+
+        self.course.display_name = 'Renamed Course'
+        modulestore().update_item(self.course, ModuleStoreEnum.UserID.test)
+        SignalHandler.course_published.send(sender=None, course_key=self.course.id)
+
+        self.assertFalse(CourseOverview.objects.filter(id=self.course.id).exists())
+        self.assertEqual(CourseOverview.get_from_id(self.course.id).display_name, 'Renamed Course')
+
+    def test_deleted_course(self):
+        course_key = self.course.id
+        modulestore().delete_course(course_key, ModuleStoreEnum.UserID.test)
+
+        self.assertIsNone(CourseOverview.get_from_id(course_key))
+
+    def test_errored_course(self):
+        course = CourseFactory.create(default_store=ModuleStoreEnum.Type.mongo)
+
+        with patch('xmodule.modulestore.mongo.base.MongoKeyValueStore', Mock(side_effect=Exception)):
+            self.assertIsInstance(modulestore().get_course(course.id), ErrorDescriptor)
+            self.assertIsNone(CourseOverview.get_from_id(course.id))
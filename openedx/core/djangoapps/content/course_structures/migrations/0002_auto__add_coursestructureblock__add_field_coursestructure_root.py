@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseStructureBlock'
+        db.create_table('course_structures_coursestructureblock', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('course_structure', self.gf('django.db.models.fields.related.ForeignKey')(related_name='blocks', to=orm['course_structures.CourseStructure'])),
+            ('usage_key', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('version', self.gf('django.db.models.fields.CharField')(max_length=255, null=True, blank=True)),
+            ('block_json', self.gf('django.db.models.fields.TextField')()),
+        ))
+        db.send_create_signal('course_structures', ['CourseStructureBlock'])
+
+        # Adding unique constraint on 'CourseStructureBlock', fields ['course_structure', 'usage_key']
+        db.create_unique('course_structures_coursestructureblock', ['course_structure_id', 'usage_key'])
+
+        # Adding field 'CourseStructure.root'
+        db.add_column('course_structures_coursestructure', 'root',
+                      self.gf('django.db.models.fields.CharField')(max_length=255, null=True, blank=True),
+                      keep_default=False)
+
+        # Adding field 'CourseStructure.version'
+        db.add_column('course_structures_coursestructure', 'version',
+                      self.gf('django.db.models.fields.CharField')(max_length=255, null=True, blank=True),
+                      keep_default=False)
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'CourseStructureBlock', fields ['course_structure', 'usage_key']
+        db.delete_unique('course_structures_coursestructureblock', ['course_structure_id', 'usage_key'])
+
+        # Deleting model 'CourseStructureBlock'
+        db.delete_table('course_structures_coursestructureblock')
+
+        # Deleting field 'CourseStructure.root'
+        db.delete_column('course_structures_coursestructure', 'root')
+
+        # Deleting field 'CourseStructure.version'
+        db.delete_column('course_structures_coursestructure', 'version')
+
+
+    models = {
+        'course_structures.coursestructure': {
+            'Meta': {'object_name': 'CourseStructure'},
+            'course_id': ('xmodule_django.models.CourseKeyField', [], {'unique': 'True', 'max_length': '255', 'db_index': 'True'}),
+            'created': ('model_utils.fields.AutoCreatedField', [], {'default': 'datetime.datetime.now'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'modified': ('model_utils.fields.AutoLastModifiedField', [], {'default': 'datetime.datetime.now'}),
+            'root': ('django.db.models.fields.CharField', [], {'max_length': '255', 'null': 'True', 'blank': 'True'}),
+            'structure_json': ('util.models.CompressedTextField', [], {'null': 'True', 'blank': 'True'}),
+            'version': ('django.db.models.fields.CharField', [], {'max_length': '255', 'null': 'True', 'blank': 'True'})
+        },
+        'course_structures.coursestructureblock': {
+            'Meta': {'unique_together': "(('course_structure', 'usage_key'),)", 'object_name': 'CourseStructureBlock'},
+            'block_json': ('django.db.models.fields.TextField', [], {}),
+            'course_structure': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'blocks'", 'to': "orm['course_structures.CourseStructure']"}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'usage_key': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'version': ('django.db.models.fields.CharField', [], {'max_length': '255', 'null': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['course_structures']
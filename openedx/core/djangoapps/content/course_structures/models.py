@@ -1,6 +1,7 @@
 import json
 import logging
 
+from django.db import models
 from model_utils.models import TimeStampedModel
 
 from util.models import CompressedTextField
@@ -20,12 +21,79 @@ class CourseStructure(TimeStampedModel):
     # we'd have to be careful about caching.
     structure_json = CompressedTextField(verbose_name='Structure JSON', blank=True, null=True)
 
+    # Structures are now stored block by block, in CourseStructureBlock rows,
+    # so that they can be updated one changed block at a time, and read one
+    # subtree at a time. structure_json is only read for structures stored
+    # before then, which have no root.
+    root = models.CharField(max_length=255, blank=True, null=True)
+    # The version of the split structure the blocks were generated from, or
+    # None if the course isn't stored in split
+    version = models.CharField(max_length=255, blank=True, null=True)
+
     @property
     def structure(self):
+        if self.root is not None:
+            return self.get_structure()
         if self.structure_json:
             return json.loads(self.structure_json)
         return None
 
+    def get_structure(self, root=None):
+        """
+        Return the structure of the subtree under the block `root` (a usage key
+        string), or of the whole course if `root` is None, in the format of
+        `structure`. Raises CourseStructureBlock.DoesNotExist if there's no
+        block `root`.
+
+        Only the subtree's blocks are read, one level of the tree at a time.
+        """
+        blocks = {}
+        if root is None:
+            root = self.root
+            for block in self.blocks.all():
+                blocks[block.usage_key] = block.block
+        else:
+            level = [root]
+            while level:
+                level_blocks = [
+                    block for block in self.blocks.filter(usage_key__in=level)
+                    if block.usage_key not in blocks
+                ]
+                level = []
+                for block in level_blocks:
+                    blocks[block.usage_key] = block.block
+                    level.extend(block.block['children'])
+            if root not in blocks:
+                raise CourseStructureBlock.DoesNotExist(root)
+
+        return {
+            'root': root,
+            'blocks': blocks,
+        }
+
+
+class CourseStructureBlock(models.Model):
+    """
+    The structure of one block of a course: the JSON of the block, as found in
+    CourseStructure.structure['blocks'].
+    """
+    course_structure = models.ForeignKey(CourseStructure, related_name='blocks')
+    usage_key = models.CharField(max_length=255)
+    # The version of the split structure the block was last changed in, or
+    # None if the course isn't stored in split
+    version = models.CharField(max_length=255, blank=True, null=True)
+    block_json = models.TextField()
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('course_structure', 'usage_key'),)
+
+    @property
+    def block(self):
+        """
+        The JSON-parsed structure of the block.
+        """
+        return json.loads(self.block_json)
+
 # Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
 # at the end of this file to avoid circular dependencies.
 import signals  # pylint: disable=unused-import
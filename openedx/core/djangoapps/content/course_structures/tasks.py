@@ -2,58 +2,135 @@ import json
 import logging
 
 from celery.task import task
+from django.db import transaction
 from opaque_keys.edx.keys import CourseKey
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import get_course_version, modulestore
 
 
 log = logging.getLogger('edx.celery.task')
 
 
-def _generate_course_structure(course_key):
+def _iter_blocks(course):
     """
-    Generates a course structure dictionary for the specified course.
+    Yield the blocks of `course`, a course loaded with depth=None.
     """
-    course = modulestore().get_course(course_key, depth=None)
     blocks_stack = [course]
-    blocks_dict = {}
     while blocks_stack:
         curr_block = blocks_stack.pop()
-        children = curr_block.get_children() if curr_block.has_children else []
-        key = unicode(curr_block.scope_ids.usage_id)
-        block = {
-            "usage_key": key,
-            "block_type": curr_block.category,
-            "display_name": curr_block.display_name,
-            "children": [unicode(child.scope_ids.usage_id) for child in children]
-        }
-
-        # Retrieve these attributes separately so that we can fail gracefully if the block doesn't have the attribute.
-        attrs = (('graded', False), ('format', None))
-        for attr, default in attrs:
-            if hasattr(curr_block, attr):
-                block[attr] = getattr(curr_block, attr, default)
-            else:
-                log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
-                block[attr] = default
-
-        blocks_dict[key] = block
+        yield curr_block
 
         # Add this blocks children to the stack so that we can traverse them as well.
-        blocks_stack.extend(children)
+        if curr_block.has_children:
+            blocks_stack.extend(curr_block.get_children())
+
+
+def _generate_block_structure(block):
+    """
+    Generates the structure dictionary of `block`.
+    """
+    children = block.get_children() if block.has_children else []
+    key = unicode(block.scope_ids.usage_id)
+    structure = {
+        "usage_key": key,
+        "block_type": block.category,
+        "display_name": block.display_name,
+        "children": [unicode(child.scope_ids.usage_id) for child in children]
+    }
+
+    # Retrieve these attributes separately so that we can fail gracefully if the block doesn't have the attribute.
+    attrs = (('graded', False), ('format', None))
+    for attr, default in attrs:
+        if hasattr(block, attr):
+            structure[attr] = getattr(block, attr, default)
+        else:
+            log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
+            structure[attr] = default
+
+    return structure
+
+
+def _generate_course_structure(course_key):
+    """
+    Generates a course structure dictionary for the specified course.
+    """
+    course = modulestore().get_course(course_key, depth=None)
+    blocks_dict = {}
+    for block in _iter_blocks(course):
+        blocks_dict[unicode(block.scope_ids.usage_id)] = _generate_block_structure(block)
     return {
         "root": unicode(course.scope_ids.usage_id),
         "blocks": blocks_dict
     }
 
 
+def _get_version(block):
+    """
+    Return the version of the split structure in which `block` was last
+    changed, or None if it isn't stored in split.
+    """
+    version = getattr(block, 'update_version', None)
+    return unicode(version) if version is not None else None
+
+
+@transaction.commit_on_success
+def _update_course_structure(course_key):
+    """
+    Brings the stored structure of the specified course up to date with the
+    modulestore, writing only the blocks which changed since it was stored.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructure, CourseStructureBlock
+
+    store = modulestore()
+    cs, __ = CourseStructure.objects.get_or_create(course_id=course_key)
+    with store.bulk_operations(course_key):
+        version = get_course_version(store.get_course(course_key))
+        if version is not None and version == cs.version:
+            log.debug('Course structure of %s is up to date with version %s.', course_key, version)
+            return
+
+        course = store.get_course(course_key, depth=None)
+        stored_blocks = {block.usage_key: block for block in cs.blocks.all()}
+        new_blocks = []
+        changed_count = 0
+        for block in _iter_blocks(course):
+            key = unicode(block.scope_ids.usage_id)
+            block_version = _get_version(block)
+            stored_block = stored_blocks.pop(key, None)
+            if stored_block is not None and block_version is not None and stored_block.version == block_version:
+                continue
+
+            block_json = json.dumps(_generate_block_structure(block), sort_keys=True)
+            if stored_block is None:
+                new_blocks.append(CourseStructureBlock(
+                    course_structure=cs, usage_key=key, version=block_version, block_json=block_json
+                ))
+            elif stored_block.block_json != block_json or stored_block.version != block_version:
+                CourseStructureBlock.objects.filter(id=stored_block.id).update(
+                    version=block_version, block_json=block_json
+                )
+                changed_count += 1
+
+    # The blocks left over were removed from the course
+    if stored_blocks:
+        CourseStructureBlock.objects.filter(id__in=[block.id for block in stored_blocks.values()]).delete()
+    CourseStructureBlock.objects.bulk_create(new_blocks)
+    log.info(
+        'Updated course structure of %s: %d blocks added, %d changed, %d removed.',
+        course_key, len(new_blocks), changed_count, len(stored_blocks)
+    )
+
+    cs.root = unicode(course.scope_ids.usage_id)
+    cs.version = version
+    cs.structure_json = None
+    cs.save()
+
+
 @task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
 def update_course_structure(course_key):
     """
     Regenerates and updates the course structure (in the database) for the specified course.
     """
-    # Import here to avoid circular import.
-    from .models import CourseStructure
-
     # Ideally we'd like to accept a CourseLocator; however, CourseLocator is not JSON-serializable (by default) so
     # Celery's delayed tasks fail to start. For this reason, callers should pass the course key as a Unicode string.
     if not isinstance(course_key, basestring):
@@ -62,18 +139,7 @@ def update_course_structure(course_key):
     course_key = CourseKey.from_string(course_key)
 
     try:
-        structure = _generate_course_structure(course_key)
+        _update_course_structure(course_key)
     except Exception as ex:
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
-
-    structure_json = json.dumps(structure)
-
-    cs, created = CourseStructure.objects.get_or_create(
-        course_id=course_key,
-        defaults={'structure_json': structure_json}
-    )
-
-    if not created:
-        cs.structure_json = structure_json
-        cs.save()
@@ -1,10 +1,14 @@
 import json
 
+from mock import patch
+
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
-from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure, CourseStructureBlock
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
+from openedx.core.djangoapps.content.course_structures import tasks
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
 
 
@@ -128,3 +132,79 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         cs = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(cs.course_id, course_id)
         self.assertEqual(cs.structure, structure)
+
+    def test_update_changed_blocks(self):
+        """
+        Updating the course structure should only rewrite the blocks which changed.
+        """
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        course_block = cs.blocks.get(usage_key=unicode(self.course.location))
+
+        self.section.display_name = 'Renamed Section'
+        self.store.update_item(self.section, self.user.id)
+        sequential = ItemFactory.create(parent=self.section, category='sequential')
+        update_course_structure(unicode(self.course.id))
+
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertEqual(cs.structure, _generate_course_structure(self.course.id))
+        self.assertEqual(cs.structure['blocks'][unicode(self.section.location)]['display_name'], 'Renamed Section')
+        self.assertEqual(cs.blocks.get(usage_key=unicode(self.course.location)).id, course_block.id)
+
+        self.store.delete_item(sequential.location, self.user.id)
+        update_course_structure(unicode(self.course.id))
+
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertEqual(cs.structure, _generate_course_structure(self.course.id))
+        self.assertFalse(cs.blocks.filter(usage_key=unicode(sequential.location)).exists())
+
+    def test_legacy_structure_is_replaced(self):
+        """
+        Structures stored as JSON should be replaced by the blocks.
+        """
+        CourseStructure.objects.create(course_id=self.course.id, structure_json=json.dumps({'root': 'a/b/c'}))
+        update_course_structure(unicode(self.course.id))
+
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertIsNone(cs.structure_json)
+        self.assertEqual(cs.structure, _generate_course_structure(self.course.id))
+
+    def test_up_to_date_structure(self):
+        """
+        A course whose version hasn't changed shouldn't be walked again.
+        """
+        for store_type in (ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split):
+            course = CourseFactory.create(default_store=store_type)
+            ItemFactory.create(parent=course, category='chapter')
+            update_course_structure(unicode(course.id))
+
+            with patch.object(tasks, '_iter_blocks') as iter_blocks:
+                update_course_structure(unicode(course.id))
+            self.assertFalse(iter_blocks.called)
+
+            self.assertEqual(
+                CourseStructure.objects.get(course_id=course.id).structure,
+                _generate_course_structure(course.id)
+            )
+
+    def test_get_subtree(self):
+        """
+        CourseStructure.get_structure should return the blocks under the given root.
+        """
+        sequential = ItemFactory.create(parent=self.section, category='sequential')
+        ItemFactory.create(parent=self.course, category='chapter')
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+
+        structure = cs.get_structure(unicode(self.section.location))
+
+        self.assertEqual(structure['root'], unicode(self.section.location))
+        self.assertEqual(
+            structure['blocks'],
+            {
+                key: block for key, block in cs.structure['blocks'].iteritems()
+                if key in (unicode(self.section.location), unicode(sequential.location))
+            }
+        )
+        with self.assertRaises(CourseStructureBlock.DoesNotExist):
+            cs.get_structure('nonexistent')